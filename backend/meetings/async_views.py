@@ -0,0 +1,470 @@
+"""Async variants of the meeting CRUD endpoints.
+
+DRF's @api_view cannot wrap coroutines, so these are plain Django async
+views that authenticate the bearer token with SimpleJWT and mirror the
+request/response shapes of their counterparts in ``meetings.views``.
+Under ASGI a worker can keep many Zoom round-trips in flight at once.
+"""
+import asyncio
+import json
+import logging
+import math
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .changes import (
+    check_changes_signature, get_change_hub, meeting_deleted_event, meeting_event, publish, recording_deleted_event
+)
+from .models import Meeting, Recording, Mentor
+from .mirror import delete_mirror
+from .pagination import InvalidCursor, apaginate_keyset, get_page_size
+from .reminders import parse_reminder_offsets, reschedule_reminders, schedule_reminders
+from .response_cache import aget_version, bump_version, get_cache_key, response_cache
+from .rollups import delete_recordings, remove_meeting
+from .streaming import (
+    CONTENT_TYPES, RangeNotSatisfiable, RecordingStream, UpstreamError, check_stream_signature, get_block_cache,
+    get_size, iter_recording, parse_range, probe_size
+)
+from .views import (
+    RECORDING_ORDERING, RETRY_LATER_ERRORS, build_zoom_meeting_data, meeting_fields_from_zoom,
+    recordings_queryset, serialize_recording
+)
+from .zoom import ZoomAPIError, ZoomRateLimited, ZoomUnavailable
+from .zoom_async import AsyncZoomClient
+
+logger = logging.getLogger(__name__)
+
+async def authenticate_request(request):
+    """Return the user for the request's JWT, or None"""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+def async_api_view(methods):
+    """Method check, JWT authentication and JSON body parsing for async views"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+
+            user = await authenticate_request(request)
+            if user is None:
+                return JsonResponse(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+            request.user = user
+
+            try:
+                request.data = json.loads(request.body) if request.body else {}
+            except ValueError:
+                return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+
+            return await view(request, *args, **kwargs)
+        return csrf_exempt(wrapper)
+    return decorator
+
+def retry_later_response(error):
+    retry_after = max(math.ceil(error.retry_after), 1)
+    response = JsonResponse(
+        {'error': RETRY_LATER_ERRORS[error.status_code], 'retry_after': retry_after},
+        status=error.status_code
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+@async_api_view(['POST'])
+async def create_meeting(request):
+    """Create a new meeting"""
+    try:
+        mentor, created = await Mentor.objects.aget_or_create(
+            user=request.user,
+            defaults={
+                'zoom_account_id': settings.ZOOM_ACCOUNT_ID,
+                'zoom_client_id': settings.ZOOM_CLIENT_ID,
+                'zoom_client_secret': settings.ZOOM_CLIENT_SECRET
+            }
+        )
+
+        if not request.data.get('topic'):
+            return JsonResponse(
+                {'error': 'Topic is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            reminder_offsets = parse_reminder_offsets(request.data.get('reminder_offsets'))
+        except ValueError as e:
+            return JsonResponse(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        meeting_type = request.data.get('type', 2)
+        try:
+            zoom_data = await AsyncZoomClient.for_mentor(mentor).create_meeting(
+                build_zoom_meeting_data(request.data)
+            )
+        except (ZoomRateLimited, ZoomUnavailable) as e:
+            return retry_later_response(e)
+        except ZoomAPIError as e:
+            logger.error(f"Zoom API error: {e.message}")
+            return JsonResponse(
+                {'error': f'Failed to create meeting in Zoom: {e.message}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        meeting = await Meeting.objects.acreate(
+            mentor=mentor,
+            **meeting_fields_from_zoom(zoom_data, meeting_type)
+        )
+        await sync_to_async(schedule_reminders)([meeting], reminder_offsets)
+        await sync_to_async(bump_version)(mentor)
+        await sync_to_async(publish)(mentor, meeting_event('meeting.created', meeting))
+
+        return JsonResponse({
+            'id': meeting.id,
+            'meeting_id': meeting.meeting_id,
+            'topic': meeting.topic,
+            'join_url': meeting.join_url,
+            'password': meeting.password,
+            'start_time': meeting.start_time,
+            'duration': meeting.duration,
+            'host_email': meeting.host_email,
+            'batch_name': 'N/A'
+        }, status=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        logger.error(f"Error creating meeting: {str(e)}")
+        return JsonResponse(
+            {'error': f'Failed to create meeting: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@async_api_view(['PUT'])
+async def update_meeting(request, meeting_id):
+    """Update an existing meeting"""
+    try:
+        meeting = await Meeting.objects.select_related('mentor').aget(
+            meeting_id=meeting_id,
+            mentor__user=request.user
+        )
+
+        start_time = request.data.get('start_time', meeting.start_time)
+        data = {
+            'topic': request.data.get('topic', meeting.topic),
+            'duration': request.data.get('duration', meeting.duration),
+            'timezone': request.data.get('timezone', meeting.timezone),
+            'agenda': request.data.get('agenda', meeting.agenda),
+            'settings': request.data.get('settings', meeting.settings)
+        }
+
+        if isinstance(start_time, str):
+            try:
+                start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+            except ValueError:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Invalid start_time format. Use ISO 8601 format.'
+                }, status=400)
+        if start_time:
+            data['start_time'] = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+        start_time_changed = start_time != meeting.start_time
+
+        await AsyncZoomClient.for_mentor(meeting.mentor).update_meeting(meeting_id, data)
+
+        for field in ('topic', 'duration', 'timezone', 'agenda', 'settings'):
+            setattr(meeting, field, data[field])
+        meeting.start_time = start_time
+        await meeting.asave()
+        if start_time_changed:
+            await sync_to_async(reschedule_reminders)(meeting)
+        await sync_to_async(bump_version)(meeting.mentor)
+        await sync_to_async(publish)(meeting.mentor, meeting_event('meeting.updated', meeting))
+
+        return JsonResponse({
+            'success': True,
+            'meeting': {
+                'id': meeting.meeting_id,
+                'topic': meeting.topic,
+                'start_time': meeting.start_time,
+                'duration': meeting.duration,
+                'join_url': meeting.join_url,
+                'timezone': meeting.timezone,
+                'agenda': meeting.agenda,
+                'settings': meeting.settings
+            }
+        })
+
+    except Meeting.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'error': 'Meeting not found'
+        }, status=404)
+    except (ZoomRateLimited, ZoomUnavailable) as e:
+        return retry_later_response(e)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Failed to update meeting: {str(e)}'
+        }, status=500)
+
+@async_api_view(['DELETE'])
+async def delete_meeting(request, meeting_id):
+    """Delete a meeting"""
+    try:
+        mentor = await Mentor.objects.aget(user=request.user)
+        meeting = await Meeting.objects.aget(meeting_id=meeting_id, mentor=mentor)
+
+        try:
+            await AsyncZoomClient.for_mentor(mentor).delete_meeting(meeting_id)
+        except (ZoomRateLimited, ZoomUnavailable) as e:
+            # Deleting only locally would leave the meeting live in Zoom
+            return retry_later_response(e)
+        except ZoomAPIError as e:
+            if e.status_code != 404:
+                logger.error(f"Zoom API error: {e.message}")
+            # Continue with database deletion even if Zoom deletion fails
+
+        await sync_to_async(remove_meeting)(meeting)
+        await sync_to_async(bump_version)(mentor)
+        await sync_to_async(publish)(mentor, meeting_deleted_event(meeting))
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    except Mentor.DoesNotExist:
+        return JsonResponse(
+            {'error': 'Mentor profile not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Meeting.DoesNotExist:
+        return JsonResponse(
+            {'error': 'Meeting not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        logger.error(f"Error deleting meeting: {str(e)}")
+        return JsonResponse(
+            {'error': 'Failed to delete meeting'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@async_api_view(['GET'])
+async def list_recordings(request):
+    """List all recordings for the authenticated mentor"""
+    try:
+        key = get_cache_key('async_recordings', request)
+        version = await aget_version(request.user.id)
+        data = response_cache.get(key, version)
+        if data is not None:
+            response = JsonResponse(data, encoder=JSONEncoder)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        mentor = await Mentor.objects.aget(user=request.user)
+        recordings, next_cursor = await apaginate_keyset(
+            recordings_queryset(mentor, request.GET),
+            RECORDING_ORDERING,
+            cursor=request.GET.get('cursor'),
+            page_size=get_page_size(request, settings.MEETINGS_PAGE_SIZE, settings.MEETINGS_MAX_PAGE_SIZE)
+        )
+        data = {
+            'success': True,
+            'recordings': [serialize_recording(recording) for recording in recordings],
+            'next': next_cursor
+        }
+        response_cache.set(key, version, data)
+        # DRF's encoder, so cached and fresh responses (and the sync view) match
+        response = JsonResponse(data, encoder=JSONEncoder)
+        response['X-Cache'] = 'MISS'
+        return response
+    except Mentor.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'error': 'Mentor profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except (InvalidCursor, ValueError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Invalid filter: {str(e)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error listing recordings: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': 'Failed to list recordings'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@async_api_view(['DELETE'])
+async def delete_recording(request, recording_id):
+    """Delete a recording"""
+    try:
+        mentor = await Mentor.objects.aget(user=request.user)
+        recording = await Recording.objects.select_related('meeting').aget(id=recording_id, meeting__mentor=mentor)
+
+        # Zoom knows the file by its own id; rows without one were never on Zoom
+        if recording.zoom_file_id:
+            await AsyncZoomClient.for_mentor(mentor).delete_recording(
+                recording.meeting.meeting_id, recording.zoom_file_id
+            )
+        await sync_to_async(delete_mirror)(recording)
+        await sync_to_async(delete_recordings)(Recording.objects.filter(id=recording.id))
+        await sync_to_async(bump_version)(mentor)
+        await sync_to_async(publish)(mentor, recording_deleted_event(recording))
+
+        return JsonResponse({
+            'success': True,
+            'message': 'Recording deleted successfully'
+        })
+
+    except (Mentor.DoesNotExist, Recording.DoesNotExist):
+        return JsonResponse({
+            'success': False,
+            'error': 'Recording not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except (ZoomRateLimited, ZoomUnavailable) as e:
+        return retry_later_response(e)
+    except Exception as e:
+        logger.error(f"Error deleting recording: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': 'Failed to delete recording'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@csrf_exempt
+async def stream_recording(request, recording_id):
+    """Stream a recording's file, honouring single-range ``Range`` requests.
+
+    Authenticated by a bearer JWT of the meeting's mentor or an enrolled
+    student, or by the signed ``sig`` parameter of the ``stream_url`` that
+    the recordings listing returns (players cannot send headers).
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse(
+            {'detail': f'Method "{request.method}" not allowed.'},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    recordings = Recording.objects.select_related('meeting__mentor')
+    if check_stream_signature(request.GET.get('sig', ''), recording_id):
+        recording = await recordings.filter(id=recording_id).afirst()
+    else:
+        user = await authenticate_request(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        recording = await recordings.filter(
+            Q(meeting__mentor__user=user) | Q(meeting__students__user=user), id=recording_id
+        ).afirst()
+    if recording is None:
+        return JsonResponse({'success': False, 'error': 'Recording not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        size = get_size(recording)
+        if size is None:
+            size = recording.file_size = await probe_size(recording)
+            await recording.asave(update_fields=['file_size'])
+
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        start, end = byte_range or (0, size - 1)
+
+        chunks = None
+        if request.method == 'GET':
+            chunks = iter_recording(recording, start, end, size, get_block_cache())
+            # Open upstream before answering, so Zoom being down is a 503 rather than a cut stream
+            first = await anext(chunks)
+    except (ZoomRateLimited, ZoomUnavailable) as e:
+        return retry_later_response(e)
+    except (ZoomAPIError, UpstreamError) as e:
+        logger.error(f"Error streaming recording {recording_id}: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'Recording is not available'}, status=status.HTTP_502_BAD_GATEWAY)
+
+    content_type = CONTENT_TYPES.get(recording.recording_type, 'application/octet-stream')
+    if chunks is None:
+        response = HttpResponse(content_type=content_type)
+    else:
+        response = StreamingHttpResponse(RecordingStream(chunks, first), content_type=content_type)
+    if byte_range:
+        response.status_code = status.HTTP_206_PARTIAL_CONTENT
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+@csrf_exempt
+async def change_stream(request):
+    """Server-sent events announcing changes to the authenticated mentor's meetings and recordings.
+
+    Authenticated by a bearer JWT or by the ``sig`` parameter of the URL
+    change_stream_url returns (EventSource cannot send headers). Each
+    event's name is its type and its data the JSON event; ``resync`` asks
+    the client to reload its listings. Needs an ASGI server.
+    """
+    if request.method != 'GET':
+        return JsonResponse(
+            {'detail': f'Method "{request.method}" not allowed.'},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    # Signed URLs are only issued to mentors, so a reconnecting dashboard costs no query
+    user_id = check_changes_signature(request.GET.get('sig', ''))
+    if user_id is None:
+        user = await authenticate_request(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        if not await Mentor.objects.filter(user=user).aexists():
+            return JsonResponse({'error': 'Mentor profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        user_id = user.id
+        # Django would only close it when the stream ends; the hub's own connection carries the events
+        await sync_to_async(connection.close)()
+
+    hub = get_change_hub()
+    queue = hub.subscribe(user_id)
+
+    async def events():
+        try:
+            yield b'retry: 5000\n\n'
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), settings.CHANGE_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from timing the connection out, and notices clients that left
+                    yield b': ping\n\n'
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            hub.unsubscribe(user_id, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the events
+    return response
@@ -0,0 +1,201 @@
+"""Attendance of meetings, summarized from the participant events.
+
+zoom_meetings.ingest stores every join and leave Zoom reports as a
+ParticipantEvent. A user is often in a meeting more than once at a time:
+on a laptop and a phone, or rejoining before Zoom noticed the first
+connection drop. Each join therefore opens a span that the same Zoom
+participant's next event closes (the meeting's last event, when the leave
+never arrived), and a user's spans are merged where they overlap before
+adding up the time. On PostgreSQL that is one statement per chunk of
+meetings: ``LEAD`` pairs the events into spans, a running ``MAX`` of the
+span ends marks where a new stretch of attendance starts, a running
+``SUM`` of those marks numbers the stretches, and grouping by that number
+merges them. The result lands in AttendanceSummary through
+``INSERT ... SELECT``, so no event is ever loaded into Python. Other
+databases run the same algorithm over the event rows in Python.
+
+``refresh_attendance`` summarizes meetings once they complete
+(``Meeting.is_completed()``), and again while events keep arriving after
+that (participants staying after the scheduled end, late webhooks), until
+ATTENDANCE_RECHECK_HOURS after the meeting started. Reports only read
+AttendanceSummary.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from zoom_meetings.models import ParticipantEvent
+
+from .models import AttendanceSummary, Meeting
+
+# Events committed by a flush that was already running when a refresh started
+# carry an earlier received_at than the refresh; look back this far for them
+FLUSH_MARGIN = timedelta(seconds=5)
+
+SUMMARY_COLUMNS = [
+    'meeting_id', 'user_id', 'first_joined_at', 'last_left_at', 'attended_seconds', 'sessions',
+    'late_seconds', 'left_early_seconds', 'computed_at'
+]
+
+SUMMARY_SQL = """
+WITH target AS (
+    SELECT m.id AS meeting_id, z.id AS zoom_meeting_id, m.start_time AS scheduled_start,
+           m.start_time + m.duration * INTERVAL '1 minute' AS scheduled_end
+    FROM meetings_meeting m
+    JOIN zoom_meetings_meeting z ON z.meeting_id = m.meeting_id
+    WHERE m.id = ANY(%(meeting_ids)s)
+),
+events AS (
+    SELECT t.meeting_id, e.user_id, e.event, e.occurred_at,
+           LEAD(e.occurred_at) OVER (
+               PARTITION BY t.meeting_id, e.participant_id ORDER BY e.occurred_at, e.event
+           ) AS next_at,
+           MAX(e.occurred_at) OVER (PARTITION BY t.meeting_id) AS closing_at
+    FROM target t
+    JOIN zoom_meetings_participantevent e ON e.meeting_id = t.zoom_meeting_id
+),
+spans AS (
+    SELECT meeting_id, user_id, occurred_at AS started, COALESCE(next_at, closing_at) AS ended
+    FROM events
+    WHERE event = 'joined' AND user_id IS NOT NULL
+),
+marked AS (
+    SELECT *,
+           CASE WHEN started <= MAX(ended) OVER (
+               PARTITION BY meeting_id, user_id ORDER BY started, ended
+               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+           ) THEN 0 ELSE 1 END AS starts_stretch
+    FROM spans
+),
+numbered AS (
+    SELECT *,
+           SUM(starts_stretch) OVER (
+               PARTITION BY meeting_id, user_id ORDER BY started, ended ROWS UNBOUNDED PRECEDING
+           ) AS stretch
+    FROM marked
+),
+stretches AS (
+    SELECT meeting_id, user_id, MIN(started) AS started, MAX(ended) AS ended
+    FROM numbered
+    GROUP BY meeting_id, user_id, stretch
+)
+SELECT s.meeting_id, s.user_id, MIN(s.started), MAX(s.ended),
+       FLOOR(SUM(EXTRACT(EPOCH FROM s.ended - s.started)))::integer,
+       COUNT(*),
+       GREATEST(FLOOR(EXTRACT(EPOCH FROM MIN(s.started) - t.scheduled_start)), 0)::integer,
+       GREATEST(FLOOR(EXTRACT(EPOCH FROM t.scheduled_end - MAX(s.ended))), 0)::integer,
+       %(computed_at)s
+FROM stretches s
+JOIN target t ON t.meeting_id = s.meeting_id
+GROUP BY s.meeting_id, s.user_id, t.scheduled_start, t.scheduled_end
+"""
+
+
+def summarize_events(meetings, computed_at):
+    """AttendanceSummary rows of ``meetings`` computed in Python, the way SUMMARY_SQL does"""
+    by_zoom_id = {meeting.meeting_id: meeting for meeting in meetings}
+    events = ParticipantEvent.objects.filter(meeting__meeting_id__in=by_zoom_id).order_by(
+        'meeting_id', 'participant_id', 'occurred_at', 'event'
+    ).values_list('meeting__meeting_id', 'participant_id', 'user_id', 'event', 'occurred_at')
+
+    participants = defaultdict(list)
+    closing = {}
+    for zoom_id, participant_id, user_id, event, occurred_at in events:
+        participants[zoom_id, participant_id].append((user_id, event, occurred_at))
+        closing[zoom_id] = max(closing.get(zoom_id, occurred_at), occurred_at)
+
+    spans = defaultdict(list)
+    for (zoom_id, _), history in participants.items():
+        for i, (user_id, event, occurred_at) in enumerate(history):
+            if event == 'joined' and user_id is not None:
+                ended = history[i + 1][2] if i + 1 < len(history) else closing[zoom_id]
+                spans[zoom_id, user_id].append((occurred_at, ended))
+
+    rows = []
+    for (zoom_id, user_id), user_spans in spans.items():
+        stretches = []
+        for started, ended in sorted(user_spans):
+            if stretches and started <= stretches[-1][1]:
+                stretches[-1][1] = max(stretches[-1][1], ended)
+            else:
+                stretches.append([started, ended])
+        meeting = by_zoom_id[zoom_id]
+        scheduled_end = meeting.start_time + timedelta(minutes=meeting.duration)
+        rows.append(AttendanceSummary(
+            meeting=meeting,
+            user_id=user_id,
+            first_joined_at=stretches[0][0],
+            last_left_at=stretches[-1][1],
+            attended_seconds=int(sum((ended - started).total_seconds() for started, ended in stretches)),
+            sessions=len(stretches),
+            late_seconds=max(int((stretches[0][0] - meeting.start_time).total_seconds()), 0),
+            left_early_seconds=max(int((scheduled_end - stretches[-1][1]).total_seconds()), 0),
+            computed_at=computed_at,
+        ))
+    return rows
+
+
+def refresh_meetings(meetings):
+    """Recompute the AttendanceSummary rows of ``meetings``; returns how many rows they have now
+
+    Call inside a transaction holding the meetings' row locks, so two
+    refreshes of one meeting do not interleave their delete and insert.
+    """
+    if not meetings:
+        return 0
+    meeting_ids = [meeting.id for meeting in meetings]
+    computed_at = timezone.now()
+    AttendanceSummary.objects.filter(meeting_id__in=meeting_ids).delete()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {AttendanceSummary._meta.db_table} ({', '.join(SUMMARY_COLUMNS)}) {SUMMARY_SQL}",
+                {'meeting_ids': meeting_ids, 'computed_at': computed_at}
+            )
+            rows = cursor.rowcount
+    else:
+        rows = len(AttendanceSummary.objects.bulk_create(summarize_events(meetings, computed_at)))
+    Meeting.objects.filter(id__in=meeting_ids).update(attendance_computed_at=computed_at)
+    return rows
+
+
+def due_meetings(now=None):
+    """Started meetings whose attendance was never summarized, or changed since it was"""
+    now = now or timezone.now()
+    recheck_after = now - timedelta(hours=settings.ATTENDANCE_RECHECK_HOURS)
+    new_events = ParticipantEvent.objects.filter(
+        meeting__meeting_id=OuterRef('meeting_id'), received_at__gt=OuterRef('attendance_computed_at') - FLUSH_MARGIN
+    )
+    return Meeting.objects.filter(
+        Q(attendance_computed_at__isnull=True) |
+        Q(start_time__gte=recheck_after) & Exists(new_events),
+        start_time__lte=now,
+    )
+
+
+def refresh_due(chunk_size=200, after=None):
+    """Summarize the completed meetings among the next ``chunk_size`` due ones
+
+    Walks the due meetings in (start_time, id) order from ``after``;
+    meetings still in progress are skipped until a later pass. Returns
+    ``(last, meetings, rows)``, where ``last`` is where the next chunk
+    starts and None once no due meeting is left. Meetings are claimed with
+    ``SKIP LOCKED``, so several refreshers can run side by side.
+    """
+    due = due_meetings()
+    if after is not None:
+        due = due.filter(Q(start_time__gt=after[0]) | Q(start_time=after[0], id__gt=after[1]))
+    with transaction.atomic():
+        candidates = list(
+            due.select_for_update(skip_locked=True).order_by('start_time', 'id')
+            .only('id', 'meeting_id', 'start_time', 'duration')[:chunk_size]
+        )
+        if not candidates:
+            return None, 0, 0
+        meetings = [meeting for meeting in candidates if meeting.is_completed()]
+        rows = refresh_meetings(meetings)
+    return (candidates[-1].start_time, candidates[-1].id), len(meetings), rows
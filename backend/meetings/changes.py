@@ -0,0 +1,264 @@
+"""Pushing meeting and recording changes to the mentor dashboard.
+
+Every write that changes what a mentor's listings show also ``publish``es
+what changed: a meeting created, updated or deleted, a recording status
+change, recordings that became available or were deleted. The dashboard
+keeps a server-sent events connection to ``async_views.change_stream`` and
+applies the events to what it already loaded, instead of refetching the
+listings to find out.
+
+Writes happen in any process (web workers, the webhook processor,
+sync_zoom), while the event streams are held by the ASGI processes. On
+PostgreSQL ``publish`` therefore sends the events with ``pg_notify`` in the
+writer's transaction, so they go out when it commits and never for a
+rollback, and each ASGI process runs one ChangeHub listening on
+CHANGES_CHANNEL with a connection of its own. The hub decodes a
+notification once, encodes each event as an SSE frame once, and hands the
+same frames to every stream of that mentor. Other databases have no
+cross-process channel; there events reach the streams of the writing
+process only, which is enough for ``runserver``-style development.
+
+A stream whose client falls CHANGES_QUEUE_SIZE events behind, and every
+stream while the hub reconnects to the database, is sent ``resync``
+instead of the events it missed: the client reloads its listings, as it
+does when it connects.
+"""
+import asyncio
+import json
+import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection, transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import psycopg
+except ImportError:  # psycopg2 has no asyncio support; streams then only see local writes
+    psycopg = None
+
+logger = logging.getLogger(__name__)
+
+CHANGES_CHANNEL = 'meetings_changes'
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+PAYLOAD_LIMIT = 7900
+# The fields of a meeting in list_meetings, without its students
+MEETING_EVENT_FIELDS = (
+    'meeting_id', 'topic', 'start_time', 'duration', 'join_url', 'password', 'meeting_type',
+    'recording_url', 'recording_status', 'is_active'
+)
+RESYNC_FRAME = b'event: resync\ndata: {}\n\n'
+
+_encoder = JSONEncoder(separators=(',', ':'))
+
+
+def meeting_event(event, meeting):
+    """``meeting.created`` or ``meeting.updated`` carrying the meeting as list_meetings shows it"""
+    return {'type': event, 'meeting': {field: getattr(meeting, field) for field in MEETING_EVENT_FIELDS}}
+
+
+def meeting_deleted_event(meeting):
+    return {'type': 'meeting.deleted', 'meeting': {'meeting_id': meeting.meeting_id}}
+
+
+def recording_status_event(meeting):
+    return {
+        'type': 'recording.status_changed',
+        'meeting': {'meeting_id': meeting.meeting_id, 'recording_status': meeting.recording_status},
+    }
+
+
+def recordings_available_event(meeting, recordings):
+    """New recordings of a meeting; the client loads them with list_recordings' ``meeting_id`` filter"""
+    # Inserted with ignore_conflicts, so their ids are not known here
+    return {
+        'type': 'recording.available',
+        'meeting': {'meeting_id': meeting.meeting_id},
+        'count': len(recordings),
+    }
+
+
+def recording_deleted_event(recording):
+    return {
+        'type': 'recording.deleted',
+        'meeting': {'meeting_id': recording.meeting.meeting_id},
+        'recording_ids': [recording.id],
+    }
+
+
+def encode_payloads(user_id, events):
+    """The NOTIFY payloads carrying ``events``, as many per payload as fit"""
+    payloads, batch, size = [], [], 0
+    for event in events:
+        encoded = _encoder.encode(event)
+        if batch and size + len(encoded) > PAYLOAD_LIMIT:
+            payloads.append(f'{{"user":{user_id},"events":[{",".join(batch)}]}}')
+            batch, size = [], 0
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        payloads.append(f'{{"user":{user_id},"events":[{",".join(batch)}]}}')
+    return payloads
+
+
+def publish(mentor, *events):
+    """Send ``events`` to ``mentor``'s connected dashboards once the current transaction commits"""
+    if mentor is None or not events:
+        return
+    payloads = encode_payloads(mentor.user_id, events)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for payload in payloads:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANGES_CHANNEL, payload])
+    else:
+        hub = get_change_hub()
+
+        def send():
+            for payload in payloads:
+                hub.dispatch_threadsafe(payload)
+
+        transaction.on_commit(send)
+
+
+def sign_changes(user_id):
+    """Value of the ``sig`` parameter that opens ``user_id``'s change stream without a JWT header"""
+    return signing.TimestampSigner(salt='change-stream').sign(str(user_id))
+
+
+def check_changes_signature(value):
+    """The user id ``value`` was signed for, or None if it is invalid or expired"""
+    try:
+        return int(signing.TimestampSigner(salt='change-stream').unsign(
+            value, max_age=settings.CHANGE_STREAM_URL_TTL
+        ))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+class ChangeHub:
+    """Fans change events out to the streams open in this process"""
+
+    def __init__(self, queue_size=256, reconnect_delay=1.0):
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.streams = defaultdict(set)  # user id -> queues of encoded SSE frames
+        self.loop = None
+        self.listener = None
+        self.stats = Counter()
+
+    def subscribe(self, user_id):
+        """A queue receiving ``user_id``'s events until ``unsubscribe``; ``None`` in it means stop"""
+        self.start()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.streams[user_id].add(queue)
+        self.stats['subscribed'] += 1
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        streams = self.streams.get(user_id)
+        if streams is not None:
+            streams.discard(queue)
+            if not streams:
+                del self.streams[user_id]
+
+    @property
+    def connected(self):
+        return sum(len(streams) for streams in self.streams.values())
+
+    def start(self):
+        """Bind to the running event loop and, on PostgreSQL, start listening"""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        if self.listener is None and connection.vendor == 'postgresql' and psycopg is not None:
+            self.listener = self.loop.create_task(self.listen())
+
+    async def close(self):
+        """Stop listening and end every stream, so the server can shut down"""
+        if self.listener is not None:
+            self.listener.cancel()
+            try:
+                await self.listener
+            except asyncio.CancelledError:
+                pass
+            self.listener = None
+        for streams in self.streams.values():
+            for queue in streams:
+                self.replace(queue, None)
+
+    def replace(self, queue, item):
+        """Drop whatever ``queue`` holds and leave only ``item`` in it"""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    def dispatch(self, payload):
+        """Queue the events of one payload to their mentor's streams"""
+        message = json.loads(payload)
+        streams = self.streams.get(message['user'])
+        self.stats['payloads'] += 1
+        if not streams:
+            return
+        frames = [
+            f"event: {event['type']}\ndata: {_encoder.encode(event)}\n\n".encode()
+            for event in message['events']
+        ]
+        for queue in list(streams):
+            for frame in frames:
+                try:
+                    queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    # Too far behind to catch up event by event
+                    self.replace(queue, RESYNC_FRAME)
+                    self.stats['overflows'] += 1
+                    break
+            else:
+                self.stats['events_sent'] += len(frames)
+
+    def dispatch_threadsafe(self, payload):
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.dispatch, payload)
+
+    def resync(self):
+        for streams in self.streams.values():
+            for queue in streams:
+                self.replace(queue, RESYNC_FRAME)
+
+    async def listen(self):
+        """LISTEN on CHANGES_CHANNEL with a dedicated connection, reconnecting on failure"""
+        params = {
+            key: value for key, value in connection.get_connection_params().items()
+            if key not in ('cursor_factory', 'context')
+        }
+        first = True
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(**params, autocommit=True) as listener:
+                    await listener.execute(f'LISTEN {CHANGES_CHANNEL}')
+                    if not first:
+                        # Whatever was published while we were disconnected is lost
+                        self.resync()
+                    first = False
+                    async for notify in listener.notifies():
+                        try:
+                            self.dispatch(notify.payload)
+                        except (ValueError, KeyError) as e:
+                            logger.error(f"Malformed change notification: {str(e)}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['reconnects'] += 1
+                logger.error(f"Change listener lost its connection: {str(e)}")
+                first = False
+                await asyncio.sleep(self.reconnect_delay)
+
+
+_hub = None
+
+
+def get_change_hub():
+    """The process-wide ChangeHub"""
+    global _hub
+    if _hub is None:
+        _hub = ChangeHub(queue_size=settings.CHANGES_QUEUE_SIZE)
+    return _hub
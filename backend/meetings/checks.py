@@ -0,0 +1,48 @@
+"""System checks for the meetings app.
+
+Listing cache versions, Zoom token locks, Zoom rate-limit counters and
+Zoom sync locks live in Django's cache so that every worker process sees
+the same values. A LocMemCache keeps them per process instead, which
+only works for a single process: workers then serve stale listings, each
+fetch their own tokens and together exceed Zoom's rate limits. That is a
+warning on every check and an error under ``manage.py check --deploy``.
+"""
+from collections import defaultdict
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+
+
+def unshared_caches():
+    """``(alias, what it holds)`` for each cache of cross-process state that is a LocMemCache"""
+    from .ratelimit import rate_limiter
+    from .zoom import token_manager
+
+    uses = defaultdict(list)
+    uses[DEFAULT_CACHE_ALIAS] += ['listing cache versions', 'Zoom sync locks']
+    uses[token_manager.cache_alias].append('Zoom token locks')
+    uses[rate_limiter.cache_alias].append('Zoom rate limits')
+    return [(alias, names) for alias, names in uses.items() if isinstance(caches[alias], LocMemCache)]
+
+
+def unshared_cache_issues(level, check_id):
+    return [
+        level(
+            f"The '{alias}' cache is a LocMemCache, so {', '.join(names[:-1])} and {names[-1]} "
+            "are not shared between processes.",
+            hint='Set REDIS_URL so every worker uses the same cache.',
+            id=check_id,
+        )
+        for alias, names in unshared_caches()
+    ]
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    return unshared_cache_issues(Warning, 'meetings.W001')
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_deploy(app_configs, **kwargs):
+    return unshared_cache_issues(Error, 'meetings.E001')
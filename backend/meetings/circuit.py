@@ -0,0 +1,148 @@
+"""Circuit breakers for outbound Zoom calls.
+
+When Zoom browns out, every call would otherwise sit in its connect/read
+timeout and the workers running them stop serving anything else. Each
+Zoom endpoint (``create_meeting``, ``get_meeting_recordings``, the OAuth
+token, ...) gets its own breaker:
+
+* closed: calls go through; ``failure_threshold`` consecutive failures
+  (timeouts, connection errors, 5xx) open it;
+* open: calls fail immediately with ZoomUnavailable for ``reset_timeout``
+  seconds, without touching the network;
+* half-open: afterwards ``half_open_calls`` probe calls are let through;
+  a success closes the breaker, a failure opens it for another period.
+
+Thresholds come from ZOOM_CIRCUIT_BREAKER, whose ``default`` entry can be
+overridden per endpoint name. Breakers live in process memory: a worker
+learns about an outage from its own first few failures, and checking a
+breaker costs no I/O, which is the point while Zoom is down.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'failure_threshold': 5,
+    'reset_timeout': 30.0,
+    'half_open_calls': 1,
+}
+
+
+class Circuit:
+    """State of one endpoint's breaker"""
+
+    def __init__(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probed_at = 0.0
+        self.rejected = 0
+
+
+class CircuitBreaker:
+    """Per-endpoint breakers for the Zoom API, shared by the sync and async clients"""
+
+    def __init__(self, config=None, clock=time.monotonic):
+        self.config = config
+        self.clock = clock
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    def get_config(self, endpoint):
+        config = self.config if self.config is not None else getattr(settings, 'ZOOM_CIRCUIT_BREAKER', {})
+        return {**DEFAULTS, **config.get('default', {}), **config.get(endpoint, {})}
+
+    def _circuit(self, endpoint):
+        circuit = self.circuits.get(endpoint)
+        if circuit is None:
+            circuit = self.circuits[endpoint] = Circuit()
+        return circuit
+
+    def allow(self, endpoint):
+        """Whether a call to ``endpoint`` may go ahead; ``retry_after`` tells a rejected caller when to retry
+
+        In half-open state, True also claims one of the probe slots.
+        """
+        with self.lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == 'closed':
+                return True
+            config = self.get_config(endpoint)
+            if circuit.state == 'open':
+                if self.clock() < circuit.opened_at + config['reset_timeout']:
+                    circuit.rejected += 1
+                    return False
+                circuit.state = 'half_open'
+                circuit.probes = 0
+                logger.info(f"Zoom circuit for {endpoint} half-open, probing")
+            now = self.clock()
+            if now - circuit.probed_at > config['reset_timeout']:
+                # Probes that never reported back (they failed before reaching Zoom) free their slots
+                circuit.probes = 0
+            if circuit.probes < config['half_open_calls']:
+                circuit.probes += 1
+                circuit.probed_at = now
+                return True
+            # Probes are in flight and will decide within one timeout
+            circuit.rejected += 1
+            return False
+
+    def retry_after(self, endpoint):
+        """Seconds a client should wait before retrying ``endpoint``"""
+        with self.lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state != 'open':
+                return 1.0
+            remaining = circuit.opened_at + self.get_config(endpoint)['reset_timeout'] - self.clock()
+            return max(remaining, 1.0)
+
+    def record_success(self, endpoint):
+        with self.lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state != 'closed':
+                logger.info(f"Zoom circuit for {endpoint} closed")
+            circuit.state = 'closed'
+            circuit.failures = 0
+
+    def record_failure(self, endpoint):
+        with self.lock:
+            circuit = self._circuit(endpoint)
+            circuit.failures += 1
+            if circuit.state == 'half_open' or (
+                circuit.state == 'closed' and circuit.failures >= self.get_config(endpoint)['failure_threshold']
+            ):
+                logger.warning(f"Zoom circuit for {endpoint} open after {circuit.failures} failures")
+                circuit.state = 'open'
+                circuit.opened_at = self.clock()
+
+    def is_degraded(self):
+        """True while any endpoint's breaker is not closed"""
+        with self.lock:
+            return any(circuit.state != 'closed' for circuit in self.circuits.values())
+
+    def states(self):
+        now = self.clock()
+        with self.lock:
+            return {
+                endpoint: {
+                    'state': circuit.state,
+                    'failures': circuit.failures,
+                    'rejected': circuit.rejected,
+                    'retry_after': round(
+                        max(circuit.opened_at + self.get_config(endpoint)['reset_timeout'] - now, 0), 1
+                    ) if circuit.state == 'open' else None,
+                }
+                for endpoint, circuit in self.circuits.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.circuits.clear()
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,147 @@
+"""Creating a whole cohort's meetings in one request.
+
+A term of sessions is given either as a list of meeting specs (the same
+fields ``create_meeting`` takes) or as one spec plus a recurrence rule.
+The Zoom meetings are created in parallel on a bounded thread pool sharing
+the pooled session, the token cache, the rate limiter and the circuit
+breakers of ``meetings.zoom``; the local rows are then written with a
+handful of bulk inserts by the view.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = {'daily': 1, 'weekly': 7}
+
+
+def get_max_meetings():
+    return getattr(settings, 'MEETINGS_BULK_MAX', 500)
+
+
+def get_concurrency():
+    return getattr(settings, 'MEETINGS_BULK_CONCURRENCY', 8)
+
+
+def parse_start_time(value):
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Invalid start_time {value!r}. Use ISO 8601 format.')
+
+
+def expand_recurrence(spec, rule):
+    """Meeting specs for ``rule``, each a copy of ``spec`` with its own start time and topic.
+
+    ``rule`` is ``{"frequency": "daily" | "weekly", "interval": 1,
+    "count": 12, "weekdays": [0, 2]}``, weekdays being Monday=0 and only
+    meaningful weekly; without them sessions repeat on the start's weekday.
+    """
+    if not isinstance(rule, dict):
+        raise ValueError('recurrence must be an object')
+    frequency = rule.get('frequency', 'weekly')
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"recurrence frequency must be one of {', '.join(FREQUENCIES)}")
+    try:
+        interval = int(rule.get('interval', 1))
+        count = int(rule['count'])
+        weekdays = sorted({int(day) for day in rule.get('weekdays') or []})
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('recurrence needs an integer count and interval, and weekdays as integers')
+    if interval < 1 or count < 1:
+        raise ValueError('recurrence count and interval must be positive')
+    if count > get_max_meetings():
+        raise ValueError(f'recurrence count is limited to {get_max_meetings()}')
+    if any(day < 0 or day > 6 for day in weekdays):
+        raise ValueError('recurrence weekdays must be between 0 (Monday) and 6 (Sunday)')
+    if not spec.get('start_time'):
+        raise ValueError('start_time is required for a recurrence')
+
+    first = parse_start_time(spec['start_time'])
+    if frequency == 'daily' or not weekdays:
+        starts = [first + timedelta(days=FREQUENCIES[frequency] * interval * n) for n in range(count)]
+    else:
+        # Walk the weeks from the start's Monday, skipping days before the first session
+        starts = []
+        week = first - timedelta(days=first.weekday())
+        while len(starts) < count:
+            for day in weekdays:
+                start = week + timedelta(days=day)
+                if start >= first and len(starts) < count:
+                    starts.append(start)
+            week += timedelta(weeks=interval)
+
+    topic = spec.get('topic')
+    return [
+        {**spec, 'topic': f'{topic} (Session {n})', 'start_time': format_start_time(start)}
+        for n, start in enumerate(starts, 1)
+    ]
+
+
+def format_start_time(start):
+    """Zoom's start_time: UTC with a Z, or local time in the meeting's timezone when naive"""
+    if start.tzinfo is None:
+        return start.strftime('%Y-%m-%dT%H:%M:%S')
+    return start.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_cohort(data):
+    """The meeting specs of a bulk request: ``meetings`` or ``meeting`` plus ``recurrence``"""
+    if data.get('recurrence') is not None:
+        spec = data.get('meeting')
+        if not isinstance(spec, dict):
+            raise ValueError('meeting must be an object when recurrence is given')
+        if not spec.get('topic'):
+            raise ValueError('meeting: Topic is required')
+        specs = expand_recurrence(spec, data['recurrence'])
+    else:
+        specs = data.get('meetings')
+        if not isinstance(specs, list) or not specs:
+            raise ValueError('meetings must be a non-empty list, or give meeting and recurrence')
+        if len(specs) > get_max_meetings():
+            raise ValueError(f'At most {get_max_meetings()} meetings per request')
+
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise ValueError(f'meetings[{index}] must be an object')
+        if not spec.get('topic'):
+            raise ValueError(f'meetings[{index}]: Topic is required')
+        if spec.get('start_time'):
+            parse_start_time(spec['start_time'])
+    return specs
+
+
+def provision_meetings(zoom, payloads, concurrency=None):
+    """Create ``payloads`` in Zoom, at most ``concurrency`` at a time.
+
+    Returns one ``(zoom_data, None)`` or ``(None, exception)`` per payload,
+    in order; a failed meeting never stops the others.
+    """
+    def create(payload):
+        try:
+            return zoom.create_meeting(payload), None
+        except Exception as e:
+            logger.error(f"Error creating meeting {payload.get('topic')!r} in Zoom: {str(e)}")
+            return None, e
+
+    concurrency = max(1, min(concurrency or get_concurrency(), len(payloads)))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='cohort') as pool:
+        return list(pool.map(create, payloads))
+
+
+def cancel_meetings(zoom, meeting_ids, concurrency=None):
+    """Best-effort delete of Zoom meetings whose local rows could not be saved"""
+    def delete(meeting_id):
+        try:
+            zoom.delete_meeting(meeting_id)
+        except Exception as e:
+            logger.error(f"Error deleting orphaned Zoom meeting {meeting_id}: {str(e)}")
+
+    if not meeting_ids:
+        return
+    concurrency = max(1, min(concurrency or get_concurrency(), len(meeting_ids)))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='cohort') as pool:
+        list(pool.map(delete, meeting_ids))
@@ -0,0 +1,108 @@
+"""Enrolling students into meetings in bulk.
+
+Enrollment is the ``Meeting.students`` through table. Instead of one
+``.add()``/``.remove()`` (and one invitation) per student and meeting, a
+whole change is applied with a fixed number of queries however many
+pairs it touches: read the meetings, the students and the pairs that
+already exist, insert the new pairs in one ``bulk_create``, delete the
+dropped ones in one DELETE, and queue invitations for only the pairs that
+were actually added.
+"""
+from django.db import transaction
+
+from .changes import publish
+from .models import Meeting
+from .response_cache import bump_version
+from .utils import send_invitations
+
+Enrollment = Meeting.students.through
+
+
+class EnrollmentError(ValueError):
+    """The request names meetings or students the mentor does not own"""
+
+
+def parse_ids(value, name):
+    if value is None:
+        return None
+    if not isinstance(value, list):
+        raise EnrollmentError(f'{name} must be a list')
+    return value
+
+
+def change_enrollment(mentor, meeting_ids, add=(), remove=(), replace=None, invite=True):
+    """Apply one enrollment change to the mentor's meetings ``meeting_ids`` (Zoom ids).
+
+    ``add`` and ``remove`` are student ids; ``replace``, when given, is the
+    complete new set of students for every one of the meetings, so anyone
+    else is removed. Returns ``{'added', 'removed', 'invited'}`` counts.
+    """
+    meeting_ids = {str(meeting_id) for meeting_id in meeting_ids}
+    try:
+        add = {int(student_id) for student_id in add}
+        remove = {int(student_id) for student_id in remove}
+        replace = None if replace is None else {int(student_id) for student_id in replace}
+    except (TypeError, ValueError):
+        raise EnrollmentError('Student ids must be integers')
+    if replace is not None and (add or remove):
+        raise EnrollmentError('Give either students to set, or students to add and remove')
+    if add & remove:
+        raise EnrollmentError(f'Students both added and removed: {sorted(add & remove)}')
+    wanted = add if replace is None else replace
+
+    meetings = list(
+        Meeting.objects.filter(mentor=mentor, meeting_id__in=meeting_ids)
+        .select_related('mentor__user')
+        .only('id', 'meeting_id', 'topic', 'start_time', 'duration', 'join_url', 'password',
+              'mentor__user__username')
+    )
+    if len(meetings) != len(meeting_ids):
+        missing = meeting_ids - {meeting.meeting_id for meeting in meetings}
+        raise EnrollmentError(f'Unknown meetings: {sorted(missing)}')
+
+    students = {
+        student.id: student
+        for student in mentor.students.filter(id__in=wanted | remove).select_related('user')
+    }
+    if len(students) != len(wanted | remove):
+        raise EnrollmentError(f'Unknown students: {sorted((wanted | remove) - set(students))}')
+
+    by_id = {meeting.id: meeting for meeting in meetings}
+    with transaction.atomic():
+        existing = set(
+            Enrollment.objects.filter(meeting_id__in=by_id, student_id__in=wanted)
+            .values_list('meeting_id', 'student_id')
+        )
+        new_pairs = [
+            (meeting_id, student_id)
+            for meeting_id in by_id
+            for student_id in wanted
+            if (meeting_id, student_id) not in existing
+        ]
+        # A concurrent change may have added some pairs since; the unique constraint skips them
+        Enrollment.objects.bulk_create(
+            [Enrollment(meeting_id=meeting_id, student_id=student_id) for meeting_id, student_id in new_pairs],
+            ignore_conflicts=True
+        )
+
+        dropped = Enrollment.objects.filter(meeting_id__in=by_id)
+        if replace is not None:
+            dropped = dropped.exclude(student_id__in=replace)
+        else:
+            dropped = dropped.filter(student_id__in=remove)
+        # The through model has no dependents, so this is a single DELETE
+        removed, _ = dropped.delete() if replace is not None or remove else (0, None)
+
+        invited = []
+        if invite and new_pairs:
+            invited = send_invitations([(by_id[meeting_id], students[student_id])
+                                        for meeting_id, student_id in new_pairs])
+        if new_pairs or removed:
+            bump_version(mentor)
+            # The client reloads the students of these meetings
+            publish(mentor, *[
+                {'type': 'meeting.updated', 'meeting': {'meeting_id': meeting.meeting_id}, 'enrollment_changed': True}
+                for meeting in meetings
+            ])
+
+    return {'added': len(new_pairs), 'removed': removed, 'invited': len(invited)}
@@ -0,0 +1,313 @@
+"""Local stand-in for zoom.us / api.zoom.us used by the benchmark commands.
+
+Serves the OAuth token endpoint and the meeting/recording endpoints that
+``meetings.zoom.ZoomClient`` talks to, with an optional fixed latency per
+request and, with ``rate_limit``, Zoom's per-second API limit (429 with
+Retry-After, plus X-RateLimit-* headers). Point ``ZOOM_OAUTH_URL`` and
+``ZOOM_API_BASE_URL`` at ``oauth_url`` and ``api_url`` to use it.
+
+For fault injection, ``stall`` holds every API response for that many
+seconds and ``fail_status`` answers every API call with that status; both
+can be changed while the server runs to simulate a Zoom brownout and its
+recovery.
+
+Created meetings are kept in ``meetings`` and listed by the list-meetings
+endpoint; ``recordings`` maps a meeting id to its recording files for the
+list-recordings endpoint. Callers may also fill both directly.
+
+``files`` maps a file id to a GeneratedFile served at ``/rec/download/<id>``
+like Zoom's download URLs, with Range support. The file's bytes are made
+on the fly while streaming, so multi-gigabyte downloads cost no memory.
+
+The server is a small asyncio HTTP/1.1 implementation running on its own
+thread, so thousands of concurrent keep-alive connections cost no threads
+and the fake itself does not become the bottleneck being measured.
+"""
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+from http import HTTPStatus
+from urllib.parse import parse_qsl
+
+
+FileRange = namedtuple('FileRange', 'file start end')
+
+
+class GeneratedFile:
+    """A recording file of ``size`` bytes repeating one pseudo-random block"""
+
+    def __init__(self, size, seed=0, block_size=1024 * 1024 + 17):
+        self.size = size
+        # An odd block size, so consecutive parts of a multipart upload differ
+        self.block = random.Random(seed).randbytes(block_size)
+
+    def chunks(self, start=0, end=None):
+        end = self.size if end is None else end
+        while start < end:
+            offset = start % len(self.block)
+            chunk = self.block[offset:offset + min(len(self.block) - offset, end - start)]
+            yield chunk
+            start += len(chunk)
+
+
+class FakeZoomServer:
+    """Asyncio HTTP server answering like the subset of Zoom we use"""
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0, rate_limit=None, stall=0.0, fail_status=None):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.stall = stall
+        self.fail_status = fail_status
+        self._window = (0, 0)
+        self.host = host
+        self.port = port
+        self.calls = Counter()
+        self.meetings = {}
+        self.recordings = {}
+        self.files = {}
+        # Fresh ids on every run, so meetings left in a dev database from earlier runs never collide
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self.routes = [
+            ('POST', re.compile(r'^/oauth/token$'), self.oauth_token),
+            ('POST', re.compile(r'^/v2/users/[^/]+/meetings$'), self.create_meeting),
+            ('GET', re.compile(r'^/v2/users/[^/]+/meetings$'), self.list_meetings),
+            ('GET', re.compile(r'^/v2/users/[^/]+/recordings$'), self.list_recordings),
+            ('PATCH', re.compile(r'^/v2/meetings/([^/]+)$'), self.update_meeting),
+            ('DELETE', re.compile(r'^/v2/meetings/([^/]+)$'), self.delete_meeting),
+            ('GET', re.compile(r'^/v2/meetings/([^/]+)/recordings$'), self.meeting_recordings),
+            ('DELETE', re.compile(r'^/v2/meetings/[^/]+/recordings/[^/]+$'), self.no_content),
+            ('GET', re.compile(r'^/rec/download/([^/]+)$'), self.download_file),
+        ]
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def oauth_url(self):
+        return f'{self.url}/oauth/token'
+
+    @property
+    def api_url(self):
+        return f'{self.url}/v2'
+
+    def start(self):
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            async def shutdown():
+                self._server.close()
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def _handle(self, reader, writer):
+        self.calls['connections'] += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                body = await reader.readexactly(length) if length else b''
+
+                path, _, query = target.partition('?')
+                status, payload, extra_headers = await self.dispatch(
+                    method, path, headers, body, dict(parse_qsl(query))
+                )
+                if isinstance(payload, FileRange):
+                    await self.stream(writer, status, payload, extra_headers)
+                    continue
+                if isinstance(payload, bytes):
+                    data, content_type = payload, 'application/octet-stream'
+                else:
+                    data = json.dumps(payload).encode() if payload is not None else b''
+                    content_type = 'application/json'
+
+                head = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+                        f'Content-Type: {content_type}',
+                        f'Content-Length: {len(data)}']
+                head.extend(f'{name}: {value}' for name, value in extra_headers.items())
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def stream(self, writer, status, payload, extra_headers):
+        head = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+                'Content-Type: application/octet-stream',
+                f'Content-Length: {payload.end - payload.start}']
+        head.extend(f'{name}: {value}' for name, value in extra_headers.items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        for chunk in payload.file.chunks(payload.start, payload.end):
+            writer.write(chunk)
+            await writer.drain()
+
+    async def dispatch(self, method, path, headers, body, query=None):
+        for route_method, pattern, view in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                rate_headers = {}
+                if self.rate_limit and path.startswith('/v2/'):
+                    now = time.time()
+                    window, used = self._window
+                    used = used + 1 if window == int(now) else 1
+                    self._window = (int(now), used)
+                    rate_headers = {
+                        'X-RateLimit-Category': 'Medium',
+                        'X-RateLimit-Type': 'Per-second',
+                        'X-RateLimit-Limit': self.rate_limit,
+                        'X-RateLimit-Remaining': max(self.rate_limit - used, 0),
+                    }
+                    if used > self.rate_limit:
+                        self.calls['rate_limited'] += 1
+                        rate_headers['Retry-After'] = 1
+                        return 429, {'code': 429, 'message': "You have reached the maximum per-second rate limit"}, rate_headers
+
+                if path.startswith('/v2/') and (self.stall or self.fail_status):
+                    self.calls['faulted'] += 1
+                    if self.stall:
+                        await asyncio.sleep(self.stall)
+                    if self.fail_status:
+                        return self.fail_status, {'code': self.fail_status, 'message': 'Injected failure'}, {}
+
+                self.calls[view.__name__] += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                result = view(headers, body, query or {}, *match.groups())
+                if len(result) == 2:
+                    result = result + ({},)
+                return result[0], result[1], {**rate_headers, **result[2]}
+        return 404, {'code': 3001, 'message': 'Not found'}, {}
+
+    def oauth_token(self, headers, body, query):
+        return 200, {
+            'access_token': f'fake-token-{next(self._ids)}',
+            'token_type': 'bearer',
+            'expires_in': 3599,
+        }
+
+    def create_meeting(self, headers, body, query):
+        data = json.loads(body or b'{}')
+        meeting_id = next(self._ids)
+        meeting = self.meetings[str(meeting_id)] = {
+            'id': meeting_id,
+            'topic': data.get('topic', ''),
+            'type': data.get('type', 2),
+            'start_time': data.get('start_time') or time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'duration': data.get('duration', 60),
+            'timezone': data.get('timezone', 'UTC'),
+            'agenda': data.get('agenda', ''),
+            'join_url': f'https://zoom.us/j/{meeting_id}',
+            'password': 'fake',
+            'host_email': 'host@example.com',
+            'settings': data.get('settings', {}),
+        }
+        return 201, meeting
+
+    def update_meeting(self, headers, body, query, meeting_id):
+        if meeting_id in self.meetings:
+            self.meetings[meeting_id].update(json.loads(body or b'{}'))
+        return 204, None
+
+    def delete_meeting(self, headers, body, query, meeting_id):
+        self.meetings.pop(meeting_id, None)
+        return 204, None
+
+    def page(self, items, query, key):
+        """Zoom-style pagination: ``page_size`` items and an opaque ``next_page_token``"""
+        size = int(query.get('page_size') or 30)
+        offset = int(query.get('next_page_token') or 0)
+        token = str(offset + size) if offset + size < len(items) else ''
+        return 200, {'page_size': size, 'total_records': len(items), 'next_page_token': token,
+                     key: items[offset:offset + size]}
+
+    def list_meetings(self, headers, body, query):
+        since = query.get('from', '')
+        meetings = [meeting for _, meeting in sorted(self.meetings.items()) if meeting['start_time'][:10] >= since]
+        return self.page(meetings, query, 'meetings')
+
+    def list_recordings(self, headers, body, query):
+        since, until = query.get('from', ''), query.get('to', '9999')
+        meetings = [
+            {'id': int(meeting_id), 'uuid': f'{meeting_id}==', 'topic': meeting['topic'],
+             'start_time': meeting['start_time'], 'recording_files': self.recordings[meeting_id]}
+            for meeting_id, meeting in sorted(self.meetings.items())
+            if meeting_id in self.recordings and since <= meeting['start_time'][:10] <= until
+        ]
+        return self.page(meetings, query, 'meetings')
+
+    def meeting_recordings(self, headers, body, query, meeting_id):
+        return 200, {
+            'id': meeting_id,
+            'recording_files': self.recordings.get(meeting_id) or [{
+                'id': f'{meeting_id}-video',
+                'recording_type': 'shared_screen_with_speaker_view',
+                'file_size': 1024,
+                'download_url': f'{self.url}/rec/download/{meeting_id}',
+            }],
+        }
+
+    def download_file(self, headers, body, query, file_id):
+        file = self.files.get(file_id)
+        if file is None:
+            return 404, {'code': 3301, 'message': 'This recording does not exist.'}
+        match = re.match(r'bytes=(\d+)-(\d*)$', headers.get('range', ''))
+        if not match:
+            return 200, FileRange(file, 0, file.size), {'Accept-Ranges': 'bytes'}
+        start = int(match.group(1))
+        end = min(int(match.group(2)) + 1 if match.group(2) else file.size, file.size)
+        if start >= file.size:
+            return 416, None, {'Content-Range': f'bytes */{file.size}'}
+        return 206, FileRange(file, start, end), {'Content-Range': f'bytes {start}-{end - 1}/{file.size}'}
+
+    def no_content(self, headers, body, query):
+        return 204, None
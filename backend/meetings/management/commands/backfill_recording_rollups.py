@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from meetings.models import Mentor
+from meetings.rollups import backfill_rollups, iter_mentor_chunks
+
+
+class Command(BaseCommand):
+    help = 'Recompute the recording storage and duration rollups from the Recording table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Mentors recomputed per transaction of grouped aggregate queries')
+        parser.add_argument('--account', action='append', dest='accounts',
+                            help='Only backfill the mentor with this Zoom account id (repeatable)')
+
+    def handle(self, *args, **options):
+        mentors = Mentor.objects.all()
+        if options['accounts']:
+            mentors = mentors.filter(zoom_account_id__in=options['accounts'])
+
+        started = time.perf_counter()
+        mentor_count = rows = 0
+        for mentor_ids in iter_mentor_chunks(options['chunk_size'], mentors):
+            rows += backfill_rollups(mentor_ids)
+            mentor_count += len(mentor_ids)
+            self.stdout.write(f'{mentor_count} mentors, {rows} rollup rows')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {mentor_count} mentors ({rows} rollup rows) in {time.perf_counter() - started:.1f}s'
+        ))
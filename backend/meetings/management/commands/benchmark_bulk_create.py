@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from meetings.fakezoom import FakeZoomServer
+from meetings.models import Mentor, Student
+
+BENCH_PREFIX = 'bulk-bench'
+
+
+class Command(BaseCommand):
+    help = 'Time the bulk meeting endpoint creating a cohort against a local fake Zoom'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meetings', type=int, default=200)
+        parser.add_argument('--students', type=int, default=30, help='Students attached to every meeting')
+        parser.add_argument('--latency-ms', type=int, default=100, help='Fake Zoom latency per request')
+        parser.add_argument('--concurrency', type=int, help='Defaults to MEETINGS_BULK_CONCURRENCY')
+        parser.add_argument('--rate-limit', type=int, default=100,
+                            help='ZOOM_RATE_LIMIT_PER_SECOND for the run (Zoom allows more on paid plans)')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark mentor and its meetings')
+
+    def handle(self, *args, **options):
+        mentor = self.get_mentor(options['students'])
+        client = APIClient(HTTP_HOST=next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost'
+        ))
+        client.force_authenticate(mentor.user)
+        body = {
+            'meeting': {'topic': 'Benchmark cohort', 'start_time': '2030-01-07T15:00:00Z', 'duration': 60},
+            'recurrence': {'frequency': 'daily', 'count': options['meetings']},
+            'students': list(mentor.students.values_list('id', flat=True)),
+        }
+
+        overrides = {'ZOOM_RATE_LIMIT_PER_SECOND': options['rate_limit']}
+        if options['concurrency']:
+            overrides['MEETINGS_BULK_CONCURRENCY'] = options['concurrency']
+        try:
+            with FakeZoomServer(latency=options['latency_ms'] / 1000) as server, \
+                    override_settings(ZOOM_OAUTH_URL=server.oauth_url, ZOOM_API_BASE_URL=server.api_url, **overrides), \
+                    CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.post(reverse('bulk_create_meetings'), body, format='json')
+                elapsed = time.perf_counter() - started
+                zoom_calls = server.calls['create_meeting']
+
+            if response.status_code != 201:
+                raise CommandError(f'Bulk create answered {response.status_code}: {response.content[:500]}')
+            data = response.json()
+            self.stdout.write(
+                f"{data['created']} meetings with {options['students']} students each in {elapsed:.2f}s "
+                f"({data['created'] / elapsed:.0f}/s), {zoom_calls} Zoom calls at {options['latency_ms']}ms, "
+                f"{len(queries)} queries"
+            )
+            attached = mentor.meetings.filter(students__isnull=False).count()
+            if attached != data['created'] * options['students']:
+                raise CommandError(f'Expected {data["created"] * options["students"]} enrollments, found {attached}')
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+    def get_mentor(self, students):
+        user, _ = User.objects.get_or_create(username=f'{BENCH_PREFIX}-mentor')
+        mentor, _ = Mentor.objects.get_or_create(user=user, defaults={
+            'zoom_account_id': f'{BENCH_PREFIX}-account',
+            'zoom_client_id': f'{BENCH_PREFIX}-client',
+            'zoom_client_secret': f'{BENCH_PREFIX}-secret',
+        })
+        missing = students - mentor.students.count()
+        if missing > 0:
+            first = mentor.students.count()
+            users = User.objects.bulk_create([
+                User(username=f'{BENCH_PREFIX}-student-{i}', email=f'{BENCH_PREFIX}-student-{i}@example.com')
+                for i in range(first, first + missing)
+            ])
+            Student.objects.bulk_create([Student(user=user, mentor=mentor) for user in users])
+        return mentor
@@ -0,0 +1,122 @@
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from meetings.management.commands.benchmark_zoom_client import summarize
+from zoom_meetings.ingest import get_participant_buffer
+from zoom_meetings.models import Meeting, Participant, ParticipantEvent
+
+BENCH_PREFIX = 'participant-bench-'
+
+
+class Command(BaseCommand):
+    help = 'Deliver the join/leave webhooks of a few large lectures and check what the buffered ingestion stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meetings', type=int, default=4)
+        parser.add_argument('--participants', type=int, default=500, help='Attendees per meeting')
+        parser.add_argument('--guests', type=float, default=0.2, help='Share of attendees without an account')
+        parser.add_argument('--redeliveries', type=float, default=0.05,
+                            help='Share of deliveries Zoom sends a second time')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent senders')
+
+    def handle(self, *args, **options):
+        if not settings.ZOOM_WEBHOOK_SECRET:
+            raise CommandError('Set ZOOM_WEBHOOK_SECRET; the benchmark signs its deliveries with it')
+        buffer = get_participant_buffer()
+        try:
+            meetings, deliveries, expected = self.prepare(options)
+            url = reverse('recording_webhook')
+            secret = settings.ZOOM_WEBHOOK_SECRET.encode()
+            local = threading.local()
+
+            def deliver(body):
+                if not hasattr(local, 'client'):
+                    local.client = Client()
+                timestamp = str(int(time.time()))
+                signature = 'v0=' + hmac.new(secret, f'v0:{timestamp}:{body}'.encode(), hashlib.sha256).hexdigest()
+                started = time.perf_counter()
+                response = local.client.post(url, body, content_type='application/json', headers={
+                    'X-Zm-Signature': signature, 'X-Zm-Request-Timestamp': timestamp
+                })
+                return time.perf_counter() - started, response.status_code
+
+            flushes_before = buffer.stats['flushes']
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                results = list(pool.map(deliver, deliveries))
+            buffer.flush()
+            elapsed = time.perf_counter() - started
+
+            errors = sum(1 for _, status_code in results if status_code != 200)
+            self.stdout.write(summarize('ack', [latency for latency, _ in results], elapsed))
+            self.stdout.write(
+                f"{len(deliveries)} deliveries written in {buffer.stats['flushes'] - flushes_before} flushes; "
+                f"totals so far: {dict(buffer.stats)}"
+            )
+            if errors:
+                raise CommandError(f'{errors} deliveries were not acknowledged with 200')
+            self.verify(meetings, expected)
+        finally:
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+    def prepare(self, options):
+        host = User.objects.create(username=f'{BENCH_PREFIX}host')
+        meetings = Meeting.objects.bulk_create([
+            Meeting(topic='Participant benchmark', start_time=timezone.now(), duration=90,
+                    meeting_id=f'{BENCH_PREFIX}{time.time_ns()}-{i}', host=host)
+            for i in range(options['meetings'])
+        ])
+        members = int(options['participants'] * (1 - options['guests']))
+        User.objects.bulk_create([
+            User(username=f'{BENCH_PREFIX}{i}', email=f'{BENCH_PREFIX}{i}@example.com') for i in range(members)
+        ])
+
+        deliveries = []
+        for meeting in meetings:
+            start = meeting.start_time
+            for i in range(options['participants']):
+                participant = {
+                    'participant_uuid': f'{meeting.meeting_id}-{i}',
+                    'user_name': f'Attendee {i}',
+                    'email': f'{BENCH_PREFIX}{i}@example.com' if i < members else f'guest-{i}@example.org',
+                    'join_time': (start + timedelta(seconds=random.uniform(0, 300))).isoformat(),
+                    'leave_time': (start + timedelta(seconds=random.uniform(3000, 5400))).isoformat(),
+                }
+                for event in ('meeting.participant_joined', 'meeting.participant_left'):
+                    deliveries.append(json.dumps({
+                        'event': event,
+                        'event_ts': time.time_ns() // 1000,
+                        'payload': {'object': {'id': meeting.meeting_id, 'participant': participant}},
+                    }))
+        deliveries += random.sample(deliveries, int(len(deliveries) * options['redeliveries']))
+        random.shuffle(deliveries)
+        return meetings, deliveries, {'events': options['participants'] * 2, 'attendees': members}
+
+    def verify(self, meetings, expected):
+        for meeting in Meeting.objects.filter(id__in=[meeting.id for meeting in meetings]):
+            events = ParticipantEvent.objects.filter(meeting=meeting).count()
+            participants = Participant.objects.filter(meeting=meeting, left_at__isnull=False).count()
+            counted = (meeting.join_count + meeting.leave_count, meeting.attendee_count)
+            if (events, participants) != (expected['events'], expected['attendees']) or \
+                    counted != (expected['events'], expected['attendees']):
+                raise CommandError(
+                    f'Meeting {meeting.meeting_id}: {events} events, {participants} participants and counters '
+                    f'{counted}, expected {expected}'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f"Verified {len(meetings)} meetings: {expected['events']} events and "
+            f"{expected['attendees']} participants each, no redelivery counted twice"
+        ))
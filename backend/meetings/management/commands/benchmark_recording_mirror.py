@@ -0,0 +1,155 @@
+import hashlib
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+import requests
+from botocore.exceptions import ClientError
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from meetings.fakezoom import FakeZoomServer, GeneratedFile
+from meetings.mirror import MB, RecordingMirror, composite_checksum, get_s3_client, iter_parts
+from meetings.models import Meeting, Mentor, Recording
+
+BENCH_PREFIX = 'mirror-bench'
+
+
+class SimulatedCrash(Exception):
+    pass
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Mirror one large fake Zoom recording into S3 (moto, or MinIO with --endpoint-url) and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=5 * 1024, help='Size of the recording')
+        parser.add_argument('--part-size-mb', type=int, default=16)
+        parser.add_argument('--concurrency', type=int, default=4, help='Parts uploaded in parallel')
+        parser.add_argument('--crash-after-parts', type=int, default=0,
+                            help='Stop the first attempt after this many parts, then resume it')
+        parser.add_argument('--endpoint-url',
+                            help='S3-compatible endpoint, e.g. MinIO; a moto server is started when omitted '
+                                 '(moto assembles objects in memory, so keep --size-mb within RAM there)')
+        parser.add_argument('--bucket', default=f'{BENCH_PREFIX}-bucket')
+        parser.add_argument('--access-key', default='bench')
+        parser.add_argument('--secret-key', default='bench-secret')
+
+    def handle(self, *args, **options):
+        size = options['size_mb'] * MB
+        part_size = options['part_size_mb'] * MB
+        moto = None
+        endpoint_url = options['endpoint_url']
+        if not endpoint_url:
+            moto, endpoint_url = self.start_moto()
+
+        try:
+            with FakeZoomServer() as server, override_settings(
+                ZOOM_OAUTH_URL=server.oauth_url, ZOOM_API_BASE_URL=server.api_url,
+                AWS_S3_ENDPOINT_URL=endpoint_url, AWS_ACCESS_KEY_ID=options['access_key'],
+                AWS_SECRET_ACCESS_KEY=options['secret_key'], AWS_STORAGE_BUCKET_NAME=options['bucket'],
+            ):
+                file = server.files['bench-file'] = GeneratedFile(size)
+                s3 = get_s3_client(options['concurrency'] + 2)
+                try:
+                    s3.create_bucket(Bucket=options['bucket'])
+                except ClientError as e:
+                    if e.response['Error']['Code'] not in ('BucketAlreadyOwnedByYou', 'BucketAlreadyExists'):
+                        raise
+                recording = self.make_recording(f'{server.url}/rec/download/bench-file', size)
+
+                def mirror(recording, on_part=None):
+                    return RecordingMirror(recording, s3=s3, part_size=part_size,
+                                           concurrency=options['concurrency'], on_part=on_part).run()
+
+                rss_before = peak_rss_mb()
+                started = time.perf_counter()
+                crash_after = options['crash_after_parts']
+                if crash_after:
+                    def crash(number):
+                        if number >= crash_after:
+                            raise SimulatedCrash()
+                    try:
+                        mirror(recording, crash)
+                        raise CommandError('The first attempt finished before the simulated crash')
+                    except SimulatedCrash:
+                        pass
+                    # Resume from what the database says, like a fresh worker would
+                    recording = Recording.objects.select_related('meeting__mentor').get(id=recording.id)
+                    resumed = len(recording.mirror_state['parts'])
+                    self.stdout.write(f'Crashed after {resumed} parts; resuming')
+                copied = mirror(recording)
+                elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{copied / MB:.0f} MB in {elapsed:.1f}s ({copied / MB / elapsed:.0f} MB/s) with "
+                    f"{options['part_size_mb']} MB parts x {options['concurrency']}; peak RSS "
+                    f"{peak_rss_mb():.0f} MB ({rss_before:.0f} MB before the copy)"
+                )
+                self.verify(s3, options['bucket'], recording, file, part_size)
+                s3.delete_object(Bucket=options['bucket'], Key=recording.s3_key)
+        finally:
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+            if moto:
+                moto.terminate()
+                moto.wait()
+
+    def verify(self, s3, bucket, recording, file, part_size):
+        recording.refresh_from_db()
+        head = s3.head_object(Bucket=bucket, Key=recording.s3_key)
+        if recording.mirror_status != 'mirrored' or recording.s3_bytes != file.size:
+            raise CommandError(f'Recording is {recording.mirror_status} with {recording.s3_bytes} bytes')
+        if head['ContentLength'] != file.size:
+            raise CommandError(f"S3 object has {head['ContentLength']} bytes, expected {file.size}")
+        # The checksum the source file should have, computed independently of the upload
+        expected = composite_checksum([
+            hashlib.sha256(part).digest() for part in iter_parts(file.chunks(), part_size)
+        ])
+        if recording.s3_checksum != expected:
+            raise CommandError(f'Checksum {recording.s3_checksum} does not match the source ({expected})')
+        self.stdout.write(self.style.SUCCESS(f'Verified {recording.s3_key}: {recording.s3_checksum}'))
+
+    def make_recording(self, url, size):
+        user, _ = User.objects.get_or_create(username=f'{BENCH_PREFIX}-mentor')
+        mentor, _ = Mentor.objects.get_or_create(user=user, defaults={
+            'zoom_account_id': f'{BENCH_PREFIX}-account',
+            'zoom_client_id': f'{BENCH_PREFIX}-client',
+            'zoom_client_secret': f'{BENCH_PREFIX}-secret',
+        })
+        meeting = Meeting.objects.create(
+            mentor=mentor, meeting_id=f'{BENCH_PREFIX}-{int(time.time() * 1000)}', topic='Mirror benchmark',
+            start_time=timezone.now() - timedelta(hours=1), duration=60, host_email='host@example.com',
+            join_url='https://zoom.us/j/0'
+        )
+        return Recording.objects.create(
+            meeting=meeting, zoom_file_id='bench-file', recording_url=url, recording_type='video', file_size=size
+        )
+
+    def start_moto(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'moto.server', '-H', '127.0.0.1', '-p', str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        url = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            try:
+                requests.get(url, timeout=1)
+                return process, url
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError('moto server did not start; install moto[server] or pass --endpoint-url')
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import random
+import resource
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from meetings.fakezoom import FakeZoomServer, GeneratedFile
+from meetings.models import Meeting, Mentor, Recording
+from meetings.streaming import MB, get_block_cache, sign_stream
+from meetings.zoom_async import get_async_session
+
+BENCH_PREFIX = 'stream-bench'
+
+
+class Command(BaseCommand):
+    help = 'Serve many concurrent seeking viewers of one fake Zoom recording from a single event loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--viewers', type=int, default=200)
+        parser.add_argument('--seeks', type=int, default=5, help='Range requests per viewer')
+        parser.add_argument('--read-kb', type=int, default=2048, help='Bytes a viewer reads before seeking again')
+        parser.add_argument('--size-mb', type=int, default=1024, help='Size of the recording')
+        parser.add_argument('--hot', type=float, default=0.8,
+                            help='Share of seeks landing in the hot first tenth of the file')
+        parser.add_argument('--latency-ms', type=int, default=30, help='Fake Zoom latency per request')
+        parser.add_argument('--cache-mb', type=int, default=256, help='Disk cache size; 0 disables the cache')
+        parser.add_argument('--window-mb', type=int, default=8)
+
+    def handle(self, *args, **options):
+        cache_dir = tempfile.mkdtemp(prefix=f'{BENCH_PREFIX}-') if options['cache_mb'] else None
+        try:
+            with FakeZoomServer(latency=options['latency_ms'] / 1000) as server, override_settings(
+                ZOOM_OAUTH_URL=server.oauth_url, ZOOM_API_BASE_URL=server.api_url,
+                RECORDING_STREAM_CACHE_DIR=cache_dir,
+                RECORDING_STREAM_CACHE_SIZE=options['cache_mb'] * MB,
+                RECORDING_STREAM_WINDOW=options['window_mb'] * MB,
+            ):
+                file = server.files['bench-file'] = GeneratedFile(options['size_mb'] * MB)
+                recording = self.make_recording(f'{server.url}/rec/download/bench-file', file.size)
+                rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                started = time.perf_counter()
+                latencies, copied = asyncio.run(self.watch(recording, file, options))
+                elapsed = time.perf_counter() - started
+                rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+                latencies.sort()
+                self.stdout.write(
+                    f"{len(latencies)} range requests from {options['viewers']} viewers in {elapsed:.1f}s: "
+                    f"{copied / MB / elapsed:.0f} MB/s, first byte p50 {latencies[len(latencies) // 2] * 1000:.0f}ms "
+                    f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f}ms "
+                    f"max {latencies[-1] * 1000:.0f}ms"
+                )
+                self.stdout.write(
+                    f"upstream: {server.calls['download_file']} requests on {server.calls['connections']} "
+                    f"connections; peak RSS {rss_after:.0f} MB ({rss_before:.0f} MB before)"
+                )
+                cache = get_block_cache()
+                if cache:
+                    self.stdout.write(f'cache: {cache.stats()}')
+        finally:
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+            if cache_dir:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+    async def watch(self, recording, file, options):
+        url = reverse('stream_recording', args=[recording.id])
+        sig = sign_stream(recording.id)
+        read = options['read_kb'] * 1024
+        hot_end = file.size // 10
+        latencies, copied = [], 0
+        errors = []
+
+        async def viewer(seed):
+            nonlocal copied
+            rng = random.Random(seed)
+            client = AsyncClient()
+            for _ in range(options['seeks']):
+                limit = hot_end if rng.random() < options['hot'] else file.size - read
+                start = rng.randrange(0, limit)
+                started = time.perf_counter()
+                response = await client.get(url, {'sig': sig}, headers={'Range': f'bytes={start}-'})
+                if response.status_code != 206:
+                    errors.append(f'{response.status_code} for bytes={start}-')
+                    return
+                # Read like a player that then seeks elsewhere, dropping the rest of the response
+                received, digest = 0, hashlib.sha256()
+                async for chunk in response.streaming_content:
+                    if not received:
+                        latencies.append(time.perf_counter() - started)
+                    received += len(chunk)
+                    digest.update(chunk)
+                    if received >= read:
+                        break
+                # What the server does once the response ends or the client disconnects
+                response.close()
+                expected = hashlib.sha256()
+                for chunk in file.chunks(start, start + received):
+                    expected.update(chunk)
+                if digest.digest() != expected.digest():
+                    errors.append(f'Wrong bytes from {start}')
+                copied += received
+
+        await asyncio.gather(*(viewer(seed) for seed in range(options['viewers'])))
+        await get_async_session().close()
+        if errors:
+            raise CommandError(f'{len(errors)} failed requests, e.g. {errors[0]}')
+        return latencies, copied
+
+    def make_recording(self, url, size):
+        user, _ = User.objects.get_or_create(username=f'{BENCH_PREFIX}-mentor')
+        mentor, _ = Mentor.objects.get_or_create(user=user, defaults={
+            'zoom_account_id': f'{BENCH_PREFIX}-account',
+            'zoom_client_id': f'{BENCH_PREFIX}-client',
+            'zoom_client_secret': f'{BENCH_PREFIX}-secret',
+        })
+        meeting = Meeting.objects.create(
+            mentor=mentor, meeting_id=f'{BENCH_PREFIX}-{int(time.time() * 1000)}', topic='Stream benchmark',
+            start_time=timezone.now() - timedelta(hours=1), duration=60, host_email='host@example.com',
+            join_url='https://zoom.us/j/0'
+        )
+        return Recording.objects.create(
+            meeting=meeting, zoom_file_id='bench-file', recording_url=url, recording_type='video', file_size=size
+        )
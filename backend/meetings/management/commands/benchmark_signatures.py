@@ -0,0 +1,69 @@
+import base64
+import hashlib
+import hmac
+import time
+
+import jwt
+from django.core.management.base import BaseCommand
+
+from meetings.signatures import JWT_LIFETIME, SDKSigner
+
+SDK_KEY = 'bench-sdk-key'
+SDK_SECRET = 'bench-sdk-secret-at-least-32-bytes-long'
+
+
+def rate(function, seconds):
+    """Calls per second of ``function(i)`` on this thread, i.e. per core"""
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            function(calls)
+            calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = 'Report SDK signatures per second per core for the HMAC and JWT flavors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0, help='Run time per case')
+        parser.add_argument('--meetings', type=int, default=50,
+                            help='Distinct meetings signed in the cached cases')
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        meetings = options['meetings']
+        signer = SDKSigner(SDK_KEY, SDK_SECRET, cache_size=meetings * 4)
+
+        def hmac_baseline(i):
+            # What generate_signature did per request before meetings.signatures
+            msg = f'{SDK_KEY}.{i}.{int(time.time() * 1000)}.0'
+            base64.b64encode(hmac.new(SDK_SECRET.encode(), msg.encode(), hashlib.sha256).digest()).decode()
+
+        def jwt_baseline(i):
+            # What MeetingViewSet.generate_zoom_signature did before
+            iat = int(time.time())
+            jwt.encode({
+                'sdkKey': SDK_KEY, 'mn': i, 'role': 0, 'iat': iat, 'exp': iat + JWT_LIFETIME,
+                'appKey': SDK_KEY, 'tokenExp': iat + JWT_LIFETIME
+            }, SDK_SECRET, algorithm='HS256')
+
+        now = int(time.time())
+        cases = [
+            ('hmac  baseline (hmac.new per call)', hmac_baseline),
+            ('hmac  precomputed key', lambda i: signer.hmac_signature(i, 0, now * 1000)),
+            ('hmac  cached by time bucket', lambda i: signer.sign(i % meetings, 0)),
+            ('jwt   baseline (jwt.encode per call)', jwt_baseline),
+            ('jwt   precomputed key and header', lambda i: signer.jwt_signature(i, 0, now)),
+            ('jwt   cached by time bucket', lambda i: signer.sign(i % meetings, 0, flavor='jwt')),
+        ]
+        for label, function in cases:
+            self.stdout.write(f'{label:<40} {rate(function, seconds):>12,.0f} signatures/s/core')
+
+        # The fast JWT must verify exactly like one from PyJWT
+        token = signer.jwt_signature('123', 1, now)
+        claims = jwt.decode(token, SDK_SECRET, algorithms=['HS256'])
+        assert claims['mn'] == '123' and claims['role'] == 1
+        self.stdout.write(f"cache: {signer.stats()}")
@@ -0,0 +1,83 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from meetings.models import WebhookEvent
+from meetings.management.commands.benchmark_zoom_client import summarize
+
+BENCH_PREFIX = 'webhook-bench-'
+
+
+class Command(BaseCommand):
+    help = 'Fire signed recording webhooks at a fixed rate and report the acknowledgement latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--rate', type=int, default=1000, help='Deliveries per second')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent senders')
+        parser.add_argument('--url', help='Webhook URL of a running server; defaults to an in-process test client')
+        parser.add_argument('--keep', action='store_true', help='Keep the stored benchmark events')
+
+    def handle(self, *args, **options):
+        if not settings.ZOOM_WEBHOOK_SECRET:
+            raise CommandError('Set ZOOM_WEBHOOK_SECRET; the benchmark signs its deliveries with it')
+        secret = settings.ZOOM_WEBHOOK_SECRET.encode()
+        local = threading.local()
+        url = options['url'] or reverse('recording_webhook')
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+
+        def deliver(i):
+            body = json.dumps({
+                'event': 'recording.started',
+                'event_ts': int(time.time() * 1000),
+                'payload': {'object': {'id': f'{BENCH_PREFIX}{i}'}},
+            })
+            timestamp = str(int(time.time()))
+            signature = 'v0=' + hmac.new(secret, f'v0:{timestamp}:{body}'.encode(), hashlib.sha256).hexdigest()
+            headers = {'X-Zm-Signature': signature, 'X-Zm-Request-Timestamp': timestamp}
+
+            if options['url']:
+                if not hasattr(local, 'session'):
+                    local.session = requests.Session()
+                return local.session.post(url, data=body, headers={**headers, 'Content-Type': 'application/json'},
+                                          timeout=10).status_code
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST=host)
+            return local.client.post(url, body, content_type='application/json', headers=headers).status_code
+
+        def timed(i, scheduled):
+            # Latency counts from the scheduled send time, so queueing behind a slow ack shows up
+            status_code = deliver(i)
+            return time.perf_counter() - scheduled, status_code
+
+        interval = 1 / options['rate']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            futures = []
+            for i in range(options['events']):
+                scheduled = started + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(timed, i, scheduled))
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for latency, _ in results]
+        errors = sum(1 for _, status_code in results if status_code != 200)
+        self.stdout.write(summarize('ack', latencies, elapsed))
+        if errors:
+            self.stdout.write(self.style.ERROR(f'{errors} deliveries were not acknowledged with 200'))
+
+        if not options['keep']:
+            deleted, _ = WebhookEvent.objects.filter(payload__contains=f'"{BENCH_PREFIX}').delete()
+            self.stdout.write(f'Deleted {deleted} benchmark events')
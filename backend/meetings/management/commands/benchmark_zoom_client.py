@@ -0,0 +1,155 @@
+import asyncio
+import socket
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import aiohttp
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from meetings.fakezoom import FakeZoomServer
+from meetings.models import Mentor
+
+BENCH_USERNAME = 'zoom-client-bench'
+
+
+def summarize(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return (
+        f"{label:<6} {len(latencies)} requests in {elapsed:.2f}s "
+        f"({len(latencies) / elapsed:.0f}/s)  "
+        f"p50={quantiles[49] * 1000:.0f}ms p95={quantiles[94] * 1000:.0f}ms p99={quantiles[98] * 1000:.0f}ms"
+    )
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """wsgiref server handing each connection to a fixed pool of threads, like a threaded WSGI worker"""
+    request_queue_size = 1024
+
+    def __init__(self, threads):
+        super().__init__(('127.0.0.1', 0), QuietHandler)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+class Command(BaseCommand):
+    help = ('Compare the sync create-meeting view under a threaded WSGI server with the async one under '
+            'uvicorn (ASGI), both calling a local fake Zoom')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=500, help='Meetings to create per server')
+        parser.add_argument('--latency-ms', type=int, default=100, help='Fake Zoom latency per request')
+        parser.add_argument('--threads', type=int, default=16,
+                            help='WSGI server threads, i.e. WSGI workers x threads')
+        parser.add_argument('--concurrency', type=int, default=500,
+                            help='Requests in flight at once; under ASGI each holds a database connection')
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn
+        except ImportError:
+            raise CommandError('uvicorn is not installed; pip install uvicorn')
+
+        calls = options['calls']
+        with FakeZoomServer(latency=options['latency_ms'] / 1000) as server, override_settings(
+            ZOOM_OAUTH_URL=server.oauth_url, ZOOM_API_BASE_URL=server.api_url,
+            # Measure the servers, not this app's own per-account throttle
+            ZOOM_RATE_LIMIT_PER_SECOND=calls,
+        ):
+            token = self.make_mentor()
+            try:
+                wsgi = PooledWSGIServer(options['threads'])
+                wsgi.set_app(get_wsgi_application())
+                thread = threading.Thread(target=wsgi.serve_forever, daemon=True)
+                thread.start()
+                try:
+                    url = f'http://127.0.0.1:{wsgi.server_port}/api/meetings/create/'
+                    self.run_load('wsgi', url, token, options)
+                finally:
+                    wsgi.shutdown()
+                    wsgi.server_close()
+
+                sock = socket.socket()
+                sock.bind(('127.0.0.1', 0))
+                port = sock.getsockname()[1]
+                asgi = uvicorn.Server(uvicorn.Config(
+                    get_asgi_application(), lifespan='off', log_level='warning', access_log=False, backlog=1024
+                ))
+                thread = threading.Thread(target=asgi.run, kwargs={'sockets': [sock]}, daemon=True)
+                thread.start()
+                try:
+                    while not asgi.started:
+                        if not thread.is_alive():
+                            raise CommandError('uvicorn did not start')
+                        time.sleep(0.05)
+                    url = f'http://127.0.0.1:{port}/api/meetings/async/create/'
+                    self.run_load('asgi', url, token, options)
+                finally:
+                    asgi.should_exit = True
+                    thread.join()
+                    sock.close()
+            finally:
+                User.objects.filter(username=BENCH_USERNAME).delete()
+            self.stdout.write(f"fake zoom calls: {dict(server.calls)}")
+
+    def make_mentor(self):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        Mentor.objects.get_or_create(user=user, defaults={
+            'zoom_account_id': f'{BENCH_USERNAME}-account',
+            'zoom_client_id': f'{BENCH_USERNAME}-client',
+            'zoom_client_secret': f'{BENCH_USERNAME}-secret',
+        })
+        return str(RefreshToken.for_user(user).access_token)
+
+    def run_load(self, label, url, token, options):
+        async def load():
+            statuses = Counter()
+            limit = asyncio.Semaphore(options['concurrency'])
+            headers = {'Authorization': f'Bearer {token}'}
+            payload = {'topic': 'Benchmark', 'type': 2, 'duration': 30}
+            # A connection per request, as wsgiref closes every connection anyway
+            connector = aiohttp.TCPConnector(limit=options['concurrency'], force_close=True)
+            async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300)) as session:
+
+                async def timed_request():
+                    async with limit:
+                        started = time.perf_counter()
+                        async with session.post(url, json=payload, headers=headers) as response:
+                            await response.read()
+                        statuses[response.status] += 1
+                        return time.perf_counter() - started
+
+                started = time.perf_counter()
+                latencies = await asyncio.gather(*(timed_request() for _ in range(options['calls'])))
+                return latencies, time.perf_counter() - started, statuses
+
+        latencies, elapsed, statuses = asyncio.run(load())
+        self.stdout.write(summarize(label, latencies, elapsed) + f'  statuses={dict(statuses)}')
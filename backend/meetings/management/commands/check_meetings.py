@@ -1,10 +1,31 @@
+import signal
+import threading
+
 from django.core.management.base import BaseCommand
+from meetings.reminders import ReminderScheduler
 from meetings.utils import check_upcoming_meetings
 
 class Command(BaseCommand):
     help = 'Check for upcoming meetings and send reminders'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--daemon', action='store_true',
+                            help='Keep running and send reminders as they come due instead of a single pass')
+        parser.add_argument('--horizon', type=int, help='Seconds of upcoming reminders to keep in memory')
+        parser.add_argument('--refresh', type=int, help='Seconds between schedule reloads')
+
     def handle(self, *args, **options):
-        self.stdout.write('Checking for upcoming meetings...')
-        check_upcoming_meetings()
-        self.stdout.write(self.style.SUCCESS('Successfully checked meetings and sent reminders')) 
\ No newline at end of file
+        if not options['daemon']:
+            self.stdout.write('Checking for upcoming meetings...')
+            sent = check_upcoming_meetings()
+            self.stdout.write(self.style.SUCCESS(f'Successfully checked meetings and sent {sent} reminders'))
+            return
+
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.set())
+
+        scheduler = ReminderScheduler(horizon=options['horizon'], refresh=options['refresh'])
+        self.stdout.write('Reminder scheduler running...')
+        scheduler.run_forever(stop=stopping)
+        self.stdout.write(self.style.SUCCESS('Reminder scheduler stopped'))
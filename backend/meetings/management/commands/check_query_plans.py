@@ -0,0 +1,125 @@
+import json
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from meetings.models import Meeting, Mentor, Recording
+from meetings.pagination import keyset_filter
+
+SEED_PREFIX = 'plan-seed'
+
+
+def index_scans(plan):
+    """Yield (node type, relation, index name) for every node of an EXPLAIN JSON plan"""
+    yield plan.get('Node Type'), plan.get('Relation Name'), plan.get('Index Name')
+    for child in plan.get('Plans', []):
+        yield from index_scans(child)
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot meetings queries and fail if any of them stops using its index (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Insert this many meetings (plus recordings) first, if not seeded already')
+        parser.add_argument('--mentors', type=int, default=1000, help='Mentors to spread seeded meetings over')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are only checked against PostgreSQL')
+
+        if options['seed']:
+            self.seed(options['seed'], options['mentors'], options['batch_size'])
+            with connection.cursor() as cursor:
+                for model in (Meeting, Recording):
+                    cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        mentor = Mentor.objects.filter(meetings__isnull=False).order_by('-id').first()
+        meeting = Meeting.objects.filter(mentor=mentor).order_by('start_time').first()
+        if meeting is None:
+            raise CommandError('No meetings to explain against; run with --seed')
+
+        now = timezone.now()
+        mentor_meetings = Meeting.objects.filter(mentor=mentor)
+        mentor_recordings = Recording.objects.filter(meeting__mentor=mentor)
+        checks = [
+            ('list_meetings first page', 'meeting_mentor_start_idx',
+             mentor_meetings.order_by('start_time', 'id')[:51]),
+            ('list_meetings next page', 'meeting_mentor_start_idx',
+             mentor_meetings.filter(keyset_filter(('start_time', 'id'), (meeting.start_time, meeting.id)))
+             .order_by('start_time', 'id')[:51]),
+            ('reminder scan', 'meeting_reminder_due_idx',
+             Meeting.objects.filter(reminder_sent=False, is_active=True,
+                                    start_time__gte=now, start_time__lt=now + timedelta(minutes=5))),
+            ('webhook lookup by meeting_id', None,
+             Meeting.objects.filter(meeting_id=meeting.meeting_id)),
+            ('list_recordings', None,
+             mentor_recordings.order_by('-created_at', '-id')[:51]),
+            ('list_recordings by meeting', 'recording_meeting_created_idx',
+             Recording.objects.filter(meeting=meeting).order_by('-created_at', '-id')[:51]),
+        ]
+
+        failures = []
+        for label, expected_index, queryset in checks:
+            plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+            nodes = list(index_scans(plan))
+            used = sorted({index for _, _, index in nodes if index})
+            seq_scans = sorted({relation for node, relation, _ in nodes if node == 'Seq Scan'})
+            ok = (expected_index in used) if expected_index else (bool(used) and not seq_scans)
+
+            line = f"{label:<32} indexes={','.join(used) or '-'}"
+            if seq_scans:
+                line += f" seq_scans={','.join(seq_scans)}"
+            if ok:
+                self.stdout.write(self.style.SUCCESS(f'OK   {line}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'FAIL {line} (expected {expected_index or "an index scan"})'))
+                failures.append(label)
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries are not using their index: {', '.join(failures)}")
+
+    def seed(self, total, mentors, batch_size):
+        if Meeting.objects.filter(meeting_id__startswith=SEED_PREFIX).exists():
+            self.stdout.write('Seed data already present, skipping')
+            return
+
+        started = time.monotonic()
+        users = User.objects.bulk_create(
+            [User(username=f'{SEED_PREFIX}-{i}') for i in range(mentors)], batch_size=batch_size
+        )
+        mentor_rows = Mentor.objects.bulk_create([
+            Mentor(user=user, zoom_account_id=f'{SEED_PREFIX}-{user.username}', zoom_client_id='seed',
+                   zoom_client_secret='seed')
+            for user in users
+        ], batch_size=batch_size)
+
+        base = timezone.now() - timedelta(days=365)
+        for offset in range(0, total, batch_size):
+            meetings = Meeting.objects.bulk_create([
+                Meeting(
+                    mentor=mentor_rows[i % mentors],
+                    topic=f'Seed meeting {i}',
+                    start_time=base + timedelta(minutes=17 * i % (2 * 365 * 24 * 60)),
+                    duration=60,
+                    meeting_id=f'{SEED_PREFIX}-{i}',
+                    join_url='https://zoom.us/j/seed',
+                    host_email='seed@example.com',
+                    meeting_type='scheduled',
+                    reminder_sent=i % 10 != 0,
+                )
+                for i in range(offset, min(offset + batch_size, total))
+            ], batch_size=batch_size)
+            # Roughly one recording per four meetings, as in production
+            Recording.objects.bulk_create([
+                Recording(meeting=meeting, recording_url='https://zoom.us/rec/seed', recording_type='video')
+                for meeting in meetings[::4]
+            ], batch_size=batch_size)
+            self.stdout.write(f'Seeded {min(offset + batch_size, total)}/{total} meetings')
+
+        self.stdout.write(f'Seeding took {time.monotonic() - started:.0f}s')
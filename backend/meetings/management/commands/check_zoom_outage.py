@@ -0,0 +1,111 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from meetings.circuit import CircuitBreaker
+from meetings.fakezoom import FakeZoomServer
+from meetings.ratelimit import ZoomRateLimiter
+from meetings.zoom import ZoomClient, ZoomTokenManager, ZoomUnavailable, build_session
+
+
+class Command(BaseCommand):
+    help = 'Inject a Zoom brownout into a local fake Zoom and check the circuit breaker fails fast and recovers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--read-timeout', type=float, default=0.5, help='Client read timeout in seconds')
+        parser.add_argument('--threshold', type=int, default=3, help='Failures that open the breaker')
+        parser.add_argument('--reset-timeout', type=float, default=2.0, help='Seconds the breaker stays open')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent callers during the outage')
+        parser.add_argument('--calls', type=int, default=200, help='Calls made during the outage')
+
+    def handle(self, *args, **options):
+        read_timeout = options['read_timeout']
+        threshold = options['threshold']
+        reset_timeout = options['reset_timeout']
+        breaker = CircuitBreaker({'default': {'failure_threshold': threshold, 'reset_timeout': reset_timeout}})
+        self.failures = []
+
+        with FakeZoomServer() as server, \
+                override_settings(ZOOM_OAUTH_URL=server.oauth_url, ZOOM_API_BASE_URL=server.api_url):
+            client = ZoomClient(
+                'outage-account', 'outage-client', 'outage-secret',
+                session=build_session(options['threads']),
+                tokens=ZoomTokenManager(),
+                limiter=ZoomRateLimiter(rate=100000),
+                breaker=breaker,
+                timeout=(1.0, read_timeout)
+            )
+
+            def call(_):
+                started = time.perf_counter()
+                try:
+                    client.get_meeting_recordings('1')
+                    outcome = 'ok'
+                except ZoomUnavailable:
+                    outcome = 'unavailable'
+                return outcome, time.perf_counter() - started
+
+            self.expect('healthy call succeeds', call(0)[0] == 'ok')
+
+            # Brownout: responses stall for longer than the read timeout
+            server.stall = read_timeout * 10
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                results = list(pool.map(call, range(options['calls'])))
+            elapsed = time.perf_counter() - started
+            slow = [latency for _, latency in results if latency >= read_timeout]
+            fast = sorted(latency for _, latency in results if latency < read_timeout)
+            self.stdout.write(
+                f"stalled: {len(results)} calls in {elapsed:.2f}s, {len(slow)} waited for the timeout, "
+                f"{len(fast)} failed fast (max {fast[-1] * 1000 if fast else 0:.1f}ms), "
+                f"{server.calls['faulted']} reached Zoom"
+            )
+            self.expect('every call failed with ZoomUnavailable',
+                        all(outcome == 'unavailable' for outcome, _ in results))
+            self.expect('breaker opened', breaker.states()['get_meeting_recordings']['state'] == 'open')
+            # Only the calls already in flight when the breaker opened may wait for the timeout
+            self.expect('calls fail fast once open', len(slow) < threshold + options['threads'])
+            self.expect('no worker pinned beyond the timeout', elapsed < read_timeout * (threshold + 2) + 1)
+
+            # Still down when the breaker half-opens: the probe fails and it opens again
+            time.sleep(reset_timeout)
+            faulted = server.calls['faulted']
+            call(0)
+            self.expect('failed probe reopens', breaker.states()['get_meeting_recordings']['state'] == 'open')
+            self.expect('one probe reached Zoom', server.calls['faulted'] == faulted + 1)
+
+            # 5xx count as failures too
+            server.stall = 0.0
+            server.fail_status = 503
+            self.expect('create_meeting 503s raise ZoomUnavailable and open its own breaker', all(
+                self.create(client) == 'unavailable' for _ in range(threshold)
+            ) and breaker.states()['create_meeting']['state'] == 'open')
+
+            # Recovery: the next probe after reset_timeout closes the breakers
+            server.fail_status = None
+            time.sleep(reset_timeout)
+            self.expect('probe after recovery succeeds', call(0)[0] == 'ok')
+            self.expect('breaker closed', breaker.states()['get_meeting_recordings']['state'] == 'closed')
+            self.expect('create_meeting recovers', self.create(client) == 'ok')
+            self.expect('no endpoint degraded', not breaker.is_degraded())
+
+        if self.failures:
+            raise CommandError(f"{len(self.failures)} check(s) failed: {', '.join(self.failures)}")
+
+    def create(self, client):
+        try:
+            client.create_meeting({'topic': 'Outage check', 'type': 2, 'duration': 30})
+            return 'ok'
+        except ZoomUnavailable:
+            return 'unavailable'
+        except Exception:
+            return 'failed'
+
+    def expect(self, label, ok):
+        if ok:
+            self.stdout.write(self.style.SUCCESS(f'OK   {label}'))
+        else:
+            self.failures.append(label)
+            self.stdout.write(self.style.ERROR(f'FAIL {label}'))
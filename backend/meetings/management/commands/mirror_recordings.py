@@ -0,0 +1,66 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from meetings.mirror import MirrorWorker, get_s3_client
+
+class Command(BaseCommand):
+    help = 'Copy Zoom cloud recordings to S3 with streaming, resumable multipart uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Recordings mirrored at the same time')
+        parser.add_argument('--concurrency', type=int, help='Parts uploaded in parallel per recording')
+        parser.add_argument('--part-size-mb', type=int, help='Multipart part size (at least 5)')
+        parser.add_argument('--lease', type=int, default=600,
+                            help='Seconds without progress before another worker may resume a recording')
+        parser.add_argument('--idle-sleep', type=float, default=10.0,
+                            help='Seconds a worker waits when nothing is due')
+        parser.add_argument('--once', action='store_true', help='Exit once no recording is due instead of polling')
+
+    def handle(self, *args, **options):
+        if not settings.AWS_STORAGE_BUCKET_NAME:
+            raise CommandError('AWS_STORAGE_BUCKET_NAME is not set')
+
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.set())
+
+        mirror_options = {}
+        if options['concurrency']:
+            mirror_options['concurrency'] = options['concurrency']
+        if options['part_size_mb']:
+            mirror_options['part_size'] = options['part_size_mb'] * 1024 * 1024
+        # boto3 clients are thread-safe; share one pool sized for every worker's parts
+        s3 = get_s3_client(options['workers'] * (options['concurrency'] or settings.RECORDING_MIRROR_CONCURRENCY) + 2)
+        results = [[0, 0] for _ in range(options['workers'])]
+
+        def work(index):
+            worker = MirrorWorker(s3=s3, lease=options['lease'], **mirror_options)
+            try:
+                while not stopping.is_set():
+                    recording = worker.process_one()
+                    if recording is None:
+                        if options['once']:
+                            return
+                        stopping.wait(options['idle_sleep'])
+                    elif recording.mirror_status == 'mirrored':
+                        results[index][0] += 1
+                    else:
+                        results[index][1] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(options['workers'])]
+        self.stdout.write(f"Recording mirror running with {len(threads)} workers...")
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mirrored = sum(result[0] for result in results)
+        failed = sum(result[1] for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Recording mirror stopped after mirroring {mirrored} recordings ({failed} attempts failed)'
+        ))
@@ -0,0 +1,47 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from meetings.outbox import OutboxWorker, ProviderRateLimiter
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox with a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Worker threads, each with its own SMTP connection')
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails claimed and sent per connection')
+        parser.add_argument('--idle-sleep', type=float, default=2.0,
+                            help='Seconds a worker waits when nothing is due')
+        parser.add_argument('--once', action='store_true', help='Exit once no email is due instead of polling')
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.set())
+
+        # One limiter for the whole process so the per-provider rates hold across threads
+        limiter = ProviderRateLimiter()
+        claimed = [0] * options['workers']
+
+        def work(index):
+            worker = OutboxWorker(batch_size=options['batch_size'], limiter=limiter)
+            try:
+                while not stopping.is_set():
+                    count = worker.process_batch()
+                    claimed[index] += count
+                    if not count:
+                        if options['once']:
+                            return
+                        stopping.wait(options['idle_sleep'])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(options['workers'])]
+        self.stdout.write(f"Email outbox worker running with {len(threads)} threads...")
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f'Email outbox worker stopped after processing {sum(claimed)} emails'))
@@ -0,0 +1,36 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from meetings.webhooks import WebhookEventProcessor
+
+class Command(BaseCommand):
+    help = 'Process stored Zoom webhook events in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Events claimed per batch')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Meetings processed in parallel within a batch')
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help='Seconds to wait when nothing is due')
+        parser.add_argument('--once', action='store_true', help='Exit once no event is due instead of polling')
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.set())
+
+        processor = WebhookEventProcessor(batch_size=options['batch_size'], concurrency=options['concurrency'])
+        self.stdout.write('Webhook event processor running...')
+        total = 0
+        try:
+            while not stopping.is_set():
+                count = processor.process_batch()
+                total += count
+                if not count:
+                    if options['once']:
+                        break
+                    stopping.wait(options['idle_sleep'])
+        finally:
+            processor.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Webhook event processor stopped after {total} events'))
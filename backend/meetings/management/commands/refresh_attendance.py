@@ -0,0 +1,49 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from meetings.attendance import refresh_due
+
+
+class Command(BaseCommand):
+    help = 'Summarize the attendance of completed meetings from their participant events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Meetings summarized per transaction')
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help='Seconds between passes over the due meetings')
+        parser.add_argument('--once', action='store_true', help='Exit after one pass instead of polling')
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.set())
+
+        meeting_count = rows = 0
+        while not stopping.is_set():
+            started = time.perf_counter()
+            summarized = written = 0
+            last = None
+            while not stopping.is_set():
+                last, meetings, chunk_rows = refresh_due(options['chunk_size'], last)
+                if last is None:
+                    break
+                summarized += meetings
+                written += chunk_rows
+            if summarized:
+                self.stdout.write(
+                    f'Summarized {summarized} meetings ({written} attendance rows) '
+                    f'in {time.perf_counter() - started:.1f}s'
+                )
+            meeting_count += summarized
+            rows += written
+            if options['once']:
+                break
+            stopping.wait(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Attendance refresh stopped after summarizing {meeting_count} meetings ({rows} attendance rows)'
+        ))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meetings.models import Mentor
+from meetings.sync import sync_accounts
+
+
+class Command(BaseCommand):
+    help = 'Reconcile local meetings and recordings with Zoom, incrementally from each account\'s checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Accounts synced in parallel')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per bulk insert/update')
+        parser.add_argument('--account', action='append', dest='accounts',
+                            help='Only sync this Zoom account id (repeatable)')
+        parser.add_argument('--since-days', type=int, default=30,
+                            help='How far back to look for recordings on an account\'s first run')
+        parser.add_argument('--full', action='store_true', help='Ignore the checkpoints and sync everything again')
+        parser.add_argument('--notify', action='store_true',
+                            help='Email students about recordings the sync finds (missed webhooks)')
+
+    def handle(self, *args, **options):
+        mentors = Mentor.objects.select_related('user').order_by('id')
+        if options['accounts']:
+            mentors = mentors.filter(zoom_account_id__in=options['accounts'])
+
+        started = time.perf_counter()
+        failed = []
+        for mentor, stats, error in sync_accounts(
+            list(mentors),
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            since_days=options['since_days'],
+            full=options['full'],
+            notify=options['notify'],
+        ):
+            if error is not None:
+                failed.append(mentor.zoom_account_id)
+                self.stdout.write(self.style.ERROR(f'{mentor.zoom_account_id}: {error}'))
+            else:
+                counts = ', '.join(f'{name}={count}' for name, count in sorted(stats.items())) or 'no changes'
+                self.stdout.write(f'{mentor.zoom_account_id}: {counts}')
+
+        self.stdout.write(f'Synced in {time.perf_counter() - started:.1f}s')
+        if failed:
+            raise CommandError(f"{len(failed)} account(s) failed: {', '.join(failed)}")
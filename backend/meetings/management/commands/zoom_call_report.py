@@ -0,0 +1,71 @@
+import re
+import statistics
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from meetings.tracing import read_spans
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(value):
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value)
+    if match is None:
+        raise CommandError(f'Invalid duration {value!r}, expected e.g. 90s, 15m, 2h or 1d')
+    return float(match[1]) * DURATION_UNITS[match[2]]
+
+
+class Command(BaseCommand):
+    help = 'Print latency percentiles per Zoom endpoint from the exported Zoom call spans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', default='1h', help='Window length before --until, e.g. 15m, 2h or 1d')
+        parser.add_argument('--until', help='End of the window as an ISO 8601 date and time (default: now)')
+        parser.add_argument('--file', help='Trace file to read, with its rotated <file>.1 (default: ZOOM_TRACE_FILE)')
+        parser.add_argument('--account', help='Only calls made for this Zoom account id')
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.ZOOM_TRACE_FILE
+        if not path:
+            raise CommandError('No trace file: pass --file or set ZOOM_TRACE_FILE')
+        if options['until']:
+            until = parse_datetime(options['until'])
+            if until is None or until.tzinfo is None:
+                raise CommandError(f"Invalid --until {options['until']!r}, expected e.g. 2026-10-17T12:00:00Z")
+            end_ns = int(until.timestamp() * 1e9)
+        else:
+            end_ns = time.time_ns()
+        start_ns = end_ns - int(parse_duration(options['since']) * 1e9)
+
+        durations = defaultdict(list)
+        errors = defaultdict(int)
+        resent = defaultdict(int)
+        for name, duration, attributes, failed in read_spans([f'{path}.1', path], start_ns, end_ns):
+            if options['account'] and attributes.get('zoom.account_id') != options['account']:
+                continue
+            durations[name].append(duration)
+            errors[name] += failed
+            resent[name] += int(attributes.get('http.request.resend_count', 0))
+
+        if not durations:
+            self.stdout.write(f"No Zoom calls in the {options['since']} window")
+            return
+        width = max(len(name) for name in durations)
+        self.stdout.write(
+            f"{'endpoint':<{width}}  {'calls':>7} {'errors':>7} {'resent':>7}"
+            f" {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+        )
+        for name in sorted(durations):
+            latencies = sorted(durations[name])
+            # Inclusive, so the percentiles of a few calls stay within the observed range
+            quantiles = statistics.quantiles(latencies, n=100, method='inclusive') \
+                if len(latencies) > 1 else latencies * 99
+            self.stdout.write(
+                f"{name:<{width}}  {len(latencies):>7} {errors[name]:>7} {resent[name]:>7}"
+                + ''.join(f' {value * 1000:>6.0f}ms' for value in (quantiles[49], quantiles[94], quantiles[98]))
+                + f' {latencies[-1] * 1000:>6.0f}ms'
+            )
@@ -0,0 +1,374 @@
+"""Request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and records it under the URL
+pattern it resolved to (``api/meetings/recordings/<str:recording_id>/``
+rather than the path, so ids do not multiply the series):
+
+- ``http_requests_total{route,method,status}``
+- ``http_request_duration_seconds{route,method}``, a histogram
+- ``http_request_db_queries{route}``, a histogram of queries per request,
+  and ``http_request_db_seconds_total{route}``
+- ``http_request_zoom_calls_total{route}`` and
+  ``http_request_zoom_seconds_total{route}``
+- ``http_response_size_bytes{route}``, a histogram, for responses whose
+  size is known up front
+
+and the Zoom clients add ``zoom_api_calls_total{endpoint,status}`` and
+``zoom_api_duration_seconds{endpoint}`` for every HTTP call they make,
+whether a request, a worker or a management command made it.
+
+Recording is a dictionary update under a lock. Queries are seen by an
+execute wrapper installed on every database connection and charged to the
+request found in a context variable, so the queries async views run
+through ``sync_to_async`` count as well.
+
+Every process keeps its own totals. With METRICS_DIR set (a directory
+local to the host, emptied when the server is deployed), a background
+thread writes them to a file of the process's own every
+METRICS_FLUSH_INTERVAL seconds and at exit, and ``/metrics`` adds up the
+files of all processes, taking its own totals live. Files left by
+processes that exited, e.g. gunicorn workers recycled after
+``max_requests``, are folded into one archive file, so counters never go
+backwards. Without METRICS_DIR a scrape only sees the process that
+answered it, which is right for a single process.
+"""
+import atexit
+import fcntl
+import glob
+import ipaddress
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ZOOM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by route, method and status code', None),
+    'http_request_duration_seconds': ('histogram', 'Time to produce the response', DURATION_BUCKETS),
+    'http_request_db_queries': ('histogram', 'Database queries per request', QUERY_BUCKETS),
+    'http_request_db_seconds_total': ('counter', 'Time spent in database queries', None),
+    'http_request_zoom_calls_total': ('counter', 'Zoom API calls made while handling requests', None),
+    'http_request_zoom_seconds_total': ('counter', 'Time spent in Zoom API calls while handling requests', None),
+    'http_response_size_bytes': ('histogram', 'Response body size', SIZE_BUCKETS),
+    'zoom_api_calls_total': ('counter', 'Zoom API calls by endpoint and status code', None),
+    'zoom_api_duration_seconds': ('histogram', 'Zoom API call time; for downloads, until the response headers', ZOOM_BUCKETS),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ARCHIVE = 'archive.json'
+
+
+class RequestStats:
+    """What one request spent on the database and on Zoom"""
+    __slots__ = ('queries', 'db_seconds', 'zoom_calls', 'zoom_seconds')
+
+    def __init__(self):
+        self.queries = self.zoom_calls = 0
+        self.db_seconds = self.zoom_seconds = 0.0
+
+
+request_stats = ContextVar('request_stats', default=None)
+
+
+class Registry:
+    """One process's metric values: a number per counter, bucket counts and sum per histogram"""
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.values = {}  # (name, labels) -> value, or [count per bucket..., count above them, sum]
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.path = os.path.join(directory, f'{self.pid}-{uuid.uuid4().hex[:8]}.json') if directory else None
+        self.dirty = False
+        self.thread = None
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+            self.dirty = True
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        index = bisect_left(buckets, value)
+        key = (name, labels)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+            self.dirty = True
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                [name, [list(pair) for pair in labels], list(value) if isinstance(value, list) else value]
+                for (name, labels), value in self.values.items()
+            ]
+
+    def start(self):
+        if self.directory and self.thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.thread = threading.Thread(target=self.run, name='metrics-flush', daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self.dirty:
+                self.flush()
+
+    def flush(self):
+        """Write this process's totals to its file, replacing the previous ones"""
+        if not self.path or os.getpid() != self.pid:
+            return
+        self.dirty = False
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, self.path)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """This process's Registry, started on first use and replaced after a fork"""
+    global _registry
+    if _registry is None or _registry.pid != os.getpid():
+        with _registry_lock:
+            if _registry is None or _registry.pid != os.getpid():
+                _registry = Registry(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+                _registry.start()
+    return _registry
+
+
+def merge(totals, snapshot):
+    for name, labels, value in snapshot:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = totals.get(key)
+        if current is None:
+            totals[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            totals[key] = [a + b for a, b in zip(current, value)]
+        else:
+            totals[key] = current + value
+
+
+def load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):  # Gone, or left half-written by a killed process
+        return []
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def fold_exited(directory):
+    """Add the files of processes that are gone to the archive and delete them"""
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, ARCHIVE)
+        exited = [
+            path for path in glob.glob(os.path.join(directory, '*-*.json'))
+            if not is_running(int(os.path.basename(path).split('-')[0]))
+        ]
+        if not exited:
+            return
+        totals = {}
+        merge(totals, load(archive_path))
+        for path in exited:
+            merge(totals, load(path))
+        temporary = f'{archive_path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump([[name, [list(pair) for pair in labels], value] for (name, labels), value in totals.items()], f)
+        os.replace(temporary, archive_path)
+        for path in exited:
+            os.remove(path)
+
+
+def collect():
+    """``{(name, labels): value}`` summed over every process (see the module docstring)"""
+    registry = get_registry()
+    totals = {}
+    if registry.directory:
+        fold_exited(registry.directory)
+        for path in glob.glob(os.path.join(registry.directory, '*.json')):
+            if path != registry.path:
+                merge(totals, load(path))
+    merge(totals, registry.snapshot())
+    return totals
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(totals):
+    """The Prometheus text exposition of ``totals``"""
+    by_name = defaultdict(list)
+    for (name, labels), value in totals.items():
+        by_name[name].append((labels, value))
+    lines = []
+    for name in sorted(by_name):
+        kind, description, buckets = METRICS.get(name, ('untyped', '', None))
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name[name]):
+            if kind != 'histogram':
+                lines.append(f'{name}{format_labels(labels)} {format_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, float('inf')), value):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{format_labels(labels, [('le', format_number(bound))])} {cumulative}"
+                )
+            lines.append(f'{name}_sum{format_labels(labels)} {format_number(value[-1])}')
+            lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def record_query(execute, sql, params, many, context):
+    stats = request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+def record_zoom_call(endpoint, status_code, seconds):
+    """Count one HTTP call to Zoom; ``status_code`` is None when no response came back"""
+    registry = get_registry()
+    registry.inc('zoom_api_calls_total', (('endpoint', endpoint), ('status', status_code or 'error')))
+    registry.observe('zoom_api_duration_seconds', (('endpoint', endpoint),), seconds)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.zoom_calls += 1
+        stats.zoom_seconds += seconds
+
+
+def record_request(request, response, seconds, stats):
+    match = request.resolver_match
+    route = match.route if match is not None else 'unmatched'
+    registry = get_registry()
+    registry.inc('http_requests_total', (('route', route), ('method', request.method),
+                                         ('status', response.status_code)))
+    registry.observe('http_request_duration_seconds', (('route', route), ('method', request.method)), seconds)
+    labels = (('route', route),)
+    registry.observe('http_request_db_queries', labels, stats.queries)
+    if stats.db_seconds:
+        registry.inc('http_request_db_seconds_total', labels, stats.db_seconds)
+    if stats.zoom_calls:
+        registry.inc('http_request_zoom_calls_total', labels, stats.zoom_calls)
+        registry.inc('http_request_zoom_seconds_total', labels, stats.zoom_seconds)
+    if not response.streaming:
+        registry.observe('http_response_size_bytes', labels, len(response.content))
+    elif response.has_header('Content-Length'):
+        registry.observe('http_response_size_bytes', labels, int(response['Content-Length']))
+
+
+class MetricsMiddleware:
+    """Records every request's latency, queries, Zoom calls and response size; first in MIDDLEWARE"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        record_request(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        record_request(request, response, time.perf_counter() - started, stats)
+        return response
+
+
+def metrics_view(request):
+    """All processes' metrics for Prometheus to scrape
+
+    With METRICS_TOKEN set, the scraper must send it as a bearer token;
+    otherwise only loopback and private network addresses are answered.
+    """
+    if settings.METRICS_TOKEN:
+        if request.headers.get('Authorization') != f'Bearer {settings.METRICS_TOKEN}':
+            return HttpResponse(status=401)
+    else:
+        try:
+            address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return HttpResponse(status=403)
+        if not (address.is_loopback or address.is_private):
+            return HttpResponse(status=403)
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0003_mentor_meeting_mentor_student_meeting_students'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recording',
+            index=models.Index(fields=['-created_at', '-id'], name='recording_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recording',
+            index=models.Index(fields=['meeting', '-created_at', '-id'], name='recording_meeting_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recording',
+            index=models.Index(fields=['recording_type', '-created_at', '-id'], name='recording_type_created_idx'),
+        ),
+    ]
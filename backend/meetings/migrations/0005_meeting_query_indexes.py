@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-16 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0004_recording_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['mentor', 'start_time', 'id'], name='meeting_mentor_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(condition=models.Q(('is_active', True), ('reminder_sent', False)), fields=['start_time'], name='meeting_reminder_due_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-17 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0008_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='zoom_file_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='dedup_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='recording',
+            constraint=models.UniqueConstraint(fields=('meeting', 'zoom_file_id'), name='recording_meeting_file_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0009_webhook_idempotency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoomSyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_id', models.CharField(max_length=255, unique=True)),
+                ('meetings_from', models.DateField(blank=True, null=True)),
+                ('recordings_from', models.DateField(blank=True, null=True)),
+                ('last_started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('stats', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
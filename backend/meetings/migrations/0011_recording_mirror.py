@@ -0,0 +1,63 @@
+# Generated by Django 5.1.7 on 2026-10-17 11:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0010_zoomsynccheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='mirror_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='mirror_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='mirror_next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='mirror_state',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='mirror_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('mirrored', 'Mirrored'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='mirrored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='s3_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='s3_checksum',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='s3_key',
+            field=models.CharField(blank=True, max_length=512),
+        ),
+        migrations.AddIndex(
+            model_name='recording',
+            index=models.Index(condition=models.Q(('mirror_status', 'pending')), fields=['mirror_next_attempt_at'], name='recording_mirror_due_idx'),
+        ),
+    ]
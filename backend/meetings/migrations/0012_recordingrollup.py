@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-17 14:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0011_recording_mirror'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('mentor', 'Mentor'), ('meeting', 'Meeting'), ('day', 'Day')], max_length=10)),
+                ('day', models.DateField(blank=True, null=True)),
+                ('recording_count', models.IntegerField(default=0)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('total_duration', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('meeting', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recording_rollups', to='meetings.meeting')),
+                ('mentor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recording_rollups', to='meetings.mentor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('scope', 'mentor')), fields=('mentor',), name='rollup_mentor_uniq'), models.UniqueConstraint(condition=models.Q(('scope', 'meeting')), fields=('meeting',), name='rollup_meeting_uniq'), models.UniqueConstraint(condition=models.Q(('scope', 'day')), fields=('mentor', 'day'), name='rollup_mentor_day_uniq')],
+            },
+        ),
+    ]
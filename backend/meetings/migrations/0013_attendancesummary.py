@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-17 16:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0012_recordingrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_joined_at', models.DateTimeField()),
+                ('last_left_at', models.DateTimeField()),
+                ('attended_seconds', models.IntegerField()),
+                ('sessions', models.IntegerField()),
+                ('late_seconds', models.IntegerField()),
+                ('left_early_seconds', models.IntegerField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='attendance_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(condition=models.Q(('attendance_computed_at__isnull', True)), fields=['start_time'], name='meeting_attendance_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='meeting',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='meetings.meeting'),
+        ),
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='attendancesummary',
+            index=models.Index(fields=['user', 'meeting'], name='attendance_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancesummary',
+            constraint=models.UniqueConstraint(fields=('meeting', 'user'), name='attendance_meeting_user_uniq'),
+        ),
+    ]
@@ -0,0 +1,371 @@
+"""Mirroring Zoom cloud recordings into S3.
+
+Zoom's download URLs expire, so every Recording is copied to
+``AWS_STORAGE_BUCKET_NAME`` by the mirror_recordings worker. A file is
+streamed from Zoom and cut into fixed-size parts of a multipart upload as
+it arrives; up to ``concurrency`` parts upload in parallel while the next
+one is read, so memory stays around ``(concurrency + 1) * part_size``
+however large the recording is.
+
+Each part is sent with its SHA-256, which S3 checks, and the parts S3
+acknowledged are saved in ``Recording.mirror_state`` as they complete.
+After a crash the next attempt reuses the open upload and asks Zoom for
+the file from the end of the parts already uploaded. The object's
+checksum is S3's composite SHA-256 (the hash of the part hashes), checked
+against S3 once the upload completes.
+"""
+import base64
+import hashlib
+import logging
+import math
+import random
+import re
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Recording
+from .zoom import ZoomAPIError, ZoomClient
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# S3 limits: parts of at least 5 MB except the last, and at most 10,000 of them
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+CHUNK_SIZE = MB
+CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+
+
+def get_part_size():
+    return max(getattr(settings, 'RECORDING_MIRROR_PART_SIZE', 16 * MB), MIN_PART_SIZE)
+
+
+def get_concurrency():
+    return getattr(settings, 'RECORDING_MIRROR_CONCURRENCY', 4)
+
+
+def get_bucket():
+    return settings.AWS_STORAGE_BUCKET_NAME
+
+
+def get_s3_client(max_connections=None):
+    """boto3 S3 client from the AWS_* settings; AWS_S3_ENDPOINT_URL points it at MinIO or moto"""
+    return boto3.client(
+        's3',
+        region_name=settings.AWS_S3_REGION_NAME,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        endpoint_url=getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
+        config=Config(max_pool_connections=max_connections or get_concurrency() + 2,
+                      retries={'max_attempts': 5, 'mode': 'standard'})
+    )
+
+
+def get_key(recording):
+    prefix = getattr(settings, 'RECORDING_MIRROR_PREFIX', 'recordings/')
+    meeting = recording.meeting
+    return (f'{prefix}{meeting.mentor.zoom_account_id}/{meeting.meeting_id}/'
+            f'{recording.zoom_file_id or recording.id}-{recording.recording_type}')
+
+
+def composite_checksum(digests):
+    """S3's checksum of a multipart object: SHA-256 of the concatenated part digests, then the part count"""
+    combined = hashlib.sha256(b''.join(digests)).digest()
+    return f'{base64.b64encode(combined).decode()}-{len(digests)}'
+
+
+def iter_parts(chunks, part_size, skip=0):
+    """Regroup a stream of byte chunks into ``part_size`` parts, dropping the first ``skip`` bytes"""
+    buffered, size = [], 0
+    for chunk in chunks:
+        if skip:
+            dropped = min(skip, len(chunk))
+            chunk, skip = chunk[dropped:], skip - dropped
+        buffered.append(chunk)
+        size += len(chunk)
+        while size >= part_size:
+            data = b''.join(buffered)
+            yield data[:part_size]
+            rest = data[part_size:]
+            buffered, size = [rest], len(rest)
+    if size:
+        yield b''.join(buffered)
+
+
+class MirrorFailed(Exception):
+    """The file cannot be mirrored and retrying will not help"""
+
+
+class RecordingMirror:
+    """Streams one recording from Zoom into a resumable S3 multipart upload.
+
+    ``on_part`` is called with the part number after each part is saved,
+    which the benchmark uses to simulate a crash part-way.
+    """
+
+    def __init__(self, recording, s3=None, bucket=None, zoom=None, part_size=None, concurrency=None,
+                 lease=None, on_part=None):
+        self.recording = recording
+        self.concurrency = concurrency or get_concurrency()
+        self.s3 = s3 or get_s3_client(self.concurrency + 2)
+        self.bucket = bucket or get_bucket()
+        self.zoom = zoom or ZoomClient.for_mentor(recording.meeting.mentor)
+        self.part_size = part_size or get_part_size()
+        self.lease = lease
+        self.on_part = on_part
+
+    def run(self):
+        """Mirror the file and record its key, checksum and size; returns the bytes copied"""
+        recording = self.recording
+        state = recording.mirror_state or {}
+        if not state.get('upload_id'):
+            state = self.start_upload()
+        parts = {int(number): part for number, part in state.get('parts', {}).items()}
+        part_size = state['part_size']
+
+        # Resume after the parts uploaded without a gap; later ones are sent again
+        done = 0
+        while done + 1 in parts:
+            done += 1
+        for number in [number for number in parts if number > done]:
+            del parts[number]
+
+        try:
+            total = self.copy(state, parts, done, part_size)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'NoSuchUpload':
+                # Aborted behind our back (bucket lifecycle rule, or a manual abort): start over next attempt
+                recording.mirror_state = {}
+                recording.save(update_fields=['mirror_state'])
+            raise
+
+        digests = [base64.b64decode(parts[number]['sha256']) for number in sorted(parts)]
+        checksum = composite_checksum(digests)
+        result = self.s3.complete_multipart_upload(
+            Bucket=self.bucket, Key=recording.s3_key, UploadId=state['upload_id'],
+            MultipartUpload={'Parts': [
+                {'PartNumber': number, 'ETag': parts[number]['etag'], 'ChecksumSHA256': parts[number]['sha256']}
+                for number in sorted(parts)
+            ]}
+        )
+        stored = result.get('ChecksumSHA256') or self.s3.head_object(
+            Bucket=self.bucket, Key=recording.s3_key, ChecksumMode='ENABLED'
+        ).get('ChecksumSHA256')
+        # Some S3 implementations leave the "-<parts>" suffix off
+        if stored and stored.split('-')[0] != checksum.split('-')[0]:
+            self.s3.delete_object(Bucket=self.bucket, Key=recording.s3_key)
+            raise MirrorFailed(f'S3 checksum {stored} does not match the uploaded parts ({checksum})')
+
+        recording.s3_checksum = checksum
+        recording.s3_bytes = total
+        recording.mirror_status = 'mirrored'
+        recording.mirror_state = {}
+        recording.mirror_error = ''
+        recording.mirrored_at = timezone.now()
+        recording.save(update_fields=['s3_checksum', 's3_bytes', 'mirror_status', 'mirror_state',
+                                      'mirror_error', 'mirrored_at'])
+        return total
+
+    def start_upload(self):
+        recording = self.recording
+        part_size = self.part_size
+        if recording.file_size:
+            part_size = max(part_size, math.ceil(recording.file_size / MAX_PARTS / MB) * MB)
+        recording.s3_key = recording.s3_key or get_key(recording)
+        upload = self.s3.create_multipart_upload(
+            Bucket=self.bucket, Key=recording.s3_key, ChecksumAlgorithm='SHA256',
+            Metadata={'zoom-file-id': recording.zoom_file_id or '', 'meeting-id': recording.meeting.meeting_id}
+        )
+        state = {'upload_id': upload['UploadId'], 'part_size': part_size, 'parts': {}}
+        recording.mirror_state = state
+        recording.save(update_fields=['s3_key', 'mirror_state'])
+        return state
+
+    def copy(self, state, parts, done, part_size):
+        """Upload the file from part ``done + 1`` on; returns the size of the whole file"""
+        offset = done * part_size
+        uploaded = sum(parts[number]['size'] for number in range(1, done + 1))
+        try:
+            response = self.zoom.download(self.recording.recording_url, start=offset)
+        except ZoomAPIError as e:
+            if offset and e.status_code == 416:
+                # The last attempt stopped after its final part but before completing the upload
+                return uploaded
+            raise
+        try:
+            total = self.get_total(response, offset)
+            # Without Range support Zoom sends the whole file, so skip what S3 already has
+            skip = offset if response.status_code == 200 else 0
+            if total and math.ceil(total / part_size) > MAX_PARTS:
+                raise MirrorFailed(f'{total} bytes do not fit {MAX_PARTS} parts of {part_size}')
+
+            number, size = done, uploaded
+            pending = {}
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='mirror-part') as pool:
+                try:
+                    for data in iter_parts(response.iter_content(CHUNK_SIZE), part_size, skip):
+                        if len(pending) >= self.concurrency:
+                            self.collect(pending, parts, state, FIRST_COMPLETED)
+                        number += 1
+                        size += len(data)
+                        pending[pool.submit(self.upload_part, state, number, data)] = number
+                    self.collect(pending, parts, state)
+                except BaseException:
+                    # Keep whatever finished, so the next attempt does not send it again
+                    self.collect(pending, parts, state, raise_errors=False)
+                    raise
+        finally:
+            response.close()
+
+        if total and size != total:
+            raise ZoomAPIError(502, f'Download ended after {size} of {total} bytes')
+        return size
+
+    def get_total(self, response, offset):
+        match = CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+        if response.status_code == 206 and match:
+            if int(match.group(1)) != offset:
+                raise ZoomAPIError(502, f"Asked for bytes from {offset}, got {response.headers['Content-Range']}")
+            return int(match.group(3))
+        length = response.headers.get('Content-Length')
+        return int(length) if length else self.recording.file_size
+
+    def upload_part(self, state, number, data):
+        digest = base64.b64encode(hashlib.sha256(data).digest()).decode()
+        result = self.s3.upload_part(
+            Bucket=self.bucket, Key=self.recording.s3_key, UploadId=state['upload_id'],
+            PartNumber=number, Body=data, ChecksumSHA256=digest
+        )
+        return {'etag': result['ETag'], 'sha256': digest, 'size': len(data)}
+
+    def collect(self, pending, parts, state, return_when=ALL_COMPLETED, raise_errors=True):
+        """Wait for part uploads, then save the finished ones to mirror_state"""
+        finished, _ = wait(list(pending), return_when=return_when)
+        if not finished:
+            return
+        error, uploaded = None, []
+        for future in finished:
+            number = pending.pop(future)
+            if future.exception() is None:
+                parts[number] = future.result()
+                uploaded.append(number)
+            else:
+                error = error or future.exception()
+
+        self.recording.mirror_state = {**state, 'parts': {str(number): part for number, part in parts.items()}}
+        fields = ['mirror_state']
+        if self.lease:
+            # Still working: keep other workers from claiming the recording
+            self.recording.mirror_next_attempt_at = timezone.now() + timedelta(seconds=self.lease)
+            fields.append('mirror_next_attempt_at')
+        self.recording.save(update_fields=fields)
+        if self.on_part:
+            for number in sorted(uploaded):
+                self.on_part(number)
+        if error and raise_errors:
+            raise error
+
+
+def abort_upload(recording, s3=None, bucket=None):
+    """Abort a recording's open multipart upload, so its parts stop taking space"""
+    upload_id = (recording.mirror_state or {}).get('upload_id')
+    if not upload_id:
+        return
+    try:
+        (s3 or get_s3_client()).abort_multipart_upload(
+            Bucket=bucket or get_bucket(), Key=recording.s3_key, UploadId=upload_id
+        )
+    except (BotoCoreError, ClientError) as e:
+        logger.error(f"Error aborting S3 upload for recording {recording.id}: {str(e)}")
+
+
+def delete_mirror(recording, s3=None, bucket=None):
+    """Best-effort removal of a recording's S3 copy, or of its unfinished upload"""
+    if not recording.s3_key:
+        return
+    if recording.mirror_status == 'mirrored':
+        try:
+            (s3 or get_s3_client()).delete_object(Bucket=bucket or get_bucket(), Key=recording.s3_key)
+        except (BotoCoreError, ClientError) as e:
+            logger.error(f"Error deleting S3 copy of recording {recording.id}: {str(e)}")
+    else:
+        abort_upload(recording, s3, bucket)
+
+
+def get_backoff(attempts):
+    """Seconds before retry number ``attempts``, doubling each time with some jitter"""
+    base = getattr(settings, 'RECORDING_MIRROR_RETRY_BACKOFF', 60)
+    delay = min(base * 2 ** max(attempts - 1, 0), 6 * 60 * 60)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class MirrorWorker:
+    """Claims due recordings one at a time and mirrors them.
+
+    Claiming works like the email outbox: ``mirror_next_attempt_at`` moves
+    ``lease`` seconds ahead under SELECT ... FOR UPDATE SKIP LOCKED, and
+    the mirror keeps pushing it forward while parts complete, so a crashed
+    worker's recording comes due again (and resumes) once it goes quiet.
+    """
+
+    def __init__(self, s3=None, bucket=None, lease=600, max_attempts=None, **mirror_options):
+        self.s3 = s3
+        self.bucket = bucket or get_bucket()
+        self.lease = lease
+        self.max_attempts = max_attempts or getattr(settings, 'RECORDING_MIRROR_MAX_ATTEMPTS', 8)
+        self.mirror_options = mirror_options
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            recording = (
+                Recording.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('meeting__mentor')
+                .filter(mirror_status='pending', mirror_next_attempt_at__lte=now)
+                .order_by('mirror_next_attempt_at')
+                .first()
+            )
+            if recording:
+                recording.mirror_next_attempt_at = now + timedelta(seconds=self.lease)
+                recording.save(update_fields=['mirror_next_attempt_at'])
+        return recording
+
+    def process_one(self):
+        """Mirror one due recording; returns it, or None when nothing is due"""
+        recording = self.claim()
+        if recording is None:
+            return None
+        try:
+            if self.s3 is None:
+                self.s3 = get_s3_client(self.mirror_options.get('concurrency'))
+            size = RecordingMirror(
+                recording, s3=self.s3, bucket=self.bucket, lease=self.lease, **self.mirror_options
+            ).run()
+            logger.info(f"Mirrored recording {recording.id} ({size} bytes) to {recording.s3_key}")
+        except Exception as e:
+            recording.mirror_attempts += 1
+            recording.mirror_error = str(e)
+            permanent = isinstance(e, MirrorFailed) or (
+                isinstance(e, ZoomAPIError) and e.status_code in (403, 404, 410)
+            )
+            if permanent or recording.mirror_attempts >= self.max_attempts:
+                recording.mirror_status = 'failed'
+                logger.error(f"Giving up mirroring recording {recording.id} after "
+                             f"{recording.mirror_attempts} attempts: {str(e)}")
+                delete_mirror(recording, self.s3, self.bucket)
+                recording.mirror_state = {}
+            else:
+                retry_after = getattr(e, 'retry_after', 0) or 0
+                recording.mirror_next_attempt_at = timezone.now() + timedelta(
+                    seconds=max(get_backoff(recording.mirror_attempts), retry_after)
+                )
+            recording.save(update_fields=['mirror_attempts', 'mirror_error', 'mirror_status', 'mirror_state',
+                                          'mirror_next_attempt_at'])
+        return recording
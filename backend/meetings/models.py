@@ -62,7 +62,28 @@ class Meeting(models.Model):
     # Meeting status
     is_active = models.BooleanField(default=True)
     reminder_sent = models.BooleanField(default=False)
+
+    # Last time meetings.attendance summarized the participant events of this meeting
+    attendance_computed_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            # list_meetings: a mentor's meetings paged on (start_time, id)
+            models.Index(fields=['mentor', 'start_time', 'id'], name='meeting_mentor_start_idx'),
+            # Reminder scan only ever looks at active meetings still awaiting a reminder
+            models.Index(
+                fields=['start_time'],
+                name='meeting_reminder_due_idx',
+                condition=models.Q(reminder_sent=False, is_active=True),
+            ),
+            # refresh_attendance looks for started meetings it has not summarized yet
+            models.Index(
+                fields=['start_time'],
+                name='meeting_attendance_due_idx',
+                condition=models.Q(attendance_computed_at__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.topic} - {self.start_time}"
     
@@ -94,6 +115,96 @@ class Meeting(models.Model):
         reminder_time = self.start_time - timezone.timedelta(minutes=5)
         return now >= reminder_time and now < self.start_time
 
+class ReminderSchedule(models.Model):
+    """One pending or sent reminder for a meeting, ``offset_minutes`` before it starts"""
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='reminders')
+    offset_minutes = models.PositiveIntegerField()
+    fire_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['meeting', 'offset_minutes']
+        indexes = [
+            # The scheduler only reads reminders that have not been sent yet
+            models.Index(fields=['fire_at'], name='reminder_pending_fire_idx', condition=models.Q(sent_at__isnull=True)),
+            models.Index(fields=['created_at'], name='reminder_pending_created_idx', condition=models.Q(sent_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.meeting.topic} - {self.offset_minutes} min reminder"
+
+class EmailOutbox(models.Model):
+    """An outgoing email, sent in the background by the process_email_outbox worker"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    to_email = models.EmailField()
+    provider = models.CharField(max_length=255)  # Recipient mail domain, rate limited separately
+    subject = models.CharField(max_length=512)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers only ever claim pending emails whose next attempt is due
+            models.Index(fields=['next_attempt_at'], name='outbox_pending_due_idx', condition=models.Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} - {self.subject} - {self.status}"
+
+class WebhookEvent(models.Model):
+    """A raw Zoom webhook delivery, acknowledged on receipt and handled by process_webhook_events"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    )
+
+    event = models.CharField(max_length=100)
+    # event:object:event_ts, identical on every redelivery of the same event
+    dedup_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    payload = models.TextField()  # Request body exactly as signed by Zoom
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The processor only claims pending events whose next attempt is due
+            models.Index(fields=['next_attempt_at'], name='webhook_pending_due_idx', condition=models.Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.event} - {self.received_at} - {self.status}"
+
+class ZoomSyncCheckpoint(models.Model):
+    """How far sync_zoom has reconciled one Zoom account; the next run starts from here"""
+    account_id = models.CharField(max_length=255, unique=True)
+    # Meetings starting before this date and recordings before this date are settled
+    meetings_from = models.DateField(null=True, blank=True)
+    recordings_from = models.DateField(null=True, blank=True)
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    stats = models.JSONField(default=dict)  # Counts from the last successful run
+
+    def __str__(self):
+        return f"{self.account_id} - {self.last_finished_at}"
+
 class Recording(models.Model):
     RECORDING_TYPES = (
         ('audio', 'Audio Only'),
@@ -103,14 +214,105 @@ class Recording(models.Model):
     )
     
     meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='recordings')
+    zoom_file_id = models.CharField(max_length=255, null=True, blank=True)  # recording_files[].id from Zoom
     recording_url = models.URLField()  # Zoom recording URL
     recording_type = models.CharField(max_length=20, choices=RECORDING_TYPES)
     file_size = models.BigIntegerField(null=True, blank=True)  # Size in bytes
     duration = models.IntegerField(null=True, blank=True)  # Duration in seconds
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Copy in S3 made by the mirror_recordings worker, since Zoom's download URLs expire
+    MIRROR_STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('mirrored', 'Mirrored'),
+        ('failed', 'Failed'),
+    )
+    s3_key = models.CharField(max_length=512, blank=True)
+    s3_checksum = models.CharField(max_length=64, blank=True)  # S3 composite SHA-256 of the parts, "<base64>-<parts>"
+    s3_bytes = models.BigIntegerField(null=True, blank=True)
+    mirror_status = models.CharField(max_length=20, choices=MIRROR_STATUS_CHOICES, default='pending')
+    # Open multipart upload: upload_id, part_size and the parts S3 acknowledged, to resume after a crash
+    mirror_state = models.JSONField(default=dict, blank=True)
+    mirror_attempts = models.PositiveIntegerField(default=0)
+    mirror_next_attempt_at = models.DateTimeField(default=timezone.now)
+    mirror_error = models.TextField(blank=True)
+    mirrored_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"{self.meeting.topic} - {self.recording_type} - {self.created_at}"
 
     class Meta:
-        ordering = ['-created_at'] 
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of list_recordings, with and without its filters
+            models.Index(fields=['-created_at', '-id'], name='recording_created_idx'),
+            models.Index(fields=['meeting', '-created_at', '-id'], name='recording_meeting_created_idx'),
+            models.Index(fields=['recording_type', '-created_at', '-id'], name='recording_type_created_idx'),
+            # The mirror worker only claims pending recordings whose next attempt is due
+            models.Index(fields=['mirror_next_attempt_at'], name='recording_mirror_due_idx',
+                         condition=models.Q(mirror_status='pending')),
+        ]
+        constraints = [
+            # A redelivered recording.completed webhook must not duplicate files
+            models.UniqueConstraint(fields=['meeting', 'zoom_file_id'], name='recording_meeting_file_uniq'),
+        ]
+
+
+class RecordingRollup(models.Model):
+    """Running totals of a mentor's recordings, kept by meetings.rollups as recordings come and go.
+
+    ``scope`` says which total a row holds: the mentor's overall one, one
+    meeting's (``meeting`` set) or one day's (``day`` set).
+    """
+    SCOPE_CHOICES = (
+        ('mentor', 'Mentor'),
+        ('meeting', 'Meeting'),
+        ('day', 'Day'),
+    )
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    mentor = models.ForeignKey(Mentor, on_delete=models.CASCADE, related_name='recording_rollups')
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='recording_rollups')
+    day = models.DateField(null=True, blank=True)  # Day the recordings were stored, in TIME_ZONE
+    recording_count = models.IntegerField(default=0)
+    total_bytes = models.BigIntegerField(default=0)
+    total_duration = models.BigIntegerField(default=0)  # Seconds
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mentor'], condition=models.Q(scope='mentor'),
+                                    name='rollup_mentor_uniq'),
+            models.UniqueConstraint(fields=['meeting'], condition=models.Q(scope='meeting'),
+                                    name='rollup_meeting_uniq'),
+            models.UniqueConstraint(fields=['mentor', 'day'], condition=models.Q(scope='day'),
+                                    name='rollup_mentor_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.mentor_id} - {self.scope} - {self.total_bytes} bytes"
+
+class AttendanceSummary(models.Model):
+    """How one user attended one meeting, computed by meetings.attendance from the participant events"""
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='attendance')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance')
+    first_joined_at = models.DateTimeField()
+    last_left_at = models.DateTimeField()
+    attended_seconds = models.IntegerField()  # Overlapping sessions (two devices, rejoins) counted once
+    sessions = models.IntegerField()  # Separate stretches of attendance after merging overlaps
+    late_seconds = models.IntegerField()  # From the scheduled start to the first join, 0 if on time
+    left_early_seconds = models.IntegerField()  # From the last leave to the scheduled end, 0 if stayed
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['meeting', 'user'], name='attendance_meeting_user_uniq'),
+        ]
+        indexes = [
+            # Per-student report: one user's attendance across meetings
+            models.Index(fields=['user', 'meeting'], name='attendance_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} at {self.meeting_id}: {self.attended_seconds}s"
@@ -0,0 +1,187 @@
+"""Durable outgoing email.
+
+Callers enqueue EmailOutbox rows, one insert for a whole cohort, and return
+straight away. The process_email_outbox worker claims due rows in batches,
+sends each batch over a single SMTP connection, throttles per recipient
+domain and retries failures with exponential backoff.
+"""
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def get_provider(email):
+    """The part of the address that mail providers throttle on: its domain"""
+    return email.rpartition('@')[2].lower()
+
+
+def make_email(to_email, subject, body, html_body=''):
+    """Build an unsaved EmailOutbox row; pass a list of them to ``enqueue``"""
+    return EmailOutbox(
+        to_email=to_email,
+        provider=get_provider(to_email),
+        subject=subject[:512],
+        body=body,
+        html_body=html_body
+    )
+
+
+def enqueue(emails):
+    """Queue ``emails`` for the worker with a single insert.
+
+    Rows without a recipient address are dropped.
+    """
+    emails = [email for email in emails if email.to_email]
+    return EmailOutbox.objects.bulk_create(emails)
+
+
+def get_backoff(attempts):
+    """Seconds to wait before retry number ``attempts``, doubling each time with some jitter"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BACKOFF', 30)
+    delay = min(base * 2 ** max(attempts - 1, 0), 6 * 60 * 60)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class ProviderRateLimiter:
+    """Token bucket per mail provider, shared by the threads of one worker process.
+
+    ``rates`` maps a provider (recipient domain) to messages per second;
+    the ``'default'`` entry applies to every other provider. Each bucket
+    holds up to one second's worth of tokens.
+    """
+
+    def __init__(self, rates=None):
+        self.rates = rates or getattr(settings, 'EMAIL_OUTBOX_RATE_LIMITS', {'default': 10})
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def get_rate(self, provider):
+        return self.rates.get(provider, self.rates.get('default', 10))
+
+    def acquire(self, provider):
+        """Take a token, returning 0; or return the seconds until one is available"""
+        rate = self.get_rate(provider)
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(provider, (max(rate, 1), now))
+            tokens = min(tokens + (now - updated) * rate, max(rate, 1))
+            if tokens >= 1:
+                self.buckets[provider] = (tokens - 1, now)
+                return 0
+            self.buckets[provider] = (tokens, now)
+            return (1 - tokens) / rate
+
+
+class OutboxWorker:
+    """Claims and sends one batch of due emails per ``process_batch`` call.
+
+    Claiming moves ``next_attempt_at`` forward by ``lease`` seconds under
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never send the
+    same row, and rows held by a crashed worker come due again once the
+    lease runs out.
+    """
+
+    def __init__(self, batch_size=100, lease=300, max_attempts=None, limiter=None):
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts or getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 8)
+        self.limiter = limiter or ProviderRateLimiter()
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at')[:self.batch_size]
+            )
+            if emails:
+                EmailOutbox.objects.filter(id__in=[email.id for email in emails]).update(
+                    next_attempt_at=now + timedelta(seconds=self.lease)
+                )
+        return emails
+
+    def process_batch(self):
+        """Send one batch and return how many emails were claimed"""
+        emails = self.claim()
+        if not emails:
+            return 0
+
+        ready, deferred = [], []
+        for email in emails:
+            wait = self.limiter.acquire(email.provider)
+            if wait:
+                email.next_attempt_at = timezone.now() + timedelta(seconds=wait)
+                deferred.append(email)
+            else:
+                ready.append(email)
+        if deferred:
+            # Over the provider's rate: release without counting an attempt
+            EmailOutbox.objects.bulk_update(deferred, ['next_attempt_at'])
+
+        sent, failed = self.send(ready)
+        now = timezone.now()
+        if sent:
+            EmailOutbox.objects.filter(id__in=[email.id for email in sent]).update(
+                status='sent', sent_at=now, last_error=''
+            )
+        for email, error in failed:
+            email.attempts += 1
+            email.last_error = str(error)
+            if email.attempts >= self.max_attempts:
+                email.status = 'failed'
+                logger.error(f"Giving up on email {email.id} to {email.to_email} after {email.attempts} attempts: {error}")
+            else:
+                email.next_attempt_at = now + timedelta(seconds=get_backoff(email.attempts))
+        if failed:
+            EmailOutbox.objects.bulk_update(
+                [email for email, _ in failed], ['attempts', 'last_error', 'status', 'next_attempt_at']
+            )
+        return len(emails)
+
+    def send(self, emails):
+        """Send ``emails`` over one connection; return (sent, [(email, error), ...])"""
+        sent, failed = [], []
+        if not emails:
+            return sent, failed
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"Could not connect to the mail server: {str(e)}")
+            return sent, [(email, e) for email in emails]
+
+        try:
+            for email in emails:
+                message = EmailMultiAlternatives(
+                    email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to_email],
+                    connection=connection
+                )
+                if email.html_body:
+                    message.attach_alternative(email.html_body, 'text/html')
+                try:
+                    message.send()
+                    sent.append(email)
+                except Exception as e:
+                    failed.append((email, e))
+                    # The server may have dropped us; reconnect for the rest of the batch
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception:
+                        pass
+        finally:
+            connection.close()
+        return sent, failed
@@ -0,0 +1,198 @@
+"""Per-account rate limiting of outbound Zoom calls.
+
+Zoom limits every account to a number of requests per second (and some
+endpoints per day) and answers 429 beyond that. Rather than fail, callers
+wait for a free slot:
+
+* each account gets ZOOM_RATE_LIMIT_PER_SECOND slots per one-second window,
+  counted with an atomic ``cache.incr`` so all worker processes share them;
+* a 429, or ``X-RateLimit-Remaining: 0``, blocks the account in the cache
+  until ``Retry-After`` (seconds or a date) so nobody keeps hammering Zoom;
+* the last ``X-RateLimit-*`` values seen per account are kept in the cache
+  as remaining-quota gauges.
+
+A call that would have to wait longer than ZOOM_RATE_LIMIT_MAX_WAIT
+seconds raises ZoomRateLimited instead.
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait for a Retry-After header: delta-seconds, an HTTP date or ISO 8601"""
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return max(when.timestamp() - now, 0)
+
+
+class ZoomRateLimiter:
+    """Shared per-account request budget for the Zoom API"""
+
+    def __init__(self, cache_alias='default', rate=None, max_wait=None):
+        self.cache_alias = cache_alias
+        self.rate = rate
+        self.max_wait = max_wait
+        self._blocked = {}
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_rate(self):
+        return self.rate or getattr(settings, 'ZOOM_RATE_LIMIT_PER_SECOND', 20)
+
+    def get_max_wait(self):
+        if self.max_wait is not None:
+            return self.max_wait
+        return getattr(settings, 'ZOOM_RATE_LIMIT_MAX_WAIT', 10)
+
+    def key(self, account_id, name):
+        return f'zoom:ratelimit:{account_id}:{name}'
+
+    def deadline(self):
+        return time.monotonic() + self.get_max_wait()
+
+    def acquire(self, account_id, deadline=None):
+        """Block until a request slot for ``account_id`` is free"""
+        deadline = deadline or self.deadline()
+        while True:
+            wait = self.try_acquire(account_id)
+            if not wait:
+                return
+            self._check_deadline(account_id, wait, deadline)
+            time.sleep(wait)
+
+    async def aacquire(self, account_id, deadline=None):
+        """``acquire`` for the event loop; waiting never blocks other tasks"""
+        deadline = deadline or self.deadline()
+        while True:
+            wait = await self.atry_acquire(account_id)
+            if not wait:
+                return
+            self._check_deadline(account_id, wait, deadline)
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, account_id):
+        """Take a slot and return 0, or return the seconds to wait before trying again"""
+        now = time.time()
+        blocked_until = self._blocked_until(account_id, now) or self.cache.get(self.key(account_id, 'blocked'))
+        if blocked_until and blocked_until > now:
+            return blocked_until - now
+
+        window = int(now)
+        key = self.key(account_id, window)
+        self.cache.add(key, 0, 5)
+        if self.cache.incr(key) <= self.get_rate():
+            return 0
+        # Spread the waiters over the start of the next window
+        return window + 1 - now + random.uniform(0, 0.05)
+
+    async def atry_acquire(self, account_id):
+        now = time.time()
+        blocked_until = (self._blocked_until(account_id, now)
+                         or await self.cache.aget(self.key(account_id, 'blocked')))
+        if blocked_until and blocked_until > now:
+            return blocked_until - now
+
+        window = int(now)
+        key = self.key(account_id, window)
+        await self.cache.aadd(key, 0, 5)
+        if await self.cache.aincr(key) <= self.get_rate():
+            return 0
+        return window + 1 - now + random.uniform(0, 0.05)
+
+    def _blocked_until(self, account_id, now):
+        blocked_until = self._blocked.get(account_id)
+        return blocked_until if blocked_until and blocked_until > now else None
+
+    def _check_deadline(self, account_id, wait, deadline):
+        if time.monotonic() + wait > deadline:
+            from .zoom import ZoomRateLimited
+            raise ZoomRateLimited(account_id, wait)
+
+    def observe(self, account_id, status_code, headers):
+        """Record Zoom's rate limit headers; return seconds to back off after a 429, else None"""
+        now = time.time()
+        quota, retry_after = self._parse(account_id, status_code, headers, now)
+        if quota:
+            self.cache.set(self.key(account_id, 'quota'), quota, None)
+        if retry_after:
+            # Cache timeouts are whole seconds; the stored timestamp is exact
+            self.cache.set(self.key(account_id, 'blocked'), now + retry_after, int(retry_after) + 1)
+        return retry_after if status_code == 429 else None
+
+    async def aobserve(self, account_id, status_code, headers):
+        now = time.time()
+        quota, retry_after = self._parse(account_id, status_code, headers, now)
+        if quota:
+            await self.cache.aset(self.key(account_id, 'quota'), quota, None)
+        if retry_after:
+            await self.cache.aset(self.key(account_id, 'blocked'), now + retry_after, int(retry_after) + 1)
+        return retry_after if status_code == 429 else None
+
+    def _parse(self, account_id, status_code, headers, now):
+        """(quota gauge or None, seconds the account must pause or None)"""
+        quota = None
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None:
+            quota = {
+                'limit': headers.get('X-RateLimit-Limit'),
+                'remaining': remaining,
+                'category': headers.get('X-RateLimit-Category'),
+                'type': headers.get('X-RateLimit-Type'),
+                'updated_at': now,
+            }
+
+        retry_after = None
+        if status_code == 429:
+            retry_after = parse_retry_after(headers.get('Retry-After'), now)
+            if retry_after is None:
+                retry_after = 1.0
+            logger.warning(f"Zoom rate limited account {account_id}, backing off {retry_after:.1f}s")
+        elif remaining is not None and remaining.strip() == '0':
+            # Quota used up: pause until it resets instead of collecting a 429
+            retry_after = parse_retry_after(headers.get('Retry-After'), now) or (int(now) + 1 - now)
+
+        if retry_after:
+            self._blocked[account_id] = now + retry_after
+        return quota, retry_after
+
+    def quotas(self, account_ids):
+        """Last seen quota and block state per account, from the shared cache (one round trip)"""
+        keys = {}
+        for account_id in account_ids:
+            keys[self.key(account_id, 'quota')] = (account_id, 'quota')
+            keys[self.key(account_id, 'blocked')] = (account_id, 'blocked_until')
+        values = self.cache.get_many(list(keys))
+        now = time.time()
+        result = {account_id: {'quota': None, 'blocked_until': None} for account_id in account_ids}
+        for key, value in values.items():
+            account_id, name = keys[key]
+            if name == 'blocked_until' and value <= now:
+                continue
+            result[account_id][name] = value
+        return result
+
+
+rate_limiter = ZoomRateLimiter()
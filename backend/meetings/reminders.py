@@ -0,0 +1,292 @@
+"""Meeting reminders: the ReminderSchedule table and the scheduler that drains it.
+
+Every meeting gets one ReminderSchedule row per reminder offset (24h, 1h and
+5m before start by default). The scheduler keeps the reminders due within the
+next few minutes in an in-memory timing wheel, so firing them costs no
+polling queries; when a tick comes due it queues the whole batch in the
+email outbox with a fixed number of queries, whatever the number of meetings.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Meeting, ReminderSchedule
+from .outbox import enqueue, make_email
+
+logger = logging.getLogger(__name__)
+
+
+def get_default_offsets():
+    return getattr(settings, 'MEETING_REMINDER_OFFSETS', [24 * 60, 60, 5])
+
+
+def format_offset(minutes):
+    """'24 hours', '1 hour', '5 minutes', '2 hours 30 minutes'"""
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if minutes or not hours:
+        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    return ' '.join(parts)
+
+
+def minutes_until(start_time, now):
+    """Whole minutes from ``now`` to ``start_time``, to the nearest minute and at least one"""
+    return max(round((start_time - now).total_seconds() / 60), 1)
+
+
+def parse_reminder_offsets(value):
+    """Validate a ``reminder_offsets`` request value: None or a list of positive minutes"""
+    if value in (None, ''):
+        return None
+    if not isinstance(value, list):
+        raise ValueError('reminder_offsets must be a list of minutes')
+    try:
+        offsets = [int(offset) for offset in value]
+    except (TypeError, ValueError):
+        raise ValueError('reminder_offsets must be a list of minutes')
+    if any(offset <= 0 for offset in offsets):
+        raise ValueError('reminder_offsets must be positive')
+    return offsets or None
+
+
+def schedule_reminders(meetings, offsets=None):
+    """Create the reminder rows for ``meetings`` in one insert.
+
+    Offsets whose reminder time has already passed are skipped. Existing
+    rows for the same (meeting, offset) are left untouched.
+    """
+    offsets = sorted(set(offsets or get_default_offsets()), reverse=True)
+    now = timezone.now()
+    rows = [
+        ReminderSchedule(
+            meeting=meeting,
+            offset_minutes=offset,
+            fire_at=meeting.start_time - timedelta(minutes=offset)
+        )
+        for meeting in meetings
+        for offset in offsets
+        if meeting.start_time - timedelta(minutes=offset) > now
+    ]
+    ReminderSchedule.objects.bulk_create(rows, ignore_conflicts=True)
+    return rows
+
+
+def reschedule_reminders(meeting, offsets=None):
+    """Replace a meeting's unsent reminders, e.g. after its start time moved"""
+    pending = ReminderSchedule.objects.filter(meeting=meeting, sent_at__isnull=True)
+    if offsets is None:
+        offsets = list(pending.values_list('offset_minutes', flat=True)) or None
+    pending.delete()
+    Meeting.objects.filter(pk=meeting.pk).update(reminder_sent=False)
+    return schedule_reminders([meeting], offsets)
+
+
+class TimingWheel:
+    """Hashed timing wheel keyed by absolute tick.
+
+    ``add`` is O(1); ``advance`` only visits the slots that elapsed since the
+    previous call. Entries more than one revolution ahead simply stay in
+    their slot until their tick comes round.
+    """
+
+    def __init__(self, tick=1.0, slots=3600, now=None):
+        self.tick = tick
+        self.slots = slots
+        self.wheel = [[] for _ in range(slots)]
+        self.current = int((time.time() if now is None else now) // tick)
+        self.overdue = []
+        self.size = 0
+
+    def add(self, fire_at, item):
+        """Schedule ``item`` for the POSIX timestamp ``fire_at`` (past times fire on the next advance)"""
+        at = int(fire_at // self.tick)
+        if at <= self.current:
+            self.overdue.append(item)
+        else:
+            self.wheel[at % self.slots].append((at, item))
+        self.size += 1
+
+    def advance(self, now):
+        """Return every item due at or before ``now``"""
+        target = int(now // self.tick)
+        due, self.overdue = self.overdue, []
+        elapsed = min(target - self.current, self.slots)
+        for step in range(1, elapsed + 1):
+            index = (self.current + step) % self.slots
+            bucket = self.wheel[index]
+            if not bucket:
+                continue
+            ready = [item for at, item in bucket if at <= target]
+            if ready:
+                self.wheel[index] = [(at, item) for at, item in bucket if at > target]
+                due.extend(ready)
+        self.current = max(self.current, target)
+        self.size -= len(due)
+        return due
+
+    def next_due(self):
+        """Seconds until the next occupied tick, or None if the wheel is empty"""
+        if not self.size:
+            return None
+        if self.overdue:
+            return 0
+        for step in range(1, self.slots + 1):
+            bucket = self.wheel[(self.current + step) % self.slots]
+            if bucket:
+                return min(at for at, _ in bucket) * self.tick - time.time()
+        return None
+
+
+class ReminderScheduler:
+    """Loads pending reminders into a TimingWheel and sends them when due.
+
+    Every ``refresh`` seconds one indexed query picks up reminders due within
+    the next ``horizon`` seconds, plus any created since the last load (a
+    meeting scheduled five minutes out). Firing a batch re-reads the rows to
+    skip ones that were sent or rescheduled meanwhile, fetches every
+    recipient in one query, renders the templates once per reminder with
+    the time actually left before the meeting (a reminder fired late, say
+    after the scheduler was down, does not claim the full offset), queues
+    the emails in the outbox and marks the batch sent with bulk UPDATEs.
+    """
+
+    def __init__(self, horizon=None, refresh=None, tick=1.0, batch_size=1000, retry_delay=60):
+        self.horizon = horizon or getattr(settings, 'REMINDER_SCHEDULER_HORIZON', 600)
+        self.refresh = refresh or getattr(settings, 'REMINDER_SCHEDULER_REFRESH', 60)
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.wheel = TimingWheel(tick=tick, slots=int(self.horizon / tick) + 1)
+        self.loaded_until = None
+        self.last_loaded_at = None
+
+    def load(self, now=None):
+        """Add newly due reminders to the wheel and return how many were added"""
+        now = now or timezone.now()
+        until = now + timedelta(seconds=self.horizon)
+
+        window = Q(fire_at__lt=until)
+        if self.loaded_until is not None:
+            window &= Q(fire_at__gte=self.loaded_until) | Q(created_at__gte=self.last_loaded_at)
+        pending = ReminderSchedule.objects.filter(
+            window,
+            sent_at__isnull=True,
+            meeting__is_active=True,
+            meeting__start_time__gt=now
+        ).values_list('id', 'fire_at')
+
+        count = 0
+        for reminder_id, fire_at in pending.iterator(chunk_size=self.batch_size):
+            self.wheel.add(fire_at.timestamp(), reminder_id)
+            count += 1
+        self.loaded_until = until
+        self.last_loaded_at = now
+        return count
+
+    def fire_due(self, now=None):
+        """Send every reminder whose time has come and return how many were sent"""
+        due = self.wheel.advance(time.time() if now is None else now.timestamp())
+        sent = 0
+        for start in range(0, len(due), self.batch_size):
+            sent += self.send_batch(due[start:start + self.batch_size])
+        return sent
+
+    def send_batch(self, reminder_ids):
+        now = timezone.now()
+        reminders = list(
+            ReminderSchedule.objects.filter(
+                id__in=reminder_ids,
+                sent_at__isnull=True,
+                meeting__is_active=True,
+                meeting__start_time__gt=now
+            ).select_related('meeting')
+        )
+        if not reminders:
+            return 0
+
+        meeting_ids = {reminder.meeting_id for reminder in reminders}
+        recipients = defaultdict(list)
+        for meeting_id, email in Meeting.students.through.objects.filter(
+            meeting_id__in=meeting_ids
+        ).values_list('meeting_id', 'student__user__email'):
+            if email:
+                recipients[meeting_id].append(email)
+
+        try:
+            self.deliver(reminders, recipients, now)
+        except Exception as e:
+            logger.error(f"Error queueing {len(reminders)} meeting reminders, retrying in {self.retry_delay}s: {str(e)}")
+            retry_at = time.time() + self.retry_delay
+            for reminder in reminders:
+                self.wheel.add(retry_at, reminder.id)
+            return 0
+
+        ReminderSchedule.objects.filter(id__in=[reminder.id for reminder in reminders]).update(sent_at=now)
+        # A meeting's reminder_sent flag flips once none of its reminders is pending
+        Meeting.objects.filter(id__in=meeting_ids).exclude(
+            Exists(ReminderSchedule.objects.filter(meeting=OuterRef('pk'), sent_at__isnull=True))
+        ).update(reminder_sent=True)
+        return len(reminders)
+
+    def deliver(self, reminders, recipients, now):
+        """Queue the reminder emails in the outbox with one insert"""
+        emails = []
+        for reminder in reminders:
+            addresses = recipients.get(reminder.meeting_id)
+            if not addresses:
+                continue
+            subject, text, html = render_reminder(reminder.meeting, minutes_until(reminder.meeting.start_time, now))
+            emails.extend(make_email(address, subject, text, html) for address in addresses)
+        enqueue(emails)
+
+    def run_once(self):
+        """Cron-style pass: send everything already due"""
+        self.load()
+        return self.fire_due()
+
+    def run_forever(self, stop=None):
+        """Resident mode: reload every ``refresh`` seconds and sleep until the next tick.
+
+        ``stop`` is an optional threading.Event that ends the loop.
+        """
+        stop = stop or threading.Event()
+        next_load = 0
+        while not stop.is_set():
+            if time.monotonic() >= next_load:
+                loaded = self.load()
+                if loaded:
+                    logger.info(f"Loaded {loaded} reminders, {self.wheel.size} pending in memory")
+                next_load = time.monotonic() + self.refresh
+
+            sent = self.fire_due()
+            if sent:
+                logger.info(f"Sent {sent} meeting reminders")
+
+            wait = self.wheel.next_due()
+            if wait is None:
+                wait = self.refresh
+            stop.wait(max(min(wait, next_load - time.monotonic()), 0.05))
+
+
+def render_reminder(meeting, minutes):
+    """Render the reminder subject, text and HTML body for a meeting starting in ``minutes``"""
+    context = {
+        'meeting': meeting,
+        'start_time': meeting.start_time,
+        'duration': meeting.duration,
+        'agenda': meeting.agenda,
+        'join_url': meeting.join_url,
+        'starts_in': format_offset(minutes),
+    }
+    subject = f'Reminder: {meeting.topic} starts in {context["starts_in"]}'
+    text = render_to_string('meetings/email/meeting_reminder.txt', context)
+    html = render_to_string('meetings/email/meeting_reminder.html', context)
+    return subject, text, html
@@ -0,0 +1,163 @@
+"""Versioned cache of the meeting and recording listing responses.
+
+Each mentor has a version number in the shared Django cache, bumped by
+every write that changes what their listings show (meeting create, update
+and delete, recording delete, recording webhooks). Response payloads are
+kept per process in a byte-capped LRU, encoded with msgpack, under the
+version they were built from; a bumped version turns every older entry for
+that mentor into a miss, so nothing has to be deleted on write. Entries
+also expire after MEETINGS_RESPONSE_CACHE_TTL seconds because
+``upcoming=1`` depends on the clock.
+
+Versions are keyed by the mentor's user id, which the listing views know
+without a query.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # Compact JSON is the fallback encoding
+    msgpack = None
+
+VERSION_KEY = 'meetings:listing-version:{user_id}'
+
+# DRF's encoder turns datetimes etc. into exactly what the JSON renderer emits
+_encoder = JSONEncoder()
+
+
+def encode(data):
+    if msgpack is not None:
+        return msgpack.packb(data, default=_encoder.default)
+    return json.dumps(data, cls=JSONEncoder, separators=(',', ':')).encode()
+
+
+def decode(blob):
+    if msgpack is not None:
+        return msgpack.unpackb(blob)
+    return json.loads(blob)
+
+
+def get_version(user_id):
+    return cache.get(VERSION_KEY.format(user_id=user_id), 0)
+
+
+async def aget_version(user_id):
+    return await cache.aget(VERSION_KEY.format(user_id=user_id), 0)
+
+
+def bump_version(mentor):
+    """Invalidate ``mentor``'s cached listings once the current transaction commits"""
+    if mentor is None:
+        return
+    key = VERSION_KEY.format(user_id=mentor.user_id)
+
+    def bump():
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:  # Evicted between add and incr
+            cache.set(key, 1, timeout=None)
+
+    transaction.on_commit(bump)
+
+
+class ResponseCache:
+    """Byte-capped LRU of encoded payloads, each stored with its version and expiry"""
+
+    def __init__(self, max_bytes=None, ttl=None):
+        self.max_bytes = max_bytes or getattr(settings, 'MEETINGS_RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        self.ttl = ttl or getattr(settings, 'MEETINGS_RESPONSE_CACHE_TTL', 60)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, version):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version or entry[1] < now:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            blob = entry[2]
+        return decode(blob)
+
+    def set(self, key, version, data):
+        blob = encode(data)
+        if len(blob) > self.max_bytes:
+            return len(blob)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[2])
+            self.entries[key] = (version, time.monotonic() + self.ttl, blob)
+            self.size += len(blob)
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+        return len(blob)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'pid': os.getpid(),
+                'encoding': 'msgpack' if msgpack is not None else 'json',
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def get_cache_key(name, request):
+    """The listing, the user and the full query string (cursor, filters, page size)"""
+    query = '&'.join(f'{key}={value}' for key, value in sorted(request.GET.items()))
+    return (name, request.user.id, query)
+
+
+def cached_listing(name):
+    """Serve a listing view's 200 responses from ``response_cache``.
+
+    Goes below @api_view/@permission_classes so only authenticated
+    requests reach it. Sets ``X-Cache: HIT`` or ``MISS`` on the response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = get_cache_key(name, request)
+            version = get_version(request.user.id)
+            data = response_cache.get(key, version)
+            if data is not None:
+                return Response(data, headers={'X-Cache': 'HIT'})
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response_cache.set(key, version, response.data)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,165 @@
+"""Storage and duration totals of recordings, kept up to date as they change.
+
+RecordingRollup holds each mentor's number of recordings, bytes and
+seconds: overall, per meeting and per day the recordings were stored.
+Code that inserts recordings passes them to ``add_recordings`` in the same
+transaction, and deleting goes through ``delete_recordings``; both turn
+the recordings into one delta per rollup row and apply it with ``F()``
+expressions, so concurrent writers never lose each other's updates and a
+storage report reads one row instead of summing the Recording table.
+``Meeting.recording_file_size`` is kept the same way.
+
+Writers hold the row locks of the meetings whose recordings they change
+(the webhook processor and sync_zoom lock them anyway, so a file both see
+is inserted once), and update rollup rows in one fixed order, so they
+cannot deadlock on each other. ``backfill_rollups`` takes the same meeting
+locks while it recomputes a chunk of mentors from Recording with grouped
+aggregates. Recordings of meetings without a mentor are not counted.
+"""
+from collections import defaultdict, namedtuple
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Meeting, Mentor, Recording, RecordingRollup
+
+RollupKey = namedtuple('RollupKey', 'mentor_id scope meeting_id day')
+SCOPE_ORDER = {'mentor': 0, 'meeting': 1, 'day': 2}
+
+
+def lock_order(key):
+    return key.mentor_id, SCOPE_ORDER[key.scope], key.meeting_id or 0, key.day or date.min
+
+
+def rollup_keys(mentor_id, meeting_id, created_at):
+    """The rollup rows a recording of ``meeting_id`` stored at ``created_at`` counts towards"""
+    return (
+        RollupKey(mentor_id, 'mentor', None, None),
+        RollupKey(mentor_id, 'meeting', meeting_id, None),
+        RollupKey(mentor_id, 'day', None, timezone.localdate(created_at)),
+    )
+
+
+def collect_deltas(recordings, sign=1):
+    """``{RollupKey: [count, bytes, seconds]}`` adding (``sign=1``) or removing (``sign=-1``) ``recordings``"""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for recording in recordings:
+        mentor_id = recording.meeting.mentor_id
+        if mentor_id is None:
+            continue
+        for key in rollup_keys(mentor_id, recording.meeting_id, recording.created_at):
+            delta = deltas[key]
+            delta[0] += sign
+            delta[1] += sign * (recording.file_size or 0)
+            delta[2] += sign * (recording.duration or 0)
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Add ``deltas`` to the rollup rows, creating the rows that do not exist yet"""
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    keys = sorted(deltas, key=lock_order)
+    now = timezone.now()
+    with transaction.atomic():
+        RecordingRollup.objects.bulk_create([
+            RecordingRollup(scope=key.scope, mentor_id=key.mentor_id, meeting_id=key.meeting_id, day=key.day)
+            for key in keys
+        ], ignore_conflicts=True)
+        for key in keys:
+            count, size, duration = deltas[key]
+            RecordingRollup.objects.filter(
+                scope=key.scope, mentor_id=key.mentor_id, meeting_id=key.meeting_id, day=key.day
+            ).update(
+                recording_count=F('recording_count') + count,
+                total_bytes=F('total_bytes') + size,
+                total_duration=F('total_duration') + duration,
+                updated_at=now,
+            )
+            if key.scope == 'meeting' and size:
+                Meeting.objects.filter(id=key.meeting_id).update(
+                    recording_file_size=Coalesce(F('recording_file_size'), 0) + size
+                )
+
+
+def add_recordings(recordings):
+    """Count just-inserted recordings (with their ``meeting`` loaded) in the rollups"""
+    apply_deltas(collect_deltas(recordings))
+
+
+def delete_recordings(recordings):
+    """Delete the recordings of a queryset and take them out of the rollups; returns how many were deleted"""
+    with transaction.atomic():
+        # Locked first, so two requests deleting the same recording do not both subtract it
+        locked = list(
+            recordings.select_for_update(of=('self', 'meeting')).select_related('meeting')
+            .only('id', 'file_size', 'duration', 'created_at', 'meeting__mentor')
+        )
+        if not locked:
+            return 0
+        apply_deltas(collect_deltas(locked, sign=-1))
+        Recording.objects.filter(id__in=[recording.id for recording in locked]).delete()
+    return len(locked)
+
+
+def remove_meeting(meeting):
+    """Delete a meeting, first taking its recordings out of its mentor's totals"""
+    with transaction.atomic():
+        delete_recordings(meeting.recordings.all())
+        meeting.delete()
+
+
+def get_usage(mentor, scope='mentor', **lookup):
+    """The mentor's RecordingRollup for ``scope`` (and ``meeting``/``day``), or an unsaved empty one"""
+    rollup = RecordingRollup.objects.filter(mentor=mentor, scope=scope, **lookup).first()
+    return rollup or RecordingRollup(mentor=mentor, scope=scope, **lookup)
+
+
+def backfill_rollups(mentor_ids):
+    """Recompute the rollups of ``mentor_ids`` from their recordings; returns the rows written"""
+    totals = {
+        'recording_count': Count('id'),
+        'total_bytes': Coalesce(Sum('file_size'), 0),
+        'total_duration': Coalesce(Sum('duration'), 0),
+    }
+    with transaction.atomic():
+        # Writers lock their meetings before touching the rollups, so these totals hold until we commit
+        list(Meeting.objects.select_for_update().filter(mentor_id__in=mentor_ids).order_by('id').values_list('id'))
+        recordings = Recording.objects.filter(meeting__mentor_id__in=mentor_ids)
+        rows = [
+            RecordingRollup(scope='mentor', mentor_id=row.pop('meeting__mentor_id'), **row)
+            for row in recordings.values('meeting__mentor_id').annotate(**totals).order_by()
+        ]
+        rows += [
+            RecordingRollup(scope='meeting', mentor_id=row.pop('meeting__mentor_id'), **row)
+            for row in recordings.values('meeting__mentor_id', 'meeting_id').annotate(**totals).order_by()
+        ]
+        rows += [
+            RecordingRollup(scope='day', mentor_id=row.pop('meeting__mentor_id'), **row)
+            for row in recordings.annotate(day=TruncDate('created_at'))
+            .values('meeting__mentor_id', 'day').annotate(**totals).order_by()
+        ]
+
+        RecordingRollup.objects.filter(mentor_id__in=mentor_ids).delete()
+        RecordingRollup.objects.bulk_create(rows)
+        Meeting.objects.filter(mentor_id__in=mentor_ids).update(recording_file_size=Subquery(
+            Recording.objects.filter(meeting=OuterRef('pk')).values('meeting')
+            .annotate(total=Sum('file_size')).values('total')
+        ))
+    return len(rows)
+
+
+def iter_mentor_chunks(chunk_size, mentors=None):
+    """Ids of all mentors (or of the ``mentors`` queryset), ``chunk_size`` at a time in id order"""
+    mentors = (Mentor.objects.all() if mentors is None else mentors).order_by('id')
+    last_id = 0
+    while True:
+        ids = list(mentors.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
@@ -0,0 +1,116 @@
+"""Meeting SDK join signatures.
+
+Every participant joining through the web SDK asks for a signature, and at
+class start thousands do so within seconds for the same few meetings. Both
+flavors are made cheap here:
+
+* the HMAC key schedule and the JWT header are computed once per signer,
+  so a signature costs one ``hmac.copy()`` and a digest;
+* the timestamp is rounded down to a time bucket, which makes every
+  signature for (meeting, role, bucket) identical, so it is kept in a small
+  LRU cache and reused until the bucket changes. Signatures stay valid for
+  far longer than a bucket, so a cached one is never close to expiry.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+JWT_LIFETIME = 60 * 60 * 2  # Seconds a JWT signature stays valid
+
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+class SDKSigner:
+    """Signs (meeting number, role) pairs with one SDK key/secret"""
+
+    def __init__(self, sdk_key, sdk_secret, bucket=60, cache_size=10000):
+        self.sdk_key = sdk_key
+        self.bucket = bucket
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # hmac.new() derives the padded key on every call; copying a primed object skips that
+        self.mac = hmac.new(sdk_secret.encode(), digestmod=hashlib.sha256)
+        self.jwt_header = b64url(json.dumps({'alg': 'HS256', 'typ': 'JWT'}, separators=(',', ':')).encode())
+
+    def hmac_signature(self, meeting_number, role, timestamp):
+        """Same message and encoding as ``generate_signature`` always used; ``timestamp`` in ms"""
+        mac = self.mac.copy()
+        mac.update(f'{self.sdk_key}.{meeting_number}.{timestamp}.{role}'.encode())
+        return base64.b64encode(mac.digest()).decode()
+
+    def jwt_signature(self, meeting_number, role, iat):
+        """HS256 JWT with the claims of ``MeetingViewSet.generate_zoom_signature``"""
+        exp = iat + JWT_LIFETIME
+        claims = {
+            'sdkKey': self.sdk_key,
+            'mn': meeting_number,
+            'role': role,
+            'iat': iat,
+            'exp': exp,
+            'appKey': self.sdk_key,
+            'tokenExp': exp
+        }
+        signing_input = self.jwt_header + b'.' + b64url(json.dumps(claims, separators=(',', ':')).encode())
+        mac = self.mac.copy()
+        mac.update(signing_input)
+        return (signing_input + b'.' + b64url(mac.digest())).decode()
+
+    def sign(self, meeting_number, role=0, flavor='hmac', now=None):
+        """Return ``(signature, timestamp)`` for the current time bucket.
+
+        ``timestamp`` is what the client passes to the SDK: milliseconds for
+        the HMAC flavor, the JWT's ``iat`` in seconds for the JWT flavor.
+        """
+        issued = int((time.time() if now is None else now) // self.bucket * self.bucket)
+        key = (flavor, str(meeting_number), role, issued)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        if flavor == 'jwt':
+            result = (self.jwt_signature(meeting_number, role, issued), issued)
+        else:
+            result = (self.hmac_signature(meeting_number, role, issued * 1000), issued * 1000)
+
+        with self.lock:
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.cache)}
+
+
+_signers = {}
+_signers_lock = threading.Lock()
+
+
+def get_signer():
+    """Return the process-wide signer for the configured SDK key"""
+    key = (settings.ZOOM_SDK_KEY, settings.ZOOM_SDK_SECRET)
+    signer = _signers.get(key)
+    if signer is None:
+        with _signers_lock:
+            signer = _signers.get(key)
+            if signer is None:
+                signer = _signers[key] = SDKSigner(
+                    *key, bucket=getattr(settings, 'ZOOM_SIGNATURE_BUCKET', 60)
+                )
+    return signer
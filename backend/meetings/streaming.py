@@ -0,0 +1,353 @@
+"""Streaming recordings to viewers, with HTTP Range support.
+
+Players seek by asking for byte ranges, so the stream endpoint answers a
+single-range ``Range`` header with a 206 of just those bytes. The bytes
+come from the recording's S3 copy when it has been mirrored, through a
+presigned URL, and from Zoom's download URL otherwise.
+
+Upstream is read in windows of at most ``RECORDING_STREAM_WINDOW`` bytes,
+each a bounded ranged GET on the shared aiohttp session: a window that is
+read to its end hands its keep-alive connection back to the pool, and a
+viewer who seeks away only abandons the rest of one window. Memory per
+viewer stays at one read chunk plus one cache block.
+
+With ``RECORDING_STREAM_CACHE_DIR`` set, windows are cut into blocks of
+``RECORDING_STREAM_BLOCK_SIZE`` that are kept on local disk, so the parts
+everyone watches (the start, the bit after the break) are served without
+going upstream. The cache is bounded by ``RECORDING_STREAM_CACHE_SIZE`` and
+evicts the least recently used blocks. Its index lives in the process, so
+each worker process should get its own directory.
+
+The view is async and meant to be served under ASGI, where one worker
+keeps every viewer's stream going on its event loop.
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+
+from .mirror import get_bucket, get_s3_client
+from .zoom_async import AsyncZoomClient, get_async_session, get_stream_timeout
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+READ_CHUNK = 64 * 1024
+CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+CONTENT_TYPES = {
+    'video': 'video/mp4',
+    'shared_screen': 'video/mp4',
+    'audio': 'audio/mp4',
+    'chat': 'text/plain; charset=utf-8',
+}
+
+
+def get_window():
+    return getattr(settings, 'RECORDING_STREAM_WINDOW', 8 * MB)
+
+
+class UpstreamError(Exception):
+    """S3 or Zoom failed, or sent fewer bytes than asked for"""
+
+
+class RangeNotSatisfiable(ValueError):
+    """The Range header asks for bytes past the end of the file"""
+
+
+def parse_range(header, size):
+    """Inclusive ``(start, end)`` asked for by a ``Range`` header, or None to send the whole file.
+
+    Only single ranges are honoured; a header we cannot use is ignored, as
+    RFC 9110 allows.
+    """
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*', header or '')
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+def sign_stream(recording_id):
+    """Value of the ``sig`` parameter that lets a player fetch the stream without a JWT header"""
+    return signing.TimestampSigner(salt='recording-stream').sign(str(recording_id))
+
+
+def check_stream_signature(value, recording_id):
+    try:
+        signed = signing.TimestampSigner(salt='recording-stream').unsign(
+            value, max_age=getattr(settings, 'RECORDING_STREAM_URL_TTL', 6 * 60 * 60)
+        )
+    except signing.BadSignature:
+        return False
+    return signed == str(recording_id)
+
+
+class BlockCache:
+    """Size-bounded LRU cache of fixed-size blocks of recording files on local disk"""
+
+    def __init__(self, directory, max_bytes, block_size=MB):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.index = OrderedDict()  # path -> size, least recently used first
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Index blocks left by a previous run, oldest first"""
+        blocks = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith('.tmp'):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                blocks.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(blocks):
+            self.index[path] = size
+            self.total += size
+        self.evict()
+
+    def path(self, key, block):
+        return os.path.join(self.directory, key, str(block))
+
+    def open(self, key, block):
+        """The block's file opened for reading, or None on a miss; eviction cannot pull it from under the reader"""
+        path = self.path(key, block)
+        with self.lock:
+            if path not in self.index:
+                self.misses += 1
+                return None
+            self.index.move_to_end(path)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            with self.lock:
+                self.total -= self.index.pop(path, 0)
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return f
+
+    def put(self, key, block, data):
+        path = self.path(key, block)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write aside and rename, so a reader never sees half a block
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self.lock:
+            self.total += len(data) - self.index.pop(path, 0)
+            self.index[path] = len(data)
+        self.evict()
+
+    def evict(self):
+        evicted = []
+        with self.lock:
+            while self.total > self.max_bytes and self.index:
+                path, size = self.index.popitem(last=False)
+                self.total -= size
+                evicted.append(path)
+        for path in evicted:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {'blocks': len(self.index), 'bytes': self.total, 'hits': self.hits, 'misses': self.misses}
+
+    async def aopen(self, key, block):
+        return await sync_to_async(self.open, thread_sensitive=False)(key, block)
+
+    async def aput(self, key, block, data):
+        await sync_to_async(self.put, thread_sensitive=False)(key, block, data)
+
+
+_block_cache = None
+_block_cache_lock = threading.Lock()
+
+
+def get_block_cache():
+    """This process's BlockCache, or None when RECORDING_STREAM_CACHE_DIR is not set"""
+    global _block_cache
+    directory = getattr(settings, 'RECORDING_STREAM_CACHE_DIR', None)
+    if not directory:
+        return None
+    with _block_cache_lock:
+        if _block_cache is None or _block_cache.directory != directory:
+            _block_cache = BlockCache(
+                directory,
+                getattr(settings, 'RECORDING_STREAM_CACHE_SIZE', 1024 * MB),
+                getattr(settings, 'RECORDING_STREAM_BLOCK_SIZE', MB)
+            )
+    return _block_cache
+
+
+_s3 = None
+
+
+def presigned_url(recording):
+    global _s3
+    if _s3 is None:
+        _s3 = get_s3_client()
+    return _s3.generate_presigned_url(
+        'get_object', Params={'Bucket': get_bucket(), 'Key': recording.s3_key}, ExpiresIn=300
+    )
+
+
+def get_size(recording):
+    """Size of the file being streamed, if the database knows it"""
+    if recording.mirror_status == 'mirrored' and recording.s3_bytes is not None:
+        return recording.s3_bytes
+    return recording.file_size
+
+
+async def open_upstream(recording, start, end):
+    """Ranged GET of bytes ``start``-``end`` from S3 or Zoom; the caller must release the response"""
+    if recording.mirror_status == 'mirrored' and recording.s3_key:
+        url = await sync_to_async(presigned_url, thread_sensitive=False)(recording)
+        try:
+            response = await get_async_session().get(
+                url, headers={'Range': f'bytes={start}-{end}'}, timeout=get_stream_timeout()
+            )
+        except aiohttp.ClientError as e:
+            raise UpstreamError(f'S3 request failed: {str(e)}') from e
+        if response.status not in (200, 206):
+            response.release()
+            raise UpstreamError(f'S3 answered {response.status} for {recording.s3_key}')
+    else:
+        client = AsyncZoomClient.for_mentor(recording.meeting.mentor)
+        response = await client.download(recording.recording_url, start, end)
+    return response
+
+
+async def probe_size(recording):
+    """Ask upstream for the file's size through a one-byte range"""
+    response = await open_upstream(recording, 0, 0)
+    response.release()
+    match = CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+    if match:
+        return int(match.group(3))
+    return int(response.headers['Content-Length'])
+
+
+async def iter_recording(recording, start, end, size, cache=None):
+    """Yield the bytes ``start``-``end`` (inclusive) of a recording of ``size`` bytes"""
+    key = str(recording.id)
+    window = get_window()
+    position = start
+    while position <= end:
+        if cache:
+            block_size = cache.block_size
+            block = position // block_size
+            f = await cache.aopen(key, block)
+            if f is not None:
+                # Read the block a chunk at a time too, rather than holding a whole block per viewer
+                block_end = min((block + 1) * block_size - 1, end)
+                read = sync_to_async(f.read, thread_sensitive=False)
+                try:
+                    await sync_to_async(f.seek, thread_sensitive=False)(position - block * block_size)
+                    while position <= block_end:
+                        piece = await read(min(READ_CHUNK, block_end + 1 - position))
+                        if not piece:
+                            raise UpstreamError(f'Cached block {block} of recording {key} is short')
+                        yield piece
+                        position += len(piece)
+                finally:
+                    f.close()
+                continue
+            # Fetch whole blocks, so each one read can be cached
+            window_start = block * block_size
+            last_block_end = (end // block_size + 1) * block_size - 1
+            window_end = min(window_start + max(window, block_size) - 1, last_block_end, size - 1)
+        else:
+            window_start, window_end = position, min(position + window - 1, end)
+
+        buffer = bytearray()
+        block = window_start // cache.block_size if cache else 0
+        response = await open_upstream(recording, window_start, window_end)
+        try:
+            # A server ignoring Range sends the file from byte 0
+            offset = window_start if response.status == 206 else 0
+            async for chunk in response.content.iter_chunked(READ_CHUNK):
+                chunk_start = offset
+                offset += len(chunk)
+                if offset <= window_start:
+                    continue
+                if chunk_start < window_start:
+                    chunk, chunk_start = chunk[window_start - chunk_start:], window_start
+                if chunk_start + len(chunk) > window_end + 1:
+                    chunk = chunk[:window_end + 1 - chunk_start]
+
+                low, high = max(position, chunk_start), min(end + 1, chunk_start + len(chunk))
+                if high > low:
+                    yield chunk[low - chunk_start:high - chunk_start]
+                    position = high
+
+                if cache:
+                    buffer.extend(chunk)
+                    while len(buffer) >= cache.block_size:
+                        await cache.aput(key, block, buffer[:cache.block_size])
+                        del buffer[:cache.block_size]
+                        block += 1
+                if chunk_start + len(chunk) > window_end:
+                    break
+        finally:
+            # Back to the pool when the window was read to its end, closed when the viewer left early
+            response.release()
+
+        if cache and buffer and window_end == size - 1 and offset >= size:
+            # The file's last block is shorter than the others
+            await cache.aput(key, block, buffer)
+        if position <= min(end, window_end):
+            raise UpstreamError(f'Upstream ended at byte {position} of recording {key}, expected {window_end + 1}')
+
+
+class RecordingStream:
+    """Async iterable body for StreamingHttpResponse: ``first`` and then the rest of ``chunks``.
+
+    Django calls ``close()`` when the response is finished, from a worker
+    thread and also when the viewer went away mid-stream. It closes
+    ``chunks`` on the event loop, so the upstream connection is released
+    at once instead of whenever the generator gets garbage collected.
+    """
+
+    def __init__(self, chunks, first):
+        self.chunks = chunks
+        self.first = first
+        self.loop = asyncio.get_running_loop()
+
+    async def __aiter__(self):
+        yield self.first
+        async for chunk in self.chunks:
+            yield chunk
+
+    def close(self):
+        if not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.chunks.aclose(), self.loop)
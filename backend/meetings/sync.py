@@ -0,0 +1,297 @@
+"""Reconciling local meetings and recordings with Zoom.
+
+Lost webhooks and edits made in the Zoom web UI make local rows drift.
+``AccountSync`` pages through one Zoom account's meetings and cloud
+recordings, diffs every page against the local rows by Zoom meeting id
+and applies the difference with ``bulk_create``/``bulk_update`` in chunks.
+The next page is requested while the current one is being applied.
+
+Runs are incremental. Zoom cannot list what changed since a point in
+time, but a meeting that has started no longer changes and recordings
+made before the last run were seen by it, so a ZoomSyncCheckpoint per
+account keeps the date from which the next run has to look again, and
+each run asks Zoom only for meetings and recordings from there on (with a
+day of overlap for time zones and late uploads).
+"""
+import logging
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .changes import meeting_event, publish, recording_status_event, recordings_available_event
+from .models import Meeting, Recording, ZoomSyncCheckpoint
+from .reminders import reschedule_reminders, schedule_reminders
+from .response_cache import bump_version
+from .rollups import add_recordings
+from .utils import send_recording_notifications
+from .webhooks import recording_from_zoom
+from .zoom import ZoomClient
+
+logger = logging.getLogger(__name__)
+
+OVERLAP = timedelta(days=1)
+# Zoom's list-recordings accepts at most a month between from and to
+RECORDING_WINDOW = timedelta(days=30)
+MEETING_FIELDS = ['topic', 'start_time', 'duration', 'timezone', 'agenda', 'join_url']
+
+
+class SyncInProgress(Exception):
+    """Another process is already syncing this account"""
+
+
+def iter_pages(pool, fetch):
+    """Yield the pages of ``fetch(page_token)``, requesting each next page on ``pool`` before yielding"""
+    future = pool.submit(fetch, '')
+    while future is not None:
+        page = future.result()
+        token = page.get('next_page_token')
+        future = pool.submit(fetch, token) if token else None
+        yield page
+
+
+def parse_zoom_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+def meeting_fields(zoom_meeting):
+    """Local Meeting fields from an item of Zoom's list-meetings response"""
+    return {
+        'topic': zoom_meeting.get('topic', ''),
+        'start_time': parse_zoom_time(zoom_meeting.get('start_time')),
+        'duration': int(zoom_meeting.get('duration') or 0),
+        'timezone': zoom_meeting.get('timezone') or 'UTC',
+        'agenda': zoom_meeting.get('agenda', ''),
+        'join_url': zoom_meeting.get('join_url', ''),
+    }
+
+
+class AccountSync:
+    """Reconciles one mentor's Zoom account with the local database"""
+
+    def __init__(self, mentor, client=None, chunk_size=500, since_days=30, full=False, notify=False):
+        self.mentor = mentor
+        self.client = client or ZoomClient.for_mentor(mentor)
+        self.chunk_size = chunk_size
+        self.since_days = since_days
+        self.full = full
+        self.notify = notify
+        self.stats = Counter()
+
+    @property
+    def account_id(self):
+        return self.mentor.zoom_account_id
+
+    def run(self):
+        """Sync the account and advance its checkpoint; returns the change counts"""
+        lock_key = f'zoom:sync:{self.account_id}'
+        if not cache.add(lock_key, os.getpid(), 60 * 60):
+            raise SyncInProgress(f'Account {self.account_id} is already being synced')
+        try:
+            checkpoint, _ = ZoomSyncCheckpoint.objects.get_or_create(account_id=self.account_id)
+            started = timezone.now()
+            checkpoint.last_started_at = started
+            checkpoint.save(update_fields=['last_started_at'])
+
+            today = started.date()
+            meetings_from = None if self.full else checkpoint.meetings_from
+            recordings_from = checkpoint.recordings_from
+            if self.full or recordings_from is None:
+                recordings_from = today - timedelta(days=self.since_days)
+
+            try:
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix='zoom-sync') as prefetch:
+                    self.sync_meetings(prefetch, meetings_from, started)
+                    self.sync_recordings(prefetch, recordings_from, today)
+            except Exception as e:
+                checkpoint.last_error = str(e)
+                checkpoint.save(update_fields=['last_error'])
+                raise
+
+            checkpoint.meetings_from = today - OVERLAP
+            checkpoint.recordings_from = today - OVERLAP
+            checkpoint.last_finished_at = timezone.now()
+            checkpoint.last_error = ''
+            checkpoint.stats = dict(self.stats)
+            checkpoint.save()
+            if any(count for name, count in self.stats.items() if name != 'pages'):
+                bump_version(self.mentor)
+            return self.stats
+        finally:
+            cache.delete(lock_key)
+
+    def sync_meetings(self, prefetch, since, started):
+        params = {'type': 'scheduled'}
+        if since:
+            params['from'] = since.isoformat()
+
+        seen = set()
+        pages = iter_pages(prefetch, lambda token: self.client.list_meetings(page_token=token, **params))
+        for page in pages:
+            self.stats['pages'] += 1
+            zoom_meetings = {}
+            for zoom_meeting in page.get('meetings', []):
+                meeting_id = str(zoom_meeting['id'])
+                # Occurrences of a recurring meeting share its id; meetings without a fixed time have no start
+                if meeting_id not in seen and zoom_meeting.get('start_time'):
+                    zoom_meetings.setdefault(meeting_id, zoom_meeting)
+            seen.update(zoom_meetings)
+            self.apply_meetings(zoom_meetings)
+
+        # Every upcoming meeting is in a complete listing, so the ones missing were deleted in Zoom
+        upcoming = Meeting.objects.filter(mentor=self.mentor, is_active=True, start_time__gt=started)
+        gone = [
+            (meeting_id, pk) for meeting_id, pk in upcoming.values_list('meeting_id', 'id') if meeting_id not in seen
+        ]
+        for i in range(0, len(gone), self.chunk_size):
+            chunk = gone[i:i + self.chunk_size]
+            self.stats['meetings_deactivated'] += Meeting.objects.filter(id__in=[pk for _, pk in chunk]).update(
+                is_active=False, updated_at=timezone.now()
+            )
+            publish(self.mentor, *[
+                {'type': 'meeting.updated', 'meeting': {'meeting_id': meeting_id, 'is_active': False}}
+                for meeting_id, _ in chunk
+            ])
+
+    def apply_meetings(self, zoom_meetings):
+        local = {
+            meeting.meeting_id: meeting
+            for meeting in Meeting.objects.filter(meeting_id__in=list(zoom_meetings))
+        }
+        now = timezone.now()
+        created, updated, moved = [], [], []
+        for meeting_id, zoom_meeting in zoom_meetings.items():
+            fields = meeting_fields(zoom_meeting)
+            meeting = local.get(meeting_id)
+            if meeting is None:
+                created.append(Meeting(
+                    mentor=self.mentor,
+                    meeting_id=meeting_id,
+                    host_email=self.mentor.user.email,
+                    meeting_type='instant' if zoom_meeting.get('type') == 1 else 'scheduled',
+                    **fields
+                ))
+                continue
+            if meeting.mentor_id != self.mentor.id:
+                logger.warning(f"Zoom meeting {meeting_id} of account {self.account_id} belongs to another mentor")
+                continue
+            changed = [name for name, value in fields.items() if getattr(meeting, name) != value]
+            if changed or not meeting.is_active:
+                if 'start_time' in changed:
+                    moved.append(meeting)
+                for name, value in fields.items():
+                    setattr(meeting, name, value)
+                meeting.is_active = True
+                meeting.updated_at = now
+                updated.append(meeting)
+
+        if not created and not updated:
+            return
+        with transaction.atomic():
+            created = Meeting.objects.bulk_create(created, batch_size=self.chunk_size)
+            Meeting.objects.bulk_update(
+                updated, MEETING_FIELDS + ['is_active', 'updated_at'], batch_size=self.chunk_size
+            )
+            schedule_reminders(created)
+            for meeting in moved:
+                reschedule_reminders(meeting)
+            publish(self.mentor, *[meeting_event('meeting.created', meeting) for meeting in created],
+                    *[meeting_event('meeting.updated', meeting) for meeting in updated])
+        self.stats['meetings_created'] += len(created)
+        self.stats['meetings_updated'] += len(updated)
+
+    def sync_recordings(self, prefetch, since, until):
+        window_start = since
+        while window_start <= until:
+            window_end = min(window_start + RECORDING_WINDOW, until)
+
+            def fetch(token, window_start=window_start, window_end=window_end):
+                return self.client.list_recordings(window_start, window_end, page_token=token)
+
+            for page in iter_pages(prefetch, fetch):
+                self.stats['pages'] += 1
+                self.apply_recordings(page.get('meetings', []))
+            window_start = window_end + timedelta(days=1)
+
+    def apply_recordings(self, zoom_meetings):
+        files = defaultdict(list)
+        for zoom_meeting in zoom_meetings:
+            # Each instance of a recurring meeting is listed separately under the same id
+            files[str(zoom_meeting['id'])].extend(zoom_meeting.get('recording_files', []))
+
+        local = {
+            meeting.meeting_id: meeting
+            for meeting in Meeting.objects.filter(mentor=self.mentor, meeting_id__in=list(files))
+            .select_related('mentor__user')
+        }
+        with transaction.atomic():
+            # Locked like the webhook processor locks them, so a file both of us see is stored and counted once
+            list(Meeting.objects.select_for_update().filter(
+                id__in=[meeting.id for meeting in local.values()]
+            ).order_by('id').values_list('id'))
+            existing = set(
+                Recording.objects.filter(meeting__in=local.values(), zoom_file_id__isnull=False)
+                .values_list('meeting_id', 'zoom_file_id')
+            )
+            new_recordings, completed = [], []
+            now = timezone.now()
+            for meeting_id, meeting_files in files.items():
+                meeting = local.get(meeting_id)
+                if meeting is None:
+                    self.stats['recordings_unknown_meeting'] += 1
+                    continue
+                for file in meeting_files:
+                    if not file.get('id') or file.get('status', 'completed') != 'completed':
+                        continue
+                    key = (meeting.id, str(file['id']))
+                    if key not in existing:
+                        existing.add(key)
+                        new_recordings.append(recording_from_zoom(meeting, file))
+                if meeting.recording_status != 'completed':
+                    meeting.recording_status = 'completed'
+                    meeting.updated_at = now
+                    completed.append(meeting)
+
+            if not new_recordings and not completed:
+                return
+            created = Recording.objects.bulk_create(
+                new_recordings, batch_size=self.chunk_size, ignore_conflicts=True
+            )
+            add_recordings(created)
+            Meeting.objects.bulk_update(completed, ['recording_status', 'updated_at'], batch_size=self.chunk_size)
+            by_meeting = defaultdict(list)
+            for recording in created:
+                by_meeting[recording.meeting].append(recording)
+            publish(self.mentor, *[recordings_available_event(meeting, recordings)
+                                   for meeting, recordings in by_meeting.items()],
+                    *[recording_status_event(meeting) for meeting in completed])
+        self.stats['recordings_created'] += len(created)
+        self.stats['meetings_completed'] += len(completed)
+
+        if self.notify:
+            for meeting, recordings in by_meeting.items():
+                send_recording_notifications(meeting, recordings)
+
+
+def sync_account(mentor, **options):
+    """Run one AccountSync on a worker thread; returns ``(mentor, stats or None, error or None)``"""
+    try:
+        return mentor, AccountSync(mentor, **options).run(), None
+    except Exception as e:
+        logger.error(f"Error syncing Zoom account {mentor.zoom_account_id}: {str(e)}")
+        return mentor, None, e
+    finally:
+        # Each worker thread opened its own connection
+        connection.close()
+
+
+def sync_accounts(mentors, workers=4, **options):
+    """Sync many accounts, ``workers`` at a time; yields results as accounts finish"""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zoom-sync-account') as pool:
+        futures = [pool.submit(sync_account, mentor, **options) for mentor in mentors]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,1106 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from email.utils import formatdate
+from unittest import mock
+
+import requests
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .attendance import refresh_meetings, summarize_events
+from .checks import check_shared_cache, check_shared_cache_deploy
+from .circuit import CircuitBreaker
+from .cohorts import parse_cohort
+from .enrollment import Enrollment
+from .fakezoom import FakeZoomServer
+from .models import (
+    AttendanceSummary, EmailOutbox, Meeting, Mentor, Recording, RecordingRollup, ReminderSchedule, Student,
+    WebhookEvent, ZoomSyncCheckpoint,
+)
+from .outbox import OutboxWorker, enqueue, make_email
+from .ratelimit import ZoomRateLimiter
+from .reminders import ReminderScheduler, TimingWheel, schedule_reminders
+from .response_cache import ResponseCache
+from .rollups import add_recordings, backfill_rollups, delete_recordings
+from .sync import OVERLAP, AccountSync
+from .webhooks import WebhookEventProcessor
+from .zoom import ZoomAPIError, ZoomRateLimited, token_manager
+from .zoom_async import _sessions, get_async_session
+from zoom_meetings.models import Meeting as ZoomMeeting, ParticipantEvent
+
+
+def zoom_response(status_code, payload=None):
+    """A requests.Response as the Zoom API would send it"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload or {}).encode()
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+def create_mentor(username, students=0):
+    user = User.objects.create_user(username, email=f'{username}@example.com', password='x')
+    mentor = Mentor.objects.create(
+        user=user, zoom_account_id=f'{username}-account', zoom_client_id='id', zoom_client_secret='secret'
+    )
+    for i in range(students):
+        student_user = User.objects.create_user(f'{username}-student-{i}', email=f'{username}-{i}@example.com')
+        Student.objects.create(user=student_user, mentor=mentor)
+    return mentor
+
+
+def create_meeting(mentor, meeting_id, start_time=None, students=()):
+    meeting = Meeting.objects.create(
+        mentor=mentor, topic=f'Meeting {meeting_id}', start_time=start_time or timezone.now(), duration=60,
+        meeting_id=meeting_id, join_url=f'https://zoom.us/j/{meeting_id}', host_email=mentor.user.email
+    )
+    meeting.students.set(students)
+    return meeting
+
+
+def zoom_meeting(payload, meeting_id):
+    """The meeting object Zoom answers a create-meeting call with"""
+    return {
+        'id': meeting_id, 'topic': payload['topic'], 'start_time': payload.get('start_time', '2030-01-06T10:00:00Z'),
+        'duration': payload['duration'], 'join_url': f'https://zoom.us/j/{meeting_id}',
+        'host_email': 'host@example.com', 'timezone': 'UTC',
+    }
+
+
+def authenticated_client(client, user):
+    client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+    return client
+
+
+class CircuitBreakerTests(TestCase):
+    """A Zoom outage trips the breaker, which then fails fast until a probe gets through"""
+
+    def setUp(self):
+        cache.clear()
+        token_manager._local.clear()
+        self.now = 1000.0
+        self.breaker = CircuitBreaker(
+            config={'default': {'failure_threshold': 2, 'reset_timeout': 30}}, clock=lambda: self.now
+        )
+        self.session = mock.Mock()
+        self.session.post.return_value = zoom_response(200, {'access_token': 'token', 'expires_in': 3600})
+        for patcher in (
+            mock.patch('meetings.zoom.circuit_breaker', self.breaker),
+            mock.patch('meetings.zoom.get_session', return_value=self.session),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        user = User.objects.create_user('mentor', password='x')
+        Mentor.objects.create(user=user, zoom_account_id='account', zoom_client_id='id', zoom_client_secret='secret')
+        self.client = authenticated_client(self.client, user)
+
+    def create_meeting(self):
+        return self.client.post('/api/meetings/create/', {'topic': 'Office hours'}, content_type='application/json')
+
+    def test_open_half_open_closed(self):
+        self.session.request.return_value = zoom_response(503)
+        # Each 5xx is a fast 503 with a retry hint; the second one opens the breaker
+        for retry_after in ('1', '30'):
+            response = self.create_meeting()
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], retry_after)
+        self.assertEqual(self.breaker.states()['create_meeting']['state'], 'open')
+
+        # Open: rejected without touching the network, with the time left as Retry-After
+        self.now += 10
+        response = self.create_meeting()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '20')
+        self.assertEqual(response.json()['retry_after'], 20)
+        self.assertEqual(self.session.request.call_count, 2)
+
+        # Half-open: a failed probe opens the breaker for another period
+        self.now += 21
+        self.assertEqual(self.create_meeting().status_code, 503)
+        self.assertEqual(self.session.request.call_count, 3)
+        self.assertEqual(self.breaker.states()['create_meeting']['state'], 'open')
+        self.assertEqual(self.create_meeting()['Retry-After'], '30')
+        self.assertEqual(self.session.request.call_count, 3)
+
+        # Half-open again: a successful probe closes it
+        self.now += 31
+        self.session.request.return_value = zoom_response(201, {
+            'id': 123456789, 'topic': 'Office hours', 'start_time': '2026-10-17T10:00:00Z', 'duration': 60,
+            'join_url': 'https://zoom.us/j/123456789', 'host_email': 'mentor@example.com', 'timezone': 'UTC',
+        })
+        self.assertEqual(self.create_meeting().status_code, 201)
+        self.assertEqual(self.breaker.states()['create_meeting']['state'], 'closed')
+        self.assertTrue(Meeting.objects.filter(meeting_id='123456789').exists())
+
+    def test_half_open_lets_one_probe_through(self):
+        for _ in range(2):
+            self.breaker.record_failure('create_meeting')
+        self.assertFalse(self.breaker.allow('create_meeting'))
+        self.now += 30
+        self.assertTrue(self.breaker.allow('create_meeting'))
+        self.assertFalse(self.breaker.allow('create_meeting'))
+        self.breaker.record_success('create_meeting')
+        self.assertTrue(self.breaker.allow('create_meeting'))
+
+
+class ZoomStallTests(TestCase):
+    """Against a fake Zoom that stalls: read timeouts trip the breaker and listings keep working"""
+
+    def setUp(self):
+        cache.clear()
+        token_manager._local.clear()
+        self.server = FakeZoomServer(stall=5.0).start()
+        self.addCleanup(self.server.stop)
+        self.breaker = CircuitBreaker(config={'default': {'failure_threshold': 2, 'reset_timeout': 30}})
+        zoom_settings = override_settings(
+            ZOOM_OAUTH_URL=self.server.oauth_url, ZOOM_API_BASE_URL=self.server.api_url, ZOOM_HTTP_READ_TIMEOUT=0.2
+        )
+        zoom_settings.enable()
+        self.addCleanup(zoom_settings.disable)
+        for target in ('meetings.zoom.circuit_breaker', 'meetings.views.circuit_breaker'):
+            patcher = mock.patch(target, self.breaker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.mentor = create_mentor('mentor')
+        create_meeting(self.mentor, '111', timezone.now() + timedelta(days=1))
+        self.client = authenticated_client(self.client, self.mentor.user)
+
+    def create_meeting(self):
+        started = time.perf_counter()
+        response = self.client.post(reverse('create_meeting'), {'topic': 'Office hours'}, content_type='application/json')
+        return response, time.perf_counter() - started
+
+    def test_timeouts_trip_the_breaker(self):
+        for _ in range(2):
+            response, elapsed = self.create_meeting()
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('Retry-After', response)
+            self.assertGreaterEqual(elapsed, 0.2)
+            self.assertLess(elapsed, 2)
+        self.assertEqual(self.breaker.states()['create_meeting']['state'], 'open')
+        self.assertEqual(self.server.calls['faulted'], 2)
+
+        # Open: fails fast without waiting on Zoom
+        response, elapsed = self.create_meeting()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertLess(elapsed, 0.2)
+        self.assertEqual(self.server.calls['faulted'], 2)
+
+        # Listings come from the database and do not need Zoom
+        response = self.client.get(reverse('list_meetings'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([meeting['meeting_id'] for meeting in response.json()['meetings']], ['111'])
+        self.assertTrue(self.client.get(reverse('zoom_status')).json()['degraded'])
+
+
+@override_settings(ZOOM_WEBHOOK_SECRET='webhook-secret')
+class WebhookReplayTests(TransactionTestCase):
+    """Zoom redelivers webhooks; each recording.completed must take effect once"""
+
+    def setUp(self):
+        self.mentor = create_mentor('mentor', students=2)
+        self.meeting = create_meeting(self.mentor, '987654321', students=self.mentor.students.all())
+
+    def completed_event(self, event_ts):
+        return json.dumps({
+            'event': 'recording.completed',
+            'event_ts': event_ts,
+            'payload': {'object': {'id': self.meeting.meeting_id, 'recording_files': [
+                {'id': 'file-video', 'file_type': 'MP4', 'recording_type': 'shared_screen_with_speaker_view',
+                 'download_url': 'https://zoom.us/rec/download/video', 'file_size': 5000000, 'duration': 3600},
+                {'id': 'file-audio', 'file_type': 'M4A', 'recording_type': 'audio_only',
+                 'download_url': 'https://zoom.us/rec/download/audio', 'file_size': 400000, 'duration': 3600},
+            ]}},
+        })
+
+    def deliver(self, body):
+        timestamp = str(int(time.time()))
+        signature = 'v0=' + hmac.new(b'webhook-secret', f'v0:{timestamp}:{body}'.encode(), hashlib.sha256).hexdigest()
+        response = self.client.post(reverse('recording_webhook'), body, content_type='application/json', headers={
+            'X-Zm-Signature': signature, 'X-Zm-Request-Timestamp': timestamp
+        })
+        self.assertEqual(response.status_code, 200)
+
+    def process(self):
+        processor = WebhookEventProcessor(concurrency=1)
+        try:
+            while processor.process_batch():
+                pass
+        finally:
+            # The worker thread's connection would keep the test database from being dropped
+            processor.pool.submit(connections.close_all).result()
+            processor.close()
+
+    def state(self):
+        return {
+            'recordings': sorted(Recording.objects.values_list('zoom_file_id', flat=True)),
+            'emails': EmailOutbox.objects.count(),
+            'rollups': sorted(RecordingRollup.objects.values_list(
+                'scope', 'meeting_id', 'day', 'recording_count', 'total_bytes', 'total_duration'
+            ), key=str),
+        }
+
+    def test_replayed_recording_completed_is_applied_once(self):
+        body = self.completed_event(1792000000000)
+        for _ in range(100):
+            self.deliver(body)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+        self.process()
+        applied = self.state()
+        self.assertEqual(applied['recordings'], ['file-audio', 'file-video'])
+        # One batch: a notification per student and recording
+        self.assertEqual(applied['emails'], 4)
+        self.assertIn(('mentor', None, None, 2, 5400000, 7200), applied['rollups'])
+
+        # A late redelivery, and Zoom sending the same files again under a new event_ts
+        self.deliver(body)
+        self.deliver(self.completed_event(1792000060000))
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+        self.process()
+
+        self.assertEqual(EmailOutbox.objects.count(), 4)
+        self.assertEqual(self.state(), applied)
+        self.assertFalse(WebhookEvent.objects.exclude(status='processed').exists())
+
+
+class ListMeetingsQueryTests(TestCase):
+    """A page of meetings costs the same number of queries however many rows there are"""
+
+    # The JWT user, the mentor, the page of meetings and their students
+    QUERIES = 4
+
+    def setUp(self):
+        cache.clear()
+        self.mentor = create_mentor('mentor', students=3)
+        self.students = list(self.mentor.students.all())
+        self.client = authenticated_client(self.client, self.mentor.user)
+        self.meetings = 0
+
+    def add_meetings(self, count):
+        start = timezone.now()
+        for _ in range(count):
+            self.meetings += 1
+            create_meeting(
+                self.mentor, f'{self.meetings:09d}', start + timedelta(hours=self.meetings), self.students
+            )
+
+    def list_meetings(self, **params):
+        # A fresh response cache, so the request reaches the view
+        with mock.patch('meetings.response_cache.response_cache', ResponseCache()), \
+                self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse('list_meetings'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        return response.json()
+
+    def test_query_count_is_flat(self):
+        self.add_meetings(3)
+        page = self.list_meetings(page_size=10)
+        self.assertEqual(len(page['meetings']), 3)
+        self.assertIsNone(page['next'])
+
+        self.add_meetings(30)
+        page = self.list_meetings(page_size=10)
+        self.assertEqual(len(page['meetings']), 10)
+        self.assertEqual(len(page['meetings'][0]['students']), 3)
+
+        seen = [meeting['meeting_id'] for meeting in page['meetings']]
+        while page['next']:
+            page = self.list_meetings(page_size=10, cursor=page['next'])
+            seen += [meeting['meeting_id'] for meeting in page['meetings']]
+        self.assertEqual(seen, [f'{i:09d}' for i in range(1, 34)])
+
+
+class AsyncSessionTests(SimpleTestCase):
+    """Async views served through WSGI run on a loop per request, whose aiohttp session must not leak"""
+
+    def test_session_closed_with_its_loop(self):
+        async def use_session():
+            first = get_async_session()
+            self.assertIs(get_async_session(), first)
+            return first
+
+        sessions = [async_to_sync(use_session)() for _ in range(3)]
+        self.assertEqual(len({id(session) for session in sessions}), 3)
+        self.assertTrue(all(session.closed for session in sessions))
+        self.assertEqual(_sessions, {})
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """A per-process cache is a warning, and an error under check --deploy"""
+
+    def test_locmem_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([issue.id for issue in check_shared_cache(None)], ['meetings.W001'])
+            self.assertEqual([issue.id for issue in check_shared_cache_deploy(None)], ['meetings.E001'])
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379'}
+    })
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+        self.assertEqual(check_shared_cache_deploy(None), [])
+
+
+class CohortTests(TestCase):
+    """Bulk creation: parsing the cohort, partial failures and rolling back Zoom on a failed save"""
+
+    def setUp(self):
+        cache.clear()
+        self.mentor = create_mentor('mentor', students=2)
+        self.students = sorted(self.mentor.students.values_list('id', flat=True))
+        self.client = authenticated_client(self.client, self.mentor.user)
+        self.zoom = mock.Mock()
+        self.zoom.create_meeting.side_effect = self.create_in_zoom
+        patcher = mock.patch('meetings.views.ZoomClient.for_mentor', return_value=self.zoom)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def create_in_zoom(payload):
+        if payload['topic'] == 'Broken':
+            raise ZoomAPIError(400, 'Invalid field')
+        return zoom_meeting(payload, f"zoom-{payload['topic']}")
+
+    def bulk_create(self, data):
+        return self.client.post(reverse('bulk_create_meetings'), data, content_type='application/json')
+
+    def test_parse_recurrence(self):
+        specs = parse_cohort({
+            'meeting': {'topic': 'Algebra', 'start_time': '2030-01-07T10:00:00Z'},  # A Monday
+            'recurrence': {'frequency': 'weekly', 'count': 4, 'weekdays': [0, 2]},
+        })
+        self.assertEqual([spec['topic'] for spec in specs], [f'Algebra (Session {n})' for n in range(1, 5)])
+        self.assertEqual(
+            [spec['start_time'] for spec in specs],
+            ['2030-01-07T10:00:00Z', '2030-01-09T10:00:00Z', '2030-01-14T10:00:00Z', '2030-01-16T10:00:00Z']
+        )
+
+    def test_parse_rejects_missing_topics(self):
+        for data in (
+            {'meeting': {'start_time': '2030-01-07T10:00:00Z'}, 'recurrence': {'count': 2}},
+            {'meetings': [{'topic': 'Algebra'}, {'start_time': '2030-01-07T10:00:00Z'}]},
+            {'meetings': []},
+        ):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                parse_cohort(data)
+
+    def test_partial_failure(self):
+        response = self.bulk_create({
+            'meetings': [{'topic': 'Algebra'}, {'topic': 'Broken'}, {'topic': 'Geometry'}],
+            'students': self.students,
+        })
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual((body['created'], body['failed']), (2, 1))
+        self.assertEqual([result['success'] for result in body['results']], [True, False, True])
+        self.assertEqual(body['results'][1]['error'], 'Invalid field')
+
+        meetings = Meeting.objects.filter(mentor=self.mentor)
+        self.assertEqual(sorted(meetings.values_list('meeting_id', flat=True)), ['zoom-Algebra', 'zoom-Geometry'])
+        self.assertEqual(
+            sorted(Meeting.students.through.objects.values_list('meeting__meeting_id', 'student_id')),
+            [(meeting_id, student) for meeting_id in ('zoom-Algebra', 'zoom-Geometry') for student in self.students]
+        )
+        self.zoom.delete_meeting.assert_not_called()
+
+    def test_failed_save_cancels_the_zoom_meetings(self):
+        with mock.patch('meetings.views.schedule_reminders', side_effect=DatabaseError('disk full')):
+            response = self.bulk_create({
+                'meeting': {'topic': 'Algebra', 'start_time': '2030-01-07T10:00:00Z'},
+                'recurrence': {'frequency': 'daily', 'count': 3},
+                'students': self.students,
+            })
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Meeting.objects.exists())
+        self.assertFalse(Meeting.students.through.objects.exists())
+        self.assertEqual(
+            sorted(call.args[0] for call in self.zoom.delete_meeting.call_args_list),
+            [f'zoom-Algebra (Session {n})' for n in range(1, 4)]
+        )
+
+
+@override_settings(ZOOM_SDK_KEY='sdk-key', ZOOM_SDK_SECRET='sdk-secret')
+class SignatureBatchTests(TestCase):
+    """Batch signatures need a login, and host signatures need the caller's own meeting"""
+
+    def setUp(self):
+        self.mentor = create_mentor('mentor')
+        create_meeting(self.mentor, '111')
+        create_meeting(create_mentor('other'), '222')
+
+    def sign(self, *items):
+        return self.client.post(reverse('generate_signatures'), {'meetings': [
+            {'meetingNumber': meeting_number, 'role': role} for meeting_number, role in items
+        ]}, content_type='application/json')
+
+    def test_anonymous(self):
+        self.assertEqual(self.sign(('111', 0)).status_code, 401)
+
+    def test_host_signatures_for_own_meetings_only(self):
+        authenticated_client(self.client, self.mentor.user)
+        response = self.sign(('111', 1), ('222', 0), ('333', 0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['role'] for item in response.json()['signatures']], [1, 0, 0])
+
+        for meeting_number in ('222', '333'):
+            with self.subTest(meeting_number=meeting_number):
+                response = self.sign(('111', 1), (meeting_number, 1))
+                self.assertEqual(response.status_code, 403)
+                self.assertIn(meeting_number, response.json()['error'])
+
+
+class EnrollmentTests(TestCase):
+    """Enrollment changes cost a fixed number of queries and invite only the newly added pairs"""
+
+    def setUp(self):
+        self.mentor = create_mentor('mentor', students=10)
+        self.students = list(self.mentor.students.order_by('id'))
+        self.meetings = [create_meeting(self.mentor, str(100 + i)) for i in range(6)]
+        self.client = authenticated_client(self.client, self.mentor.user)
+
+    def change(self, meetings, **data):
+        response = self.client.post(reverse('change_enrollments'), {
+            'meetings': [meeting.meeting_id for meeting in meetings], **data
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return {key: response.json()[key] for key in ('added', 'removed', 'invited')}
+
+    def ids(self, students):
+        return [student.id for student in students]
+
+    def enrolled(self, meeting):
+        return sorted(meeting.students.values_list('id', flat=True))
+
+    def invited(self):
+        return sorted(EmailOutbox.objects.values_list('to_email', flat=True))
+
+    def test_query_count_does_not_grow_with_the_cohort(self):
+        with CaptureQueriesContext(connection) as small:
+            result = self.change(self.meetings[:1], add=self.ids(self.students[:2]))
+        self.assertEqual(result, {'added': 2, 'removed': 0, 'invited': 2})
+
+        with self.assertNumQueries(len(small.captured_queries)):
+            result = self.change(self.meetings[1:], add=self.ids(self.students[2:]))
+        self.assertEqual(result, {'added': 40, 'removed': 0, 'invited': 40})
+        self.assertEqual(EmailOutbox.objects.count(), 42)
+
+    def test_add_skips_enrolled_students(self):
+        meeting = self.meetings[0]
+        self.change([meeting], add=self.ids(self.students[:3]))
+        EmailOutbox.objects.all().delete()
+
+        result = self.change([meeting], add=self.ids(self.students[:5]))
+        self.assertEqual(result, {'added': 2, 'removed': 0, 'invited': 2})
+        self.assertEqual(self.invited(), sorted(student.user.email for student in self.students[3:5]))
+        self.assertEqual(self.enrolled(meeting), self.ids(self.students[:5]))
+
+    def test_remove_and_replace(self):
+        meeting = self.meetings[0]
+        self.change([meeting], add=self.ids(self.students[:3]))
+        EmailOutbox.objects.all().delete()
+
+        result = self.change([meeting], remove=self.ids(self.students[:1]))
+        self.assertEqual(result, {'added': 0, 'removed': 1, 'invited': 0})
+        self.assertEqual(self.enrolled(meeting), self.ids(self.students[1:3]))
+
+        result = self.change([meeting], students=self.ids(self.students[2:4]))
+        self.assertEqual(result, {'added': 1, 'removed': 1, 'invited': 1})
+        self.assertEqual(self.enrolled(meeting), self.ids(self.students[2:4]))
+        self.assertEqual(self.invited(), [self.students[3].user.email])
+
+        result = self.change([meeting], add=self.ids(self.students[:1]), invite=False)
+        self.assertEqual(result, {'added': 1, 'removed': 0, 'invited': 0})
+        self.assertEqual(len(self.invited()), 1)
+
+    def test_concurrently_added_pair_is_skipped(self):
+        meeting, student = self.meetings[0], self.students[0]
+        bulk_create = Enrollment.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Another request enrolls the student between the read and the insert
+            Enrollment.objects.create(meeting_id=meeting.id, student_id=student.id)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(Enrollment.objects, 'bulk_create', side_effect=racing_bulk_create) as patched:
+            self.change([meeting], add=self.ids(self.students[:2]))
+        patched.assert_called_once()
+        self.assertEqual(Enrollment.objects.filter(meeting=meeting).count(), 2)
+        self.assertEqual(self.enrolled(meeting), self.ids(self.students[:2]))
+
+    def test_unknown_students_and_meetings(self):
+        other = create_mentor('other', students=1)
+        for data in (
+            {'meetings': ['100'], 'add': [other.students.get().id]},
+            {'meetings': ['100', 'missing'], 'add': self.ids(self.students[:1])},
+            {'meetings': ['100'], 'add': self.ids(self.students[:1]), 'remove': self.ids(self.students[:1])},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post(reverse('change_enrollments'), data, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Enrollment.objects.exists())
+
+
+class AttendanceTests(TestCase):
+    """Merging participant spans into attendance, and the report queries"""
+
+    START = datetime(2030, 1, 7, 10, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.mentor = create_mentor('mentor', students=4)
+        self.students = {student.user.username: student for student in self.mentor.students.select_related('user')}
+        self.meeting = self.create_attended_meeting('555')
+        self.client = authenticated_client(self.client, self.mentor.user)
+
+    def at(self, time):
+        hours, minutes = map(int, time.split(':'))
+        return self.START.replace(hour=hours, minute=minutes)
+
+    def create_attended_meeting(self, meeting_id, start=None, students=('mentor-student-0', 'mentor-student-1')):
+        meeting = create_meeting(
+            self.mentor, meeting_id, start or self.START, [self.students[username] for username in students]
+        )
+        self.zoom_meeting = ZoomMeeting.objects.create(
+            topic=meeting.topic, start_time=meeting.start_time, duration=meeting.duration, meeting_id=meeting_id,
+            host=self.mentor.user
+        )
+        return meeting
+
+    def event(self, username, participant_id, event, time):
+        ParticipantEvent.objects.create(
+            meeting=self.zoom_meeting, user=self.students[username].user if username else None, event=event,
+            participant_id=participant_id, occurred_at=self.at(time),
+            dedup_key=f'{self.zoom_meeting.meeting_id}:{participant_id}:{event}:{time}'
+        )
+
+    def attend(self):
+        # Laptop and phone overlapping: one stretch from 10:05 to 10:50
+        self.event('mentor-student-0', 'laptop', 'joined', '10:05')
+        self.event('mentor-student-0', 'phone', 'joined', '10:30')
+        self.event('mentor-student-0', 'laptop', 'left', '10:40')
+        self.event('mentor-student-0', 'phone', 'left', '10:50')
+        # Early, a gap, and a rejoin whose leave never arrived: closed at the meeting's last event (10:58)
+        self.event('mentor-student-1', 'tablet', 'joined', '09:55')
+        self.event('mentor-student-1', 'tablet', 'left', '10:10')
+        self.event('mentor-student-1', 'tablet', 'joined', '10:20')
+        # Back-to-back connections make one stretch; not enrolled
+        self.event('mentor-student-2', 'desk-1', 'joined', '10:00')
+        self.event('mentor-student-2', 'desk-1', 'left', '10:30')
+        self.event('mentor-student-2', 'desk-2', 'joined', '10:30')
+        self.event('mentor-student-2', 'desk-2', 'left', '10:58')
+        # Guests have no user and are left out
+        self.event(None, 'guest', 'joined', '10:00')
+        self.event(None, 'guest', 'left', '10:15')
+
+    # (attended_seconds, sessions, late_seconds, left_early_seconds, first_joined_at, last_left_at)
+    EXPECTED = {
+        'mentor-student-0': (45 * 60, 1, 5 * 60, 10 * 60, '10:05', '10:50'),
+        'mentor-student-1': (15 * 60 + 38 * 60, 2, 0, 2 * 60, '09:55', '10:58'),
+        'mentor-student-2': (58 * 60, 1, 0, 2 * 60, '10:00', '10:58'),
+    }
+
+    def summarized(self, rows):
+        return {
+            row.user.username: (
+                row.attended_seconds, row.sessions, row.late_seconds, row.left_early_seconds,
+                row.first_joined_at.strftime('%H:%M'), row.last_left_at.strftime('%H:%M'),
+            )
+            for row in rows
+        }
+
+    def test_merge_rules(self):
+        self.attend()
+        self.assertEqual(self.summarized(summarize_events([self.meeting], timezone.now())), self.EXPECTED)
+
+    def test_refresh_matches_the_merge_rules(self):
+        # The windowed SQL on PostgreSQL, summarize_events elsewhere
+        self.attend()
+        self.assertEqual(refresh_meetings([self.meeting]), 3)
+        self.assertEqual(self.summarized(AttendanceSummary.objects.select_related('user')), self.EXPECTED)
+
+    def test_meeting_report_query_count(self):
+        self.attend()
+        refresh_meetings([self.meeting])
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(reverse('meeting_attendance', args=[self.meeting.meeting_id]))
+        self.assertEqual((response.json()['enrolled'], response.json()['attended']), (2, 3))
+
+        self.meeting.students.set(self.students.values())
+        for username in ('mentor-student-3', 'mentor-student-0'):
+            self.event(username, f'{username}-late', 'joined', '10:56')
+        refresh_meetings([self.meeting])
+        with self.assertNumQueries(len(small.captured_queries)):
+            response = self.client.get(reverse('meeting_attendance', args=[self.meeting.meeting_id]))
+        self.assertEqual((response.json()['enrolled'], response.json()['attended']), (4, 4))
+
+    def test_student_report_query_count(self):
+        student = self.students['mentor-student-1']
+        self.attend()
+        refresh_meetings([self.meeting])
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(reverse('student_attendance', args=[student.id]))
+        self.assertEqual((response.json()['meetings'], response.json()['attended']), (1, 1))
+
+        meetings = [self.meeting]
+        for day in range(1, 4):
+            meetings.append(self.create_attended_meeting(f'55{day}', self.START + timedelta(days=day)))
+        self.event('mentor-student-1', 'tablet-3', 'joined', '10:00')
+        refresh_meetings(meetings)
+        with self.assertNumQueries(len(small.captured_queries)):
+            response = self.client.get(reverse('student_attendance', args=[student.id]))
+        self.assertEqual((response.json()['meetings'], response.json()['attended']), (4, 2))
+
+
+class RecordingRollupTests(TestCase):
+    """Rollups kept incrementally as recordings come and go, and recomputed by the backfill"""
+
+    DAY = datetime(2030, 1, 7, 12, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+        self.mentor = create_mentor('mentor')
+        self.client = authenticated_client(self.client, self.mentor.user)
+        self.lecture = create_meeting(self.mentor, '601')
+        self.lab = create_meeting(self.mentor, '602')
+        self.first = self.record(self.lecture, 'file-1', 1000, 60, self.DAY)
+        self.second = self.record(self.lecture, None, 2000, 120, self.DAY + timedelta(days=1))
+        self.third = self.record(self.lab, 'file-3', 4000, 300, self.DAY)
+
+    def record(self, meeting, zoom_file_id, file_size, duration, created_at):
+        recording = Recording.objects.create(
+            meeting=meeting, zoom_file_id=zoom_file_id, recording_url='https://zoom.us/rec/1', recording_type='video',
+            file_size=file_size, duration=duration
+        )
+        # created_at is set on insert; the rollups count the day it ends up with
+        Recording.objects.filter(id=recording.id).update(created_at=created_at)
+        recording = Recording.objects.select_related('meeting').get(id=recording.id)
+        add_recordings([recording])
+        return recording
+
+    def rollups(self):
+        return {
+            (rollup.scope, rollup.meeting_id, rollup.day): (
+                rollup.recording_count, rollup.total_bytes, rollup.total_duration
+            )
+            for rollup in RecordingRollup.objects.filter(mentor=self.mentor, recording_count__gt=0)
+        }
+
+    def file_sizes(self):
+        return {meeting_id: size or 0 for meeting_id, size in Meeting.objects.values_list('id', 'recording_file_size')}
+
+    def test_delete_recording_updates_every_scope(self):
+        zoom = mock.Mock()
+        with mock.patch('meetings.views.ZoomClient.for_mentor', return_value=zoom):
+            response = self.client.delete(reverse('delete_recording', args=[self.first.id]))
+        self.assertEqual(response.status_code, 200)
+        zoom.delete_recording.assert_called_once_with('601', 'file-1')
+
+        day, next_day = self.DAY.date(), self.DAY.date() + timedelta(days=1)
+        self.assertEqual(self.rollups(), {
+            ('mentor', None, None): (2, 6000, 420),
+            ('meeting', self.lecture.id, None): (1, 2000, 120),
+            ('meeting', self.lab.id, None): (1, 4000, 300),
+            ('day', None, day): (1, 4000, 300),
+            ('day', None, next_day): (1, 2000, 120),
+        })
+        self.assertEqual(self.file_sizes(), {self.lecture.id: 2000, self.lab.id: 4000})
+
+        # Never uploaded to Zoom, so only deleted here
+        with mock.patch('meetings.views.ZoomClient.for_mentor', return_value=zoom):
+            self.client.delete(reverse('delete_recording', args=[self.second.id]))
+        zoom.delete_recording.assert_called_once()
+        self.assertNotIn(('day', None, next_day), self.rollups())
+        self.assertEqual(self.rollups()['mentor', None, None], (1, 4000, 300))
+        self.assertEqual(self.file_sizes(), {self.lecture.id: 0, self.lab.id: 4000})
+
+    def test_deleting_twice_subtracts_once(self):
+        self.assertEqual(delete_recordings(Recording.objects.filter(id=self.third.id)), 1)
+        self.assertEqual(delete_recordings(Recording.objects.filter(id=self.third.id)), 0)
+        self.assertEqual(self.rollups()['mentor', None, None], (2, 3000, 180))
+
+    def test_backfill_reproduces_the_incremental_rows(self):
+        delete_recordings(Recording.objects.filter(id=self.second.id))
+        self.record(self.lab, 'file-4', 500, 30, self.DAY + timedelta(days=2))
+        incremental, file_sizes = self.rollups(), self.file_sizes()
+
+        RecordingRollup.objects.update(recording_count=0, total_bytes=0, total_duration=0)
+        Meeting.objects.update(recording_file_size=None)
+        self.assertEqual(backfill_rollups([self.mentor.id]), len(incremental))
+        self.assertEqual(self.rollups(), incremental)
+        self.assertEqual(self.file_sizes(), file_sizes)
+
+
+class TimingWheelTests(SimpleTestCase):
+
+    def test_items_fire_at_their_tick(self):
+        wheel = TimingWheel(tick=1, slots=10, now=1000)
+        wheel.add(1003, 'soon')
+        wheel.add(1005, 'later')
+        # Shares a slot with 'later', one revolution further on
+        wheel.add(1015, 'next revolution')
+        wheel.add(990, 'overdue')
+        self.assertEqual(wheel.size, 4)
+
+        self.assertEqual(wheel.advance(1000), ['overdue'])
+        self.assertEqual(wheel.advance(1004.5), ['soon'])
+        self.assertEqual(wheel.advance(1005), ['later'])
+        self.assertEqual(wheel.advance(1014), [])
+        self.assertEqual(wheel.advance(1015), ['next revolution'])
+        self.assertEqual((wheel.size, wheel.next_due()), (0, None))
+
+    def test_advancing_past_a_revolution(self):
+        wheel = TimingWheel(tick=1, slots=10, now=1000)
+        wheel.add(1002, 'a')
+        wheel.add(1008, 'b')
+        self.assertEqual(sorted(wheel.advance(1100)), ['a', 'b'])
+
+
+class ReminderSchedulerTests(TestCase):
+    """Scheduling reminder rows, sending them in bulk and moving them with the meeting"""
+
+    def setUp(self):
+        self.mentor = create_mentor('mentor', students=2)
+        self.students = list(self.mentor.students.all())
+
+    def test_schedule_skips_passed_offsets(self):
+        start = timezone.now() + timedelta(hours=2)
+        meeting = create_meeting(self.mentor, '701', start)
+        schedule_reminders([meeting])
+        self.assertEqual(
+            sorted(ReminderSchedule.objects.values_list('offset_minutes', 'fire_at')),
+            [(5, start - timedelta(minutes=5)), (60, start - timedelta(hours=1))],
+        )
+
+    def test_due_reminders_are_sent_in_one_batch(self):
+        now = timezone.now()
+        meetings = [
+            create_meeting(self.mentor, f'70{i}', now + timedelta(minutes=30 + i), self.students) for i in range(3)
+        ]
+        for meeting in meetings:
+            # Due 24 hours before, fired late: the scheduler was down
+            ReminderSchedule.objects.create(meeting=meeting, offset_minutes=24 * 60,
+                                            fire_at=meeting.start_time - timedelta(days=1))
+        ReminderSchedule.objects.create(meeting=meetings[0], offset_minutes=5,
+                                        fire_at=meetings[0].start_time - timedelta(minutes=5))
+
+        scheduler = ReminderScheduler(horizon=600, refresh=60)
+        self.assertEqual(scheduler.load(), 3)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(scheduler.fire_due(), 3)
+
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE') and 'meetings_reminderschedule' in query['sql'].split('SET')[0]]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(ReminderSchedule.objects.filter(sent_at__isnull=True).count(), 1)
+        # The 5-minute reminder of the first meeting is still pending
+        self.assertEqual(list(Meeting.objects.filter(reminder_sent=True).order_by('meeting_id')
+                              .values_list('meeting_id', flat=True)), ['701', '702'])
+
+        self.assertEqual(EmailOutbox.objects.count(), 6)
+        self.assertEqual(
+            sorted(set(EmailOutbox.objects.values_list('subject', flat=True))),
+            [f'Reminder: Meeting 70{i} starts in {30 + i} minutes' for i in range(3)],
+        )
+        self.assertIn('starts in 30 minutes.', EmailOutbox.objects.filter(subject__contains='700').first().body)
+
+    def test_start_time_change_reschedules_pending_reminders(self):
+        start = timezone.now() + timedelta(days=2)
+        meeting = create_meeting(self.mentor, '701', start)
+        schedule_reminders([meeting], [24 * 60, 60])
+        ReminderSchedule.objects.filter(offset_minutes=24 * 60).update(sent_at=timezone.now())
+
+        moved = start + timedelta(hours=3)
+        with mock.patch('meetings.views.ZoomClient.for_mentor') as for_mentor:
+            response = self.client.put(reverse('update_meeting', args=['701']),
+                                       {'start_time': moved.isoformat()}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        for_mentor.return_value.update_meeting.assert_called_once()
+
+        # The sent reminder stays as it was; the pending one follows the meeting
+        self.assertEqual(
+            sorted((reminder.offset_minutes, reminder.fire_at, reminder.sent_at is None)
+                   for reminder in ReminderSchedule.objects.all()),
+            [(60, moved - timedelta(hours=1), True), (24 * 60, start - timedelta(days=1), False)],
+        )
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping moves the clock instead of waiting"""
+
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ZoomRateLimiterTests(SimpleTestCase):
+    """Waiting for a slot, backing off on Zoom's headers and giving up past the deadline"""
+
+    def setUp(self):
+        cache.clear()
+        self.clock = FakeClock(1000.25)
+        patcher = mock.patch('meetings.ratelimit.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = ZoomRateLimiter(rate=2, max_wait=10)
+
+    def test_waits_for_the_next_window(self):
+        self.limiter.acquire('account')
+        self.limiter.acquire('account')
+        self.assertEqual(self.clock.sleeps, [])
+
+        self.limiter.acquire('account')
+        self.assertEqual(len(self.clock.sleeps), 1)
+        # The rest of the window, plus up to 50ms of jitter
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.75, delta=0.05)
+        self.assertGreaterEqual(self.clock.now, 1001)
+
+    def test_429_blocks_until_retry_after(self):
+        self.assertEqual(self.limiter.observe('account', 429, {'Retry-After': '3'}), 3)
+        # Shared through the cache with the other processes
+        other = ZoomRateLimiter(rate=2, max_wait=10)
+        self.assertEqual(other.try_acquire('account'), 3)
+        self.assertEqual(other.try_acquire('other-account'), 0)
+
+        self.limiter.acquire('account')
+        self.assertEqual(self.clock.sleeps, [3])
+
+    def test_retry_after_as_a_date(self):
+        retry_at = formatdate(1010, usegmt=True)
+        self.assertEqual(self.limiter.observe('account', 429, {'Retry-After': retry_at}), 9.75)
+
+    def test_exhausted_quota_blocks_the_account(self):
+        headers = {'X-RateLimit-Limit': '30', 'X-RateLimit-Remaining': '0', 'X-RateLimit-Category': 'Light'}
+        # Not a 429, so the call that saw it is not retried
+        self.assertIsNone(self.limiter.observe('account', 200, headers))
+        self.assertEqual(cache.get('zoom:ratelimit:account:blocked'), 1001)
+        self.assertEqual(ZoomRateLimiter(rate=2).try_acquire('account'), 0.75)
+
+        quotas = self.limiter.quotas(['account'])['account']
+        self.assertEqual((quotas['quota']['remaining'], quotas['blocked_until']), ('0', 1001))
+
+    def test_raises_past_the_deadline(self):
+        limiter = ZoomRateLimiter(rate=2, max_wait=2)
+        limiter.observe('account', 429, {'Retry-After': '30'})
+        with self.assertRaises(ZoomRateLimited) as raised:
+            limiter.acquire('account')
+        self.assertEqual((raised.exception.account_id, raised.exception.retry_after), ('account', 30))
+        # Gave up straight away rather than sleeping first
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    """locmem backend counting its connections, and refusing addresses at bounce.example.com"""
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.endswith('@bounce.example.com') for address in message.to):
+                raise ConnectionError('Recipient refused')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='meetings.tests.CountingEmailBackend', EMAIL_OUTBOX_RETRY_BACKOFF=30)
+class OutboxTests(TestCase):
+    """Claiming due emails, sending a batch over one connection and backing off after failures"""
+
+    def setUp(self):
+        CountingEmailBackend.opened = 0
+        self.worker = OutboxWorker(batch_size=10, max_attempts=3)
+
+    def enqueue(self, *addresses):
+        return enqueue([make_email(address, f'Hello {address}', 'Body') for address in addresses])
+
+    def test_batch_is_sent_over_one_connection(self):
+        self.enqueue(*(f'student-{i}@example.com' for i in range(5)))
+        self.assertEqual(self.worker.process_batch(), 5)
+
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         [f'student-{i}@example.com' for i in range(5)])
+        self.assertEqual(EmailOutbox.objects.filter(status='sent', sent_at__isnull=False).count(), 5)
+        self.assertEqual(self.worker.process_batch(), 0)
+
+    def test_claimed_rows_are_leased(self):
+        self.enqueue('a@example.com', 'b@example.com')
+        claimed = self.worker.claim()
+        self.assertEqual(len(claimed), 2)
+        # Held by the first claim until its lease runs out
+        self.assertEqual(self.worker.claim(), [])
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(len(self.worker.claim()), 2)
+
+    def test_failed_send_backs_off(self):
+        self.enqueue('ok@example.com', 'someone@bounce.example.com', 'other@example.com')
+        before = timezone.now()
+        self.worker.process_batch()
+
+        failed = EmailOutbox.objects.get(to_email='someone@bounce.example.com')
+        self.assertEqual((failed.status, failed.attempts, failed.last_error), ('pending', 1, 'Recipient refused'))
+        # 30 seconds with up to 20% jitter
+        self.assertGreaterEqual(failed.next_attempt_at, before + timedelta(seconds=24))
+        self.assertLessEqual(failed.next_attempt_at, timezone.now() + timedelta(seconds=36))
+        # The rest of the batch went out over a reopened connection
+        self.assertEqual(EmailOutbox.objects.filter(status='sent').count(), 2)
+        self.assertEqual(CountingEmailBackend.opened, 2)
+
+        for _ in range(2):
+            EmailOutbox.objects.filter(id=failed.id).update(next_attempt_at=timezone.now())
+            self.worker.process_batch()
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), ('failed', 3))
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class OutboxClaimTests(TransactionTestCase):
+    """Concurrent workers skip the rows another one has locked"""
+
+    def test_locked_rows_are_skipped(self):
+        emails = enqueue([make_email(f'student-{i}@example.com', 'Hello', 'Body') for i in range(4)])
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_first_two():
+            try:
+                with transaction.atomic():
+                    list(EmailOutbox.objects.select_for_update().filter(id__in=[emails[0].id, emails[1].id]))
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_first_two)
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            claimed = OutboxWorker(batch_size=10).claim()
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(sorted(email.id for email in claimed), [emails[2].id, emails[3].id])
+
+
+class FakeSyncClient:
+    """ZoomClient serving fixed meetings and recordings a page of two at a time, recording what it was asked"""
+
+    def __init__(self, meetings, recordings):
+        self.meetings = meetings
+        self.recordings = recordings
+        self.calls = []
+
+    def page(self, items, page_token):
+        start = int(page_token or 0)
+        return {'meetings': items[start:start + 2], 'next_page_token': str(start + 2) if start + 2 < len(items) else ''}
+
+    def list_meetings(self, page_token='', **params):
+        self.calls.append(('list_meetings', params.get('from')))
+        return self.page(self.meetings, page_token)
+
+    def list_recordings(self, from_date, to_date, page_token=''):
+        self.calls.append(('list_recordings', from_date, to_date))
+        return self.page(self.recordings, page_token)
+
+
+class AccountSyncTests(TestCase):
+    """Reconciling an account applies each change once and resumes from its checkpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.mentor = create_mentor('mentor')
+        self.now = timezone.now().replace(microsecond=0)
+        self.renamed = create_meeting(self.mentor, '801', self.now + timedelta(days=2))
+        self.deleted = create_meeting(self.mentor, '802', self.now + timedelta(days=3))
+        self.client = FakeSyncClient(
+            meetings=[
+                self.zoom_meeting('801', 'Renamed in Zoom', self.now + timedelta(days=2)),
+                self.zoom_meeting('803', 'Created in Zoom', self.now + timedelta(days=4)),
+                self.zoom_meeting('804', 'Held last week', self.now - timedelta(days=7)),
+            ],
+            recordings=[{'id': '804', 'recording_files': [
+                {'id': 'file-1', 'file_type': 'MP4', 'file_size': 1000, 'download_url': 'https://zoom.us/rec/1'},
+                {'id': 'file-2', 'file_type': 'M4A', 'file_size': 200, 'download_url': 'https://zoom.us/rec/2'},
+                {'id': 'file-3', 'file_type': 'MP4', 'status': 'processing'},
+            ]}],
+        )
+
+    @staticmethod
+    def zoom_meeting(meeting_id, topic, start_time):
+        return {'id': int(meeting_id), 'topic': topic, 'type': 2, 'duration': 60, 'timezone': 'UTC',
+                'start_time': start_time.strftime('%Y-%m-%dT%H:%M:%SZ'), 'join_url': f'https://zoom.us/j/{meeting_id}'}
+
+    def sync(self):
+        self.client.calls.clear()
+        return AccountSync(self.mentor, client=self.client, since_days=30).run()
+
+    def state(self):
+        return {
+            'meetings': sorted(Meeting.objects.values_list('meeting_id', 'topic', 'is_active', 'recording_status')),
+            'recordings': sorted(
+                Recording.objects.values_list('meeting__meeting_id', 'zoom_file_id', 'recording_type')
+            ),
+            'reminders': ReminderSchedule.objects.count(),
+            'bytes': RecordingRollup.objects.get(scope='mentor').total_bytes,
+        }
+
+    def test_changes_are_applied_once_and_the_checkpoint_advances(self):
+        today = timezone.now().date()
+        stats = self.sync()
+        self.assertEqual({name: count for name, count in stats.items() if name != 'pages'}, {
+            'meetings_created': 2, 'meetings_updated': 1, 'meetings_deactivated': 1,
+            'recordings_created': 2, 'meetings_completed': 1,
+        })
+        self.assertEqual(self.client.calls, [
+            ('list_meetings', None), ('list_meetings', None),
+            ('list_recordings', today - timedelta(days=30), today),
+        ])
+        applied = self.state()
+        self.assertEqual(applied['meetings'], [
+            ('801', 'Renamed in Zoom', True, 'pending'),
+            ('802', 'Meeting 802', False, 'pending'),
+            ('803', 'Created in Zoom', True, 'pending'),
+            ('804', 'Held last week', True, 'completed'),
+        ])
+        self.assertEqual(applied['recordings'], [('804', 'file-1', 'video'), ('804', 'file-2', 'audio')])
+        self.assertEqual(applied['bytes'], 1200)
+
+        checkpoint = ZoomSyncCheckpoint.objects.get(account_id='mentor-account')
+        self.assertEqual((checkpoint.meetings_from, checkpoint.recordings_from), (today - OVERLAP, today - OVERLAP))
+        self.assertEqual((checkpoint.last_error, checkpoint.stats['recordings_created']), ('', 2))
+
+        # Nothing changed in Zoom: the second run only looks back to the checkpoint and applies nothing
+        stats = self.sync()
+        self.assertEqual({name: count for name, count in stats.items() if name != 'pages'}, {})
+        self.assertEqual(self.client.calls, [
+            ('list_meetings', (today - OVERLAP).isoformat()), ('list_meetings', (today - OVERLAP).isoformat()),
+            ('list_recordings', today - OVERLAP, today),
+        ])
+        self.assertEqual(self.state(), applied)
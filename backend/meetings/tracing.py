@@ -0,0 +1,299 @@
+"""Tracing of outbound Zoom calls, exported as OpenTelemetry spans.
+
+Every call the Zoom clients make, from the OAuth token fetch to a
+recording download, is one CLIENT span named after Zoom's endpoint
+template (``PATCH /meetings/{meetingId}``), following the OpenTelemetry
+HTTP conventions. A span covers the whole call: waiting for a rate limit
+slot, the token refresh after a 401 and every resend, which
+``http.request.resend_count`` counts. It carries the response status and
+body size, the ``error.type`` of a failed call, and the endpoint and Zoom
+account in ``zoom.endpoint`` and ``zoom.account_id``. The token fetch a
+call needs is a child span of it, in the same trace.
+
+Spans are queued in memory and exported in batches by a background thread
+every ZOOM_TRACE_EXPORT_INTERVAL seconds, as OTLP/JSON: appended as one
+line per batch to ZOOM_TRACE_FILE (the layout of the OpenTelemetry
+Collector's file exporter) and/or POSTed to ZOOM_TRACE_ENDPOINT, an
+OTLP/HTTP traces URL such as ``http://collector:4318/v1/traces``. Tracing
+is off while neither is set. When the exporter falls ZOOM_TRACE_QUEUE_SIZE
+spans behind, new spans are dropped rather than slowing the calls down.
+
+``manage.py zoom_call_report`` reads the file back and prints latency
+percentiles per endpoint.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Zoom's path templates for the endpoint names the clients use
+ENDPOINT_TEMPLATES = {
+    'oauth': '/oauth/token',
+    'create_meeting': '/users/{userId}/meetings',
+    'list_meetings': '/users/{userId}/meetings',
+    'update_meeting': '/meetings/{meetingId}',
+    'delete_meeting': '/meetings/{meetingId}',
+    'list_recordings': '/users/{userId}/recordings',
+    'get_meeting_recordings': '/meetings/{meetingId}/recordings',
+    'delete_recording': '/meetings/{meetingId}/recordings/{recordingId}',
+    'download': '/rec/download/{fileId}',
+}
+SCOPE_NAME = 'meetings.zoom'
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+
+current_span = ContextVar('current_span', default=None)
+
+
+def attribute(key, value):
+    """An OTLP/JSON key-value pair; integers are strings, as in the protobuf JSON mapping"""
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+def content_length(headers):
+    """A response's Content-Length as an int, or None"""
+    try:
+        return int(headers['Content-Length'])
+    except (KeyError, ValueError):
+        return None
+
+
+class ZoomSpan:
+    """One outbound Zoom call; use as a context manager around it"""
+    __slots__ = ('endpoint', 'method', 'account_id', 'attempts', 'status_code', 'response_bytes',
+                 'error', 'trace_id', 'span_id', 'parent_id', 'token', 'start_ns', 'started')
+
+    def __init__(self, endpoint, method, account_id):
+        self.endpoint = endpoint
+        self.method = method
+        self.account_id = account_id
+        self.attempts = 0
+        self.status_code = None
+        self.response_bytes = None
+        self.error = None
+
+    def __enter__(self):
+        parent = current_span.get()
+        if parent is None:
+            self.trace_id, self.parent_id = os.urandom(16).hex(), None
+        else:
+            self.trace_id, self.parent_id = parent.trace_id, parent.span_id
+        self.span_id = os.urandom(8).hex()
+        self.token = current_span.set(self)
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.started
+        current_span.reset(self.token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        elif self.status_code is not None and self.status_code >= 400:
+            self.error = str(self.status_code)
+        exporter = get_exporter()
+        if exporter is not None:
+            exporter.add(self.to_otlp(self.start_ns + duration))
+        return False
+
+    def attempt(self):
+        """Count one HTTP request sent for this call"""
+        self.attempts += 1
+
+    def record(self, status_code, response_bytes=None):
+        """Note the latest response; ``response_bytes`` is None when the size is not known"""
+        self.status_code = status_code
+        self.response_bytes = response_bytes
+
+    @property
+    def name(self):
+        template = ENDPOINT_TEMPLATES.get(self.endpoint)
+        return f'{self.method} {template}' if template else self.method
+
+    def to_otlp(self, end_ns):
+        attributes = [
+            attribute('http.request.method', self.method),
+            attribute('zoom.endpoint', self.endpoint),
+            attribute('zoom.account_id', self.account_id or ''),
+        ]
+        if self.endpoint in ENDPOINT_TEMPLATES:
+            attributes.append(attribute('url.template', ENDPOINT_TEMPLATES[self.endpoint]))
+        if self.attempts > 1:
+            attributes.append(attribute('http.request.resend_count', self.attempts - 1))
+        if self.status_code is not None:
+            attributes.append(attribute('http.response.status_code', self.status_code))
+        if self.response_bytes is not None:
+            attributes.append(attribute('http.response.body.size', self.response_bytes))
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KIND_CLIENT,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(end_ns),
+            'attributes': attributes,
+        }
+        if self.parent_id is not None:
+            span['parentSpanId'] = self.parent_id
+        if self.error is not None:
+            attributes.append(attribute('error.type', self.error))
+            span['status'] = {'code': STATUS_CODE_ERROR}
+        return span
+
+
+class SpanExporter:
+    """Batches finished spans and writes them out from a background thread"""
+
+    def __init__(self, path=None, endpoint=None, interval=2.0, batch_size=512, queue_size=10000,
+                 max_file_bytes=100 * 1024 * 1024, service_name='zoom-backend'):
+        self.path = path
+        self.endpoint = endpoint
+        self.interval = interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_file_bytes = max_file_bytes
+        self.resource = {'attributes': [
+            attribute('service.name', service_name), attribute('process.pid', os.getpid())
+        ]}
+        self.spans = deque()
+        self.lock = threading.Lock()
+        self.export_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pid = os.getpid()
+        self.stats = Counter()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='zoom-trace-export', daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+
+    def add(self, span):
+        with self.lock:
+            if len(self.spans) >= self.queue_size:
+                self.stats['dropped'] += 1
+                return
+            self.spans.append(span)
+            full = len(self.spans) >= self.batch_size
+        if full:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Export every queued span now"""
+        with self.export_lock:
+            while True:
+                with self.lock:
+                    batch = [self.spans.popleft() for _ in range(min(self.batch_size, len(self.spans)))]
+                if not batch:
+                    return
+                self.export(batch)
+
+    def export(self, spans):
+        payload = json.dumps({'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': spans}],
+        }]}, separators=(',', ':'))
+        try:
+            if self.path:
+                self.append(payload)
+            if self.endpoint:
+                response = requests.post(
+                    self.endpoint, data=payload, headers={'Content-Type': 'application/json'}, timeout=5
+                )
+                response.raise_for_status()
+        except (OSError, requests.RequestException) as e:
+            self.stats['failed'] += len(spans)
+            logger.error(f"Error exporting Zoom call spans: {str(e)}")
+        else:
+            self.stats['exported'] += len(spans)
+
+    def append(self, payload):
+        """Append one batch to the trace file, moving a full file aside to ``<path>.1`` first"""
+        with open(f'{self.path}.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if os.path.getsize(self.path) >= self.max_file_bytes:
+                    os.replace(self.path, f'{self.path}.1')
+            except FileNotFoundError:
+                pass
+            with open(self.path, 'a') as f:
+                f.write(payload + '\n')
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """This process's SpanExporter, or None when tracing is off; replaced after a fork"""
+    global _exporter
+    if not (settings.ZOOM_TRACE_FILE or settings.ZOOM_TRACE_ENDPOINT):
+        return None
+    if _exporter is None or _exporter.pid != os.getpid():
+        with _exporter_lock:
+            if _exporter is None or _exporter.pid != os.getpid():
+                _exporter = SpanExporter(
+                    path=settings.ZOOM_TRACE_FILE,
+                    endpoint=settings.ZOOM_TRACE_ENDPOINT,
+                    interval=settings.ZOOM_TRACE_EXPORT_INTERVAL,
+                    queue_size=settings.ZOOM_TRACE_QUEUE_SIZE,
+                    max_file_bytes=settings.ZOOM_TRACE_FILE_MAX_BYTES,
+                    service_name=settings.ZOOM_TRACE_SERVICE_NAME,
+                )
+                _exporter.start()
+    return _exporter
+
+
+def read_spans(paths, start_ns=0, end_ns=None):
+    """Spans in the OTLP/JSON files ``paths`` that ended in ``[start_ns, end_ns)``
+
+    Yields ``(name, duration in seconds, attributes, failed)``; attributes
+    are a plain dict. Lines that are not valid JSON are skipped.
+    """
+    for path in paths:
+        try:
+            f = open(path)
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                for resource_spans in request.get('resourceSpans', ()):
+                    for scope_spans in resource_spans.get('scopeSpans', ()):
+                        for span in scope_spans.get('spans', ()):
+                            ended = int(span['endTimeUnixNano'])
+                            if ended < start_ns or (end_ns is not None and ended >= end_ns):
+                                continue
+                            attributes = {
+                                item['key']: next(iter(item['value'].values()))
+                                for item in span.get('attributes', ())
+                            }
+                            yield (
+                                span['name'],
+                                (ended - int(span['startTimeUnixNano'])) / 1e9,
+                                attributes,
+                                span.get('status', {}).get('code') == STATUS_CODE_ERROR,
+                            )
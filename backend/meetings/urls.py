@@ -1,6 +1,7 @@
 from django.urls import path
 from . import views
 from . import auth
+from . import async_views
 
 urlpatterns = [
     path('login/', views.login, name='login'),
@@ -9,10 +10,27 @@ urlpatterns = [
     path('test/', views.test_api, name='test_api'),
     path('list/', views.list_meetings, name='list_meetings'),
     path('create/', views.create_meeting, name='create_meeting'),
+    path('bulk-create/', views.bulk_create_meetings, name='bulk_create_meetings'),
+    path('enrollments/', views.change_enrollments, name='change_enrollments'),
     path('update/<str:meeting_id>/', views.update_meeting, name='update_meeting'),
     path('delete/<str:meeting_id>/', views.delete_meeting, name='delete_meeting'),
     path('recordings/', views.list_recordings, name='list_recordings'),
+    path('recordings/usage/', views.recording_usage, name='recording_usage'),
+    path('recordings/<int:recording_id>/stream/', async_views.stream_recording, name='stream_recording'),
     path('recordings/<str:recording_id>/', views.delete_recording, name='delete_recording'),
+    path('attendance/meetings/<str:meeting_id>/', views.meeting_attendance, name='meeting_attendance'),
+    path('attendance/students/<int:student_id>/', views.student_attendance, name='student_attendance'),
+    path('changes/', async_views.change_stream, name='change_stream'),
+    path('changes/url/', views.change_stream_url, name='change_stream_url'),
+    path('cache/stats/', views.listing_cache_stats, name='listing_cache_stats'),
+    path('zoom/status/', views.zoom_status, name='zoom_status'),
+    path('zoom/rate-limits/', views.zoom_rate_limits, name='zoom_rate_limits'),
     path('webhooks/recording/', views.handle_recording_webhook, name='recording_webhook'),
     path('signature/', views.generate_signature, name='generate_signature'),
+    path('signature/batch/', views.generate_signatures, name='generate_signatures'),
+    path('async/create/', async_views.create_meeting, name='async_create_meeting'),
+    path('async/update/<str:meeting_id>/', async_views.update_meeting, name='async_update_meeting'),
+    path('async/delete/<str:meeting_id>/', async_views.delete_meeting, name='async_delete_meeting'),
+    path('async/recordings/', async_views.list_recordings, name='async_list_recordings'),
+    path('async/recordings/<str:recording_id>/', async_views.delete_recording, name='async_delete_recording'),
 ] 
\ No newline at end of file
@@ -1,83 +1,64 @@
-from django.conf import settings
-import requests
-from datetime import datetime, timedelta
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils import timezone
-import base64
-from urllib.parse import urlencode
+import logging
 
-def get_zoom_access_token(mentor):
-    """Get a Zoom access token using mentor's account credentials."""
+from .models import Student
+from .outbox import enqueue, make_email
+from .zoom import mentor_credentials, token_manager
+
+logger = logging.getLogger(__name__)
+
+def get_zoom_access_token(mentor=None):
+    """Get a Zoom access token using mentor's account credentials.
+
+    Falls back to the global Zoom app credentials when no mentor is given.
+    Tokens are cached until shortly before they expire, see ``meetings.zoom``.
+    """
     try:
-        # Create the authorization header
-        auth_string = f"{mentor.zoom_client_id}:{mentor.zoom_client_secret}"
-        auth_bytes = auth_string.encode('ascii')
-        auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
-        
-        headers = {
-            'Authorization': f'Basic {auth_b64}',
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
-        # Prepare the request body
-        data = {
-            'grant_type': 'account_credentials',
-            'account_id': mentor.zoom_account_id
-        }
-        
-        response = requests.post(
-            'https://zoom.us/oauth/token',
-            headers=headers,
-            data=urlencode(data)
-        )
-        response.raise_for_status()
-        return response.json()['access_token']
+        return token_manager.get_token(*mentor_credentials(mentor))
     except Exception as e:
-        print(f"Error getting Zoom access token: {str(e)}")
+        logger.error(f"Error getting Zoom access token: {str(e)}")
         raise
 
 def send_meeting_invitations(meeting, student_ids):
-    """Send meeting invitations to students"""
-    try:
-        students = Student.objects.filter(id__in=student_ids)
-        for student in students:
-            # Send email to student with meeting details
-            subject = f'Meeting Invitation: {meeting.topic}'
-            message = f"""
-            Dear {student.user.username},
-            
-            You have been invited to join the following meeting:
-            
-            Topic: {meeting.topic}
-            Date: {meeting.start_time}
-            Duration: {meeting.duration} minutes
-            Join URL: {meeting.join_url}
-            Password: {meeting.password}
-            
-            Please join the meeting using the link above.
-            
-            Best regards,
-            {meeting.mentor.user.username}
-            """
-            
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [student.user.email],
-                fail_silently=False,
-            )
-    except Exception as e:
-        print(f"Error sending meeting invitations: {str(e)}")
+    """Queue meeting invitations to students (sent by the email outbox worker)"""
+    students = Student.objects.filter(id__in=student_ids).select_related('user')
+    return send_invitations([(meeting, student) for student in students])
 
-def send_recording_notification(recording):
-    """Send notification to students about available recording"""
-    try:
-        meeting = recording.meeting
-        students = meeting.students.all()
+def send_invitations(pairs):
+    """Queue one invitation per (meeting, student) pair, in a single insert"""
+    emails = []
+    for meeting, student in pairs:
+        # Send email to student with meeting details
+        subject = f'Meeting Invitation: {meeting.topic}'
+        message = f"""
+        Dear {student.user.username},
+        
+        You have been invited to join the following meeting:
+        
+        Topic: {meeting.topic}
+        Date: {meeting.start_time}
+        Duration: {meeting.duration} minutes
+        Join URL: {meeting.join_url}
+        Password: {meeting.password}
         
-        for student in students:
+        Please join the meeting using the link above.
+        
+        Best regards,
+        {meeting.mentor.user.username}
+        """
+        emails.append(make_email(student.user.email, subject, message))
+    return enqueue(emails)
+
+def send_recording_notification(recording):
+    """Queue notifications to students about an available recording"""
+    return send_recording_notifications(recording.meeting, [recording])
+
+def send_recording_notifications(meeting, recordings):
+    """Queue one notification per student and recording, in a single insert"""
+    students = meeting.students.select_related('user')
+    
+    emails = []
+    for student in students:
+        for recording in recordings:
             subject = f'Recording Available: {meeting.topic}'
             message = f"""
             Dear {student.user.username},
@@ -94,13 +75,10 @@ def send_recording_notification(recording):
             Best regards,
             {meeting.mentor.user.username}
             """
-            
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [student.user.email],
-                fail_silently=False,
-            )
-    except Exception as e:
-        print(f"Error sending recording notification: {str(e)}") 
\ No newline at end of file
+            emails.append(make_email(student.user.email, subject, message))
+    return enqueue(emails)
+
+def check_upcoming_meetings():
+    """Send every meeting reminder that is due now and return how many were sent"""
+    from .reminders import ReminderScheduler
+    return ReminderScheduler().run_once()
@@ -1,23 +1,37 @@
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.response import Response
 from django.conf import settings
-import requests
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import jwt
+import math
 import time
-from .models import Meeting, Recording, Mentor, Student
-from .utils import get_zoom_access_token, send_meeting_invitations, send_recording_notification
-import base64
-from urllib.parse import urlencode
-from django.core.mail import send_mail
+from .models import AttendanceSummary, Meeting, Recording, RecordingRollup, Mentor, Student
+from .changes import (
+    meeting_deleted_event, meeting_event, publish, recording_deleted_event, sign_changes
+)
+from .circuit import circuit_breaker
+from .cohorts import cancel_meetings, parse_cohort, provision_meetings
+from .enrollment import EnrollmentError, change_enrollment, parse_ids
+from .mirror import delete_mirror
+from .pagination import InvalidCursor, get_page_size, paginate_keyset
+from .ratelimit import rate_limiter
+from .reminders import parse_reminder_offsets, reschedule_reminders, schedule_reminders
+from .response_cache import bump_version, cached_listing, response_cache
+from .rollups import delete_recordings, get_usage, remove_meeting
+from .signatures import get_signer
+from .streaming import sign_stream
+from .webhooks import record_webhook_event, verify_webhook_signature
+from .zoom import ZoomClient, ZoomAPIError, ZoomRateLimited, ZoomUnavailable
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 import logging
 from rest_framework import status
-import hmac
-import hashlib
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -46,47 +60,63 @@ def generate_zoom_jwt_token():
     )
     return token
 
-def get_zoom_access_token(mentor=None):
-    """Get Zoom access token using account credentials"""
-    try:
-        # Zoom OAuth endpoint
-        oauth_url = 'https://zoom.us/oauth/token'
-        
-        # Use mentor credentials if provided, otherwise use global settings
-        client_id = mentor.zoom_client_id if mentor else settings.ZOOM_CLIENT_ID
-        client_secret = mentor.zoom_client_secret if mentor else settings.ZOOM_CLIENT_SECRET
-        account_id = mentor.zoom_account_id if mentor else settings.ZOOM_ACCOUNT_ID
-        
-        # Create Basic Auth header
-        credentials = f"{client_id}:{client_secret}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        
-        # Request headers
-        headers = {
-            'Authorization': f'Basic {encoded_credentials}',
-            'Content-Type': 'application/x-www-form-urlencoded'
+def build_zoom_meeting_data(data):
+    """Build the Zoom create-meeting payload from request data"""
+    meeting_type = data.get('type', 2)  # 1 for instant, 2 for scheduled
+    meeting_data = {
+        'topic': data.get('topic'),
+        'type': meeting_type,
+        'duration': data.get('duration', 60),
+        'timezone': data.get('timezone', 'UTC'),
+        'agenda': data.get('description', ''),
+        'settings': {
+            'host_video': True,
+            'participant_video': True,
+            'join_before_host': False,
+            'mute_upon_entry': True,
+            'waiting_room': True,
+            'recording_consent': True
         }
-        
-        # Request body
-        data = {
-            'grant_type': 'account_credentials',
-            'account_id': account_id
-        }
-        
-        # Make request to get access token
-        response = requests.post(
-            oauth_url,
-            headers=headers,
-            data=urlencode(data)
-        )
-        response.raise_for_status()
-        
-        token_data = response.json()
-        return token_data.get('access_token')
-        
-    except Exception as e:
-        logger.error(f"Error getting Zoom access token: {str(e)}")
-        raise
+    }
+
+    # Add start_time only for scheduled meetings
+    if meeting_type == 2 and data.get('start_time'):
+        meeting_data['start_time'] = data.get('start_time')
+    return meeting_data
+
+def meeting_fields_from_zoom(zoom_data, meeting_type):
+    """Map a Zoom meeting object onto local Meeting fields"""
+    return {
+        'topic': zoom_data['topic'],
+        'start_time': datetime.fromisoformat(zoom_data['start_time'].replace('Z', '+00:00')) if 'start_time' in zoom_data else datetime.now(),
+        'duration': int(zoom_data.get('duration', 60)),  # Ensure duration is an integer
+        'meeting_id': zoom_data['id'],
+        'join_url': zoom_data['join_url'],
+        'password': zoom_data.get('password', ''),
+        'host_email': zoom_data['host_email'],
+        'meeting_type': 'instant' if meeting_type == 1 else 'scheduled',
+        'timezone': zoom_data['timezone'],
+        'agenda': zoom_data.get('agenda', ''),
+        'settings': zoom_data.get('settings', {})
+    }
+
+RETRY_LATER_ERRORS = {
+    429: 'Zoom rate limit reached, please retry later',
+    503: 'Zoom is unavailable, please retry later',
+}
+
+def retry_later_response(error):
+    """429 or 503 telling the client when Zoom will take the call again
+
+    ``error`` is a ZoomRateLimited or a ZoomUnavailable; the latter is what
+    writes fail fast with while Zoom's circuit breaker is open.
+    """
+    retry_after = max(math.ceil(error.retry_after), 1)
+    return Response(
+        {'error': RETRY_LATER_ERRORS[error.status_code], 'retry_after': retry_after},
+        status=error.status_code,
+        headers={'Retry-After': str(retry_after)}
+    )
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -99,11 +129,32 @@ def test_api(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_listing('meetings')
 def list_meetings(request):
-    """List all meetings for the authenticated mentor"""
+    """List the authenticated mentor's meetings, a page at a time
+
+    Pages are ordered by (start_time, id); pass the returned ``next`` value
+    as ``cursor`` to fetch the following page. ``upcoming=1`` skips meetings
+    that have already started.
+    """
     try:
         mentor = Mentor.objects.get(user=request.user)
-        meetings = Meeting.objects.filter(mentor=mentor)
+        students = Prefetch(
+            'students',
+            queryset=Student.objects.select_related('user').only('id', 'user__username', 'user__email')
+        )
+        meetings = Meeting.objects.filter(mentor=mentor).only(
+            'id', 'meeting_id', 'topic', 'start_time', 'duration', 'join_url', 'password',
+            'meeting_type', 'recording_url', 'recording_status', 'is_active'
+        ).prefetch_related(students)
+        if request.query_params.get('upcoming'):
+            meetings = meetings.filter(start_time__gt=timezone.now())
+        meetings, next_cursor = paginate_keyset(
+            meetings,
+            ('start_time', 'id'),
+            cursor=request.query_params.get('cursor'),
+            page_size=get_page_size(request, settings.MEETINGS_PAGE_SIZE, settings.MEETINGS_MAX_PAGE_SIZE)
+        )
         
         meetings_data = [{
             'meeting_id': meeting.meeting_id,
@@ -123,7 +174,15 @@ def list_meetings(request):
             } for student in meeting.students.all()]
         } for meeting in meetings]
         
-        return Response(meetings_data)
+        return Response({
+            'meetings': meetings_data,
+            'next': next_cursor
+        })
+    except InvalidCursor:
+        return Response(
+            {'error': 'Invalid cursor'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     except Mentor.DoesNotExist:
         return Response(
             {'error': 'Mentor profile not found'},
@@ -168,11 +227,20 @@ def create_meeting(request):
                 {'error': 'Topic is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            reminder_offsets = parse_reminder_offsets(request.data.get('reminder_offsets'))
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Get Zoom access token using mentor credentials
+        # Zoom client authenticated with the mentor's credentials
+        zoom = ZoomClient.for_mentor(mentor)
         try:
-            access_token = get_zoom_access_token(mentor)
-            logger.info("Successfully obtained Zoom access token")
+            zoom.get_access_token()
+        except ZoomUnavailable as e:
+            return retry_later_response(e)
         except Exception as e:
             logger.error(f"Error getting Zoom access token: {str(e)}")
             return Response(
@@ -182,48 +250,21 @@ def create_meeting(request):
         
         # Prepare meeting data
         meeting_type = request.data.get('type', 2)  # 1 for instant, 2 for scheduled
-        meeting_data = {
-            'topic': request.data.get('topic'),
-            'type': meeting_type,
-            'duration': request.data.get('duration', 60),
-            'timezone': request.data.get('timezone', 'UTC'),
-            'agenda': request.data.get('description', ''),
-            'settings': {
-                'host_video': True,
-                'participant_video': True,
-                'join_before_host': False,
-                'mute_upon_entry': True,
-                'waiting_room': True,
-                'recording_consent': True
-            }
-        }
-        
-        # Add start_time only for scheduled meetings
-        if meeting_type == 2 and request.data.get('start_time'):
-            meeting_data['start_time'] = request.data.get('start_time')
-        
+        meeting_data = build_zoom_meeting_data(request.data)
         logger.info(f"Prepared meeting data: {meeting_data}")
         
         # Create meeting in Zoom
         try:
-            response = requests.post(
-                'https://api.zoom.us/v2/users/me/meetings',
-                headers={
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                },
-                json=meeting_data
-            )
-            
-            if response.status_code != 201:
-                logger.error(f"Zoom API error: {response.text}")
-                return Response(
-                    {'error': f'Failed to create meeting in Zoom: {response.text}'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            zoom_data = response.json()
+            zoom_data = zoom.create_meeting(meeting_data)
             logger.info(f"Zoom API response: {zoom_data}")
+        except (ZoomRateLimited, ZoomUnavailable) as e:
+            return retry_later_response(e)
+        except ZoomAPIError as e:
+            logger.error(f"Zoom API error: {e.message}")
+            return Response(
+                {'error': f'Failed to create meeting in Zoom: {e.message}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         except Exception as e:
             logger.error(f"Error creating meeting in Zoom: {str(e)}")
             return Response(
@@ -235,19 +276,12 @@ def create_meeting(request):
         try:
             meeting = Meeting.objects.create(
                 mentor=mentor,
-                topic=zoom_data['topic'],
-                start_time=datetime.fromisoformat(zoom_data['start_time'].replace('Z', '+00:00')) if 'start_time' in zoom_data else datetime.now(),
-                duration=int(zoom_data.get('duration', 60)),  # Ensure duration is an integer
-                meeting_id=zoom_data['id'],
-                join_url=zoom_data['join_url'],
-                password=zoom_data.get('password', ''),
-                host_email=zoom_data['host_email'],
-                meeting_type='instant' if meeting_type == 1 else 'scheduled',
-                timezone=zoom_data['timezone'],
-                agenda=zoom_data.get('agenda', ''),
-                settings=zoom_data.get('settings', {})
+                **meeting_fields_from_zoom(zoom_data, meeting_type)
             )
             
+            schedule_reminders([meeting], reminder_offsets)
+            bump_version(mentor)
+            publish(mentor, meeting_event('meeting.created', meeting))
             logger.info(f"Created meeting in database: {meeting.id}")
         except Exception as e:
             logger.error(f"Error creating meeting in database: {str(e)}")
@@ -290,18 +324,6 @@ def update_meeting(request, meeting_id):
         agenda = request.data.get('agenda', meeting.agenda)
         settings = request.data.get('settings', meeting.settings)
 
-        # Get Zoom access token
-        access_token = get_zoom_access_token()
-        
-        # Zoom API endpoint
-        url = f'https://api.zoom.us/v2/meetings/{meeting_id}'
-        
-        # Request headers
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-
         # Prepare update data
         data = {
             'topic': topic,
@@ -311,19 +333,20 @@ def update_meeting(request, meeting_id):
             'settings': settings
         }
 
-        if start_time:
+        if isinstance(start_time, str):
             try:
                 start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                data['start_time'] = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
             except ValueError:
                 return Response({
                     'success': False,
                     'error': 'Invalid start_time format. Use ISO 8601 format.'
                 }, status=400)
+        if start_time:
+            data['start_time'] = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+        start_time_changed = start_time != meeting.start_time
 
         # Make request to Zoom API
-        response = requests.patch(url, headers=headers, json=data)
-        response.raise_for_status()
+        ZoomClient.for_mentor(meeting.mentor).update_meeting(meeting_id, data)
         
         # Update local meeting object
         meeting.topic = topic
@@ -333,6 +356,10 @@ def update_meeting(request, meeting_id):
         meeting.agenda = agenda
         meeting.settings = settings
         meeting.save()
+        if start_time_changed:
+            reschedule_reminders(meeting)
+        bump_version(meeting.mentor)
+        publish(meeting.mentor, meeting_event('meeting.updated', meeting))
         
         return Response({
             'success': True,
@@ -353,6 +380,8 @@ def update_meeting(request, meeting_id):
             'success': False,
             'error': 'Meeting not found'
         }, status=404)
+    except (ZoomRateLimited, ZoomUnavailable) as e:
+        return retry_later_response(e)
     except Exception as e:
         return Response({
             'success': False,
@@ -367,24 +396,21 @@ def delete_meeting(request, meeting_id):
         mentor = Mentor.objects.get(user=request.user)
         meeting = get_object_or_404(Meeting, meeting_id=meeting_id, mentor=mentor)
         
-        # Get Zoom access token
-        access_token = get_zoom_access_token(mentor)
-        
         # Delete meeting from Zoom
-        response = requests.delete(
-            f'https://api.zoom.us/v2/meetings/{meeting_id}',
-            headers={
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-        )
-        
-        if response.status_code not in [204, 404]:
-            logger.error(f"Zoom API error: {response.text}")
+        try:
+            ZoomClient.for_mentor(mentor).delete_meeting(meeting_id)
+        except (ZoomRateLimited, ZoomUnavailable) as e:
+            # Deleting only locally would leave the meeting live in Zoom
+            return retry_later_response(e)
+        except ZoomAPIError as e:
+            if e.status_code != 404:
+                logger.error(f"Zoom API error: {e.message}")
             # Continue with database deletion even if Zoom deletion fails
         
         # Delete meeting from database
-        meeting.delete()
+        remove_meeting(meeting)
+        bump_version(mentor)
+        publish(mentor, meeting_deleted_event(meeting))
         
         return Response(status=status.HTTP_204_NO_CONTENT)
         
@@ -405,27 +431,187 @@ def delete_meeting(request, meeting_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_create_meetings(request):
+    """Create a cohort's meetings in one request
+
+    The body holds either ``meetings``, a list of ``create_meeting`` bodies,
+    or one ``meeting`` plus a ``recurrence`` rule (see
+    ``meetings.cohorts.expand_recurrence``). ``students`` (student ids) are
+    attached to every meeting and ``reminder_offsets`` applies to all of
+    them. Zoom meetings are created in parallel; each item of ``results``
+    reports its own success or error, and the response is 201 when all
+    succeeded, 207 when only some did.
+    """
+    try:
+        mentor = Mentor.objects.get(user=request.user)
+        try:
+            specs = parse_cohort(request.data)
+            reminder_offsets = parse_reminder_offsets(request.data.get('reminder_offsets'))
+            student_ids = {int(student_id) for student_id in request.data.get('students') or []}
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        students = set(mentor.students.filter(id__in=student_ids).values_list('id', flat=True))
+        if students != student_ids:
+            return Response(
+                {'error': f'Unknown students: {sorted(student_ids - students)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        zoom = ZoomClient.for_mentor(mentor)
+        try:
+            # One token fetch up front instead of a refresh race between the workers
+            zoom.get_access_token()
+        except ZoomUnavailable as e:
+            return retry_later_response(e)
+
+        provisioned = provision_meetings(zoom, [build_zoom_meeting_data(spec) for spec in specs])
+        created = [
+            (index, Meeting(mentor=mentor, **meeting_fields_from_zoom(zoom_data, spec.get('type', 2))))
+            for index, (spec, (zoom_data, error)) in enumerate(zip(specs, provisioned))
+            if zoom_data is not None
+        ]
+        errors = [error for _, error in provisioned if error is not None]
+        if not created:
+            retryable = [error for error in errors if isinstance(error, (ZoomRateLimited, ZoomUnavailable))]
+            if retryable:
+                return retry_later_response(retryable[0])
+
+        try:
+            with transaction.atomic():
+                meetings = Meeting.objects.bulk_create([meeting for _, meeting in created])
+                Meeting.students.through.objects.bulk_create([
+                    Meeting.students.through(meeting_id=meeting.id, student_id=student_id)
+                    for meeting in meetings
+                    for student_id in students
+                ])
+                schedule_reminders(meetings, reminder_offsets)
+        except Exception as e:
+            logger.error(f"Error saving bulk meetings: {str(e)}")
+            cancel_meetings(zoom, [meeting.meeting_id for _, meeting in created])
+            return Response(
+                {'error': f'Failed to create meetings in database: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        if meetings:
+            bump_version(mentor)
+            publish(mentor, *[meeting_event('meeting.created', meeting) for meeting in meetings])
+
+        results = [{'index': index, 'success': False} for index in range(len(specs))]
+        for index, (_, error) in enumerate(provisioned):
+            if error is not None:
+                results[index]['error'] = getattr(error, 'message', str(error))
+        for index, meeting in created:
+            results[index] = {
+                'index': index,
+                'success': True,
+                'meeting': {
+                    'id': meeting.id,
+                    'meeting_id': meeting.meeting_id,
+                    'topic': meeting.topic,
+                    'join_url': meeting.join_url,
+                    'password': meeting.password,
+                    'start_time': meeting.start_time,
+                    'duration': meeting.duration
+                }
+            }
+
+        return Response({
+            'created': len(created),
+            'failed': len(errors),
+            'results': results
+        }, status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED)
+
+    except Mentor.DoesNotExist:
+        return Response(
+            {'error': 'Mentor profile not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        logger.error(f"Error creating meetings in bulk: {str(e)}")
+        return Response(
+            {'error': f'Failed to create meetings: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def change_enrollments(request):
+    """Enroll students into, or drop them from, many meetings at once
+
+    ``meetings`` lists Zoom meeting ids. Either ``add`` and/or ``remove``
+    student ids, or give ``students``, the complete new enrollment of every
+    listed meeting. Only students that were not enrolled yet get an
+    invitation, unless ``invite`` is false.
+    """
+    try:
+        mentor = Mentor.objects.get(user=request.user)
+        try:
+            result = change_enrollment(
+                mentor,
+                parse_ids(request.data.get('meetings'), 'meetings') or [],
+                add=parse_ids(request.data.get('add'), 'add') or [],
+                remove=parse_ids(request.data.get('remove'), 'remove') or [],
+                replace=parse_ids(request.data.get('students'), 'students'),
+                invite=request.data.get('invite', True) not in (False, 'false', '0', 0)
+            )
+        except EnrollmentError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'success': True, **result})
+
+    except Mentor.DoesNotExist:
+        return Response(
+            {'error': 'Mentor profile not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        logger.error(f"Error changing enrollments: {str(e)}")
+        return Response(
+            {'error': f'Failed to change enrollments: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_listing('recordings')
 def list_recordings(request):
-    """List all recordings for the authenticated mentor"""
+    """List the authenticated mentor's recordings, newest first, a page at a time
+
+    Optional filters: ``meeting_id`` (Zoom meeting id), ``recording_type``,
+    ``created_after`` and ``created_before`` (ISO 8601). Pass the returned
+    ``next`` value as ``cursor`` to fetch the following page.
+    """
     try:
         mentor = Mentor.objects.get(user=request.user)
-        recordings = Recording.objects.filter(meeting__mentor=mentor).order_by('-created_at')
-        recordings_data = [{
-            'id': recording.id,
-            'meeting_id': recording.meeting.meeting_id,
-            'meeting_topic': recording.meeting.topic,
-            'recording_url': recording.recording_url,
-            'recording_type': recording.recording_type,
-            'created_at': recording.created_at,
-            'file_size': recording.file_size,
-            'duration': recording.duration
-        } for recording in recordings]
+        recordings, next_cursor = paginate_keyset(
+            recordings_queryset(mentor, request.query_params),
+            RECORDING_ORDERING,
+            cursor=request.query_params.get('cursor'),
+            page_size=get_page_size(request, settings.MEETINGS_PAGE_SIZE, settings.MEETINGS_MAX_PAGE_SIZE)
+        )
+        recordings_data = [serialize_recording(recording) for recording in recordings]
         return Response({
             'success': True,
-            'recordings': recordings_data
+            'recordings': recordings_data,
+            'next': next_cursor
         })
+    except Mentor.DoesNotExist:
+        return Response({
+            'success': False,
+            'error': 'Mentor profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except (InvalidCursor, ValueError) as e:
+        return Response({
+            'success': False,
+            'error': f'Invalid filter: {str(e)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logger.error(f"Error listing recordings: {str(e)}")
         return Response({
@@ -433,6 +619,277 @@ def list_recordings(request):
             'error': 'Failed to list recordings'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Same direction as Recording.Meta.ordering, with id as a tiebreaker
+RECORDING_ORDERING = ('-created_at', '-id')
+
+def recordings_queryset(mentor, params):
+    """Recordings of a mentor's meetings, joined to their meeting and filtered by ``params``
+
+    Raises ValueError for malformed date filters.
+    """
+    recordings = Recording.objects.filter(meeting__mentor=mentor).select_related('meeting').only(
+        'id', 'recording_url', 'recording_type', 'created_at', 'file_size', 'duration',
+        'meeting__meeting_id', 'meeting__topic'
+    )
+
+    if params.get('meeting_id'):
+        recordings = recordings.filter(meeting__meeting_id=params['meeting_id'])
+    if params.get('recording_type'):
+        recordings = recordings.filter(recording_type=params['recording_type'])
+    for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+        if params.get(param):
+            value = parse_datetime(params[param])
+            if value is None:
+                raise ValueError(f'{param} must be an ISO 8601 datetime')
+            recordings = recordings.filter(**{lookup: value})
+    return recordings
+
+def serialize_recording(recording):
+    """Recording as returned by the recordings endpoints"""
+    return {
+        'id': recording.id,
+        'meeting_id': recording.meeting.meeting_id,
+        'meeting_topic': recording.meeting.topic,
+        'recording_url': recording.recording_url,
+        'recording_type': recording.recording_type,
+        'created_at': recording.created_at,
+        'file_size': recording.file_size,
+        'duration': recording.duration,
+        # Seekable through our proxy, usable as a <video> src for RECORDING_STREAM_URL_TTL
+        'stream_url': f"{reverse('stream_recording', args=[recording.id])}?sig={sign_stream(recording.id)}"
+    }
+
+def serialize_usage(rollup):
+    return {
+        'recording_count': rollup.recording_count,
+        'total_bytes': rollup.total_bytes,
+        'total_duration': rollup.total_duration,
+    }
+
+# Longest from/to span recording_usage returns day by day
+MAX_USAGE_DAYS = 366
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recording_usage(request):
+    """Storage and duration totals of the authenticated mentor's recordings
+
+    Read from the running totals in RecordingRollup, so the cost does not
+    grow with the number of recordings. ``meeting_id`` (Zoom meeting id)
+    adds that meeting's totals; ``from`` and ``to`` (dates, inclusive) add
+    the totals of each day in between.
+    """
+    try:
+        mentor = Mentor.objects.get(user=request.user)
+        data = {'success': True, 'usage': serialize_usage(get_usage(mentor))}
+
+        meeting_id = request.query_params.get('meeting_id')
+        if meeting_id:
+            meeting = Meeting.objects.get(meeting_id=meeting_id, mentor=mentor)
+            data['meeting'] = serialize_usage(get_usage(mentor, 'meeting', meeting=meeting))
+
+        if request.query_params.get('from') or request.query_params.get('to'):
+            first = parse_date(request.query_params.get('from') or '')
+            last = parse_date(request.query_params.get('to') or '')
+            if first is None or last is None:
+                raise ValueError('from and to must both be dates (YYYY-MM-DD)')
+            if not 0 <= (last - first).days < MAX_USAGE_DAYS:
+                raise ValueError(f'to must be on or after from and at most {MAX_USAGE_DAYS} days later')
+            days = {
+                rollup.day: rollup
+                for rollup in RecordingRollup.objects.filter(
+                    mentor=mentor, scope='day', day__gte=first, day__lte=last
+                )
+            }
+            data['days'] = []
+            for offset in range((last - first).days + 1):
+                day = first + timedelta(days=offset)
+                rollup = days.get(day) or RecordingRollup(day=day)
+                data['days'].append({'day': day, **serialize_usage(rollup)})
+
+        return Response(data)
+    except Mentor.DoesNotExist:
+        return Response({
+            'success': False,
+            'error': 'Mentor profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Meeting.DoesNotExist:
+        return Response({
+            'success': False,
+            'error': 'Meeting not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'error': f'Invalid filter: {str(e)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error reading recording usage: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to read recording usage'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def serialize_attendance(summary, meeting):
+    """One user's AttendanceSummary row for a report, None if they did not attend"""
+    if summary is None:
+        return None
+    scheduled = meeting.duration * 60
+    return {
+        'first_joined_at': summary.first_joined_at,
+        'last_left_at': summary.last_left_at,
+        'attended_seconds': summary.attended_seconds,
+        'attended_ratio': round(min(summary.attended_seconds / scheduled, 1.0), 3) if scheduled else None,
+        'sessions': summary.sessions,
+        'late_seconds': summary.late_seconds,
+        'left_early_seconds': summary.left_early_seconds,
+        'late': summary.late_seconds > settings.ATTENDANCE_LATE_AFTER,
+        'dropped_off': summary.left_early_seconds > settings.ATTENDANCE_DROP_OFF_BEFORE,
+    }
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def meeting_attendance(request, meeting_id):
+    """Attendance of one of the authenticated mentor's meetings
+
+    Lists every enrolled student, with ``attendance`` None for those who
+    never joined, followed by the other users who attended. Read from
+    AttendanceSummary, so it takes the same four queries for any cohort;
+    ``computed_at`` is None until refresh_attendance has summarized the
+    meeting after it completed.
+    """
+    try:
+        mentor = Mentor.objects.get(user=request.user)
+        meeting = Meeting.objects.get(meeting_id=meeting_id, mentor=mentor)
+        students = list(meeting.students.select_related('user').order_by('user__username'))
+        summaries = {
+            summary.user_id: summary
+            for summary in AttendanceSummary.objects.filter(meeting=meeting).select_related('user')
+        }
+
+        attendees = []
+        for student in students:
+            attendees.append({
+                'student_id': student.id,
+                'user_id': student.user_id,
+                'username': student.user.username,
+                'enrolled': True,
+                'attendance': serialize_attendance(summaries.pop(student.user_id, None), meeting),
+            })
+        for summary in sorted(summaries.values(), key=lambda summary: summary.user.username):
+            attendees.append({
+                'student_id': None,
+                'user_id': summary.user_id,
+                'username': summary.user.username,
+                'enrolled': False,
+                'attendance': serialize_attendance(summary, meeting),
+            })
+
+        attended = [attendee['attendance'] for attendee in attendees if attendee['attendance']]
+        return Response({
+            'success': True,
+            'meeting_id': meeting.meeting_id,
+            'topic': meeting.topic,
+            'start_time': meeting.start_time,
+            'duration': meeting.duration,
+            'computed_at': meeting.attendance_computed_at,
+            'enrolled': len(students),
+            'attended': len(attended),
+            'absent': sum(1 for attendee in attendees if attendee['attendance'] is None),
+            'late': sum(1 for attendance in attended if attendance['late']),
+            'dropped_off': sum(1 for attendance in attended if attendance['dropped_off']),
+            'attendees': attendees,
+        })
+    except Mentor.DoesNotExist:
+        return Response({
+            'success': False,
+            'error': 'Mentor profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Meeting.DoesNotExist:
+        return Response({
+            'success': False,
+            'error': 'Meeting not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Error reading meeting attendance: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to read meeting attendance'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def student_attendance(request, student_id):
+    """Attendance of one of the authenticated mentor's students across their summarized meetings
+
+    Covers the mentor's meetings the student was enrolled in or joined,
+    newest first, optionally limited to ``from``/``to`` (dates, inclusive,
+    of the meeting start). Four queries however many meetings it spans.
+    """
+    try:
+        mentor = Mentor.objects.get(user=request.user)
+        student = Student.objects.select_related('user').get(id=student_id, mentor=mentor)
+
+        bounds = {}
+        for param, lookup in (('from', 'start_time__date__gte'), ('to', 'start_time__date__lte')):
+            if request.query_params.get(param):
+                day = parse_date(request.query_params[param])
+                if day is None:
+                    raise ValueError(f'{param} must be a date (YYYY-MM-DD)')
+                bounds[lookup] = day
+        meetings = Meeting.objects.filter(mentor=mentor, attendance_computed_at__isnull=False, **bounds)
+
+        summaries = {
+            summary.meeting_id: summary
+            for summary in AttendanceSummary.objects.filter(user=student.user, meeting__in=meetings)
+        }
+        meetings = meetings.filter(Q(students=student) | Q(id__in=list(summaries))).distinct() \
+            .order_by('-start_time', '-id')
+
+        report = []
+        for meeting in meetings:
+            report.append({
+                'meeting_id': meeting.meeting_id,
+                'topic': meeting.topic,
+                'start_time': meeting.start_time,
+                'duration': meeting.duration,
+                'attendance': serialize_attendance(summaries.get(meeting.id), meeting),
+            })
+
+        attended = [entry['attendance'] for entry in report if entry['attendance']]
+        return Response({
+            'success': True,
+            'student_id': student.id,
+            'username': student.user.username,
+            'meetings': len(report),
+            'attended': len(attended),
+            'attended_seconds': sum(attendance['attended_seconds'] for attendance in attended),
+            'late': sum(1 for attendance in attended if attendance['late']),
+            'dropped_off': sum(1 for attendance in attended if attendance['dropped_off']),
+            'report': report,
+        })
+    except Mentor.DoesNotExist:
+        return Response({
+            'success': False,
+            'error': 'Mentor profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Student.DoesNotExist:
+        return Response({
+            'success': False,
+            'error': 'Student not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'error': f'Invalid filter: {str(e)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error reading student attendance: {str(e)}")
+        return Response({
+            'success': False,
+            'error': 'Failed to read student attendance'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_recording(request, recording_id):
@@ -441,23 +898,15 @@ def delete_recording(request, recording_id):
         mentor = Mentor.objects.get(user=request.user)
         recording = Recording.objects.get(id=recording_id, meeting__mentor=mentor)
         
-        # Get Zoom access token
-        access_token = get_zoom_access_token(mentor)
-        
-        # Zoom API endpoint
-        url = f'https://api.zoom.us/v2/meetings/{recording.meeting.meeting_id}/recordings/{recording_id}'
-        
-        # Request headers
-        headers = {
-            'Authorization': f'Bearer {access_token}'
-        }
-
-        # Make request to Zoom API
-        response = requests.delete(url, headers=headers)
-        response.raise_for_status()
+        # Zoom knows the file by its own id; rows without one were never on Zoom
+        if recording.zoom_file_id:
+            ZoomClient.for_mentor(mentor).delete_recording(recording.meeting.meeting_id, recording.zoom_file_id)
         
-        # Delete local recording object
-        recording.delete()
+        # Delete local recording object and its S3 copy
+        delete_mirror(recording)
+        delete_recordings(Recording.objects.filter(id=recording.id))
+        bump_version(mentor)
+        publish(mentor, recording_deleted_event(recording))
         
         return Response({
             'success': True,
@@ -469,6 +918,8 @@ def delete_recording(request, recording_id):
             'success': False,
             'error': 'Recording not found'
         }, status=status.HTTP_404_NOT_FOUND)
+    except (ZoomRateLimited, ZoomUnavailable) as e:
+        return retry_later_response(e)
     except Exception as e:
         logger.error(f"Error deleting recording: {str(e)}")
         return Response({
@@ -476,123 +927,34 @@ def delete_recording(request, recording_id):
             'error': 'Failed to delete recording'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-def send_meeting_invitations(meeting, student_ids):
-    """Send meeting invitations to students"""
-    try:
-        students = Student.objects.filter(id__in=student_ids)
-        for student in students:
-            # Send email to student with meeting details
-            subject = f'Meeting Invitation: {meeting.topic}'
-            message = f"""
-            Dear {student.user.username},
-            
-            You have been invited to join the following meeting:
-            
-            Topic: {meeting.topic}
-            Date: {meeting.start_time}
-            Duration: {meeting.duration} minutes
-            Join URL: {meeting.join_url}
-            Password: {meeting.password}
-            
-            Please join the meeting using the link above.
-            
-            Best regards,
-            {meeting.mentor.user.username}
-            """
-            
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [student.user.email],
-                fail_silently=False,
-            )
-    except Exception as e:
-        print(f"Error sending meeting invitations: {str(e)}")
-
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @authentication_classes([NoAuthentication])
 def handle_recording_webhook(request):
-    """Handle Zoom recording webhooks"""
+    """Handle Zoom recording webhooks.
+
+    The event is only verified and stored here; process_webhook_events
+    applies it, so Zoom gets its response in milliseconds.
+    """
     try:
-        # Verify webhook signature
-        payload = request.body
         signature = request.headers.get('X-Zm-Signature')
         timestamp = request.headers.get('X-Zm-Request-Timestamp')
         
         if not signature or not timestamp:
             return Response({'error': 'Missing signature or timestamp'}, status=400)
         
-        # Verify signature
-        message = f"v0:{timestamp}:{payload.decode('utf-8')}"
-        expected_signature = f"v0={hmac.new(settings.ZOOM_WEBHOOK_SECRET.encode(), message.encode(), hashlib.sha256).hexdigest()}"
-        
-        if not hmac.compare_digest(signature, expected_signature):
+        if not verify_webhook_signature(request):
             return Response({'error': 'Invalid signature'}, status=401)
         
-        # Parse webhook payload
-        data = json.loads(payload)
-        event = data.get('event')
-        payload_data = data.get('payload', {})
-        
-        if event == 'recording.started':
-            meeting_id = payload_data.get('object', {}).get('id')
-            if meeting_id:
-                meeting = Meeting.objects.filter(meeting_id=meeting_id).first()
-                if meeting:
-                    meeting.recording_status = 'processing'
-                    meeting.recording_start_time = datetime.now()
-                    meeting.save()
-                    logger.info(f"Recording started for meeting {meeting_id}")
-        
-        elif event == 'recording.stopped':
-            meeting_id = payload_data.get('object', {}).get('id')
-            if meeting_id:
-                meeting = Meeting.objects.filter(meeting_id=meeting_id).first()
-                if meeting:
-                    meeting.recording_status = 'completed'
-                    meeting.recording_end_time = datetime.now()
-                    meeting.save()
-                    logger.info(f"Recording stopped for meeting {meeting_id}")
-        
-        elif event == 'recording.completed':
-            meeting_id = payload_data.get('object', {}).get('id')
-            if meeting_id:
-                meeting = Meeting.objects.filter(meeting_id=meeting_id).first()
-                if meeting:
-                    # Get recording details from Zoom
-                    access_token = get_zoom_access_token()
-                    response = requests.get(
-                        f'https://api.zoom.us/v2/meetings/{meeting_id}/recordings',
-                        headers={
-                            'Authorization': f'Bearer {access_token}',
-                            'Content-Type': 'application/json'
-                        }
-                    )
-                    
-                    if response.status_code == 200:
-                        recordings_data = response.json()
-                        for recording_data in recordings_data.get('recording_files', []):
-                            recording = Recording.objects.create(
-                                meeting=meeting,
-                                recording_url=recording_data.get('download_url'),
-                                recording_type=recording_data.get('recording_type', 'video'),
-                                file_size=recording_data.get('file_size'),
-                                duration=recording_data.get('duration')
-                            )
-                            
-                            # Send notification to students
-                            send_recording_notification(recording)
-                    
-                    meeting.recording_status = 'completed'
-                    meeting.save()
-                    logger.info(f"Recording completed for meeting {meeting_id}")
+        try:
+            record_webhook_event(request.body)
+        except ValueError:
+            return Response({'error': 'Invalid payload'}, status=400)
         
         return Response({'status': 'success'})
         
     except Exception as e:
-        logger.error(f"Error handling recording webhook: {str(e)}")
+        logger.error(f"Error storing recording webhook: {str(e)}")
         return Response({'error': 'Failed to process webhook'}, status=500)
 
 @api_view(['POST'])
@@ -649,27 +1011,32 @@ def login(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+MAX_SIGNATURE_BATCH = 500
+
+
+def parse_signature_request(data):
+    """Return (meeting_number, role) from one signature request, or raise ValueError"""
+    meeting_number = data.get('meetingNumber')
+    if not meeting_number:
+        raise ValueError('meetingNumber is required')
+    role = data.get('role', 0)  # 0 for attendee, 1 for host
+    if str(role) not in ('0', '1'):
+        raise ValueError('role must be 0 or 1')
+    return meeting_number, int(role)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def generate_signature(request):
     """Generate a signature for joining a Zoom meeting"""
     try:
-        meeting_number = request.data.get('meetingNumber')
-        role = request.data.get('role', 0)  # 0 for attendee, 1 for host
-
-        # Get current timestamp
-        timestamp = int(time.time() * 1000)  # Current time in milliseconds
-
-        # Prepare the message string with all required parameters
-        msg = f'{settings.ZOOM_SDK_KEY}.{meeting_number}.{timestamp}.{role}'
+        try:
+            meeting_number, role = parse_signature_request(request.data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Generate the hash using SHA256
-        hash_object = hmac.new(
-            settings.ZOOM_SDK_SECRET.encode(),
-            msg.encode(),
-            hashlib.sha256
-        )
-        signature = base64.b64encode(hash_object.digest()).decode()
+        signature, timestamp = get_signer().sign(meeting_number, role)
 
         return Response({
             'signature': signature,
@@ -681,4 +1048,112 @@ def generate_signature(request):
         return Response(
             {'error': f'Failed to generate signature: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        ) 
\ No newline at end of file
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generate_signatures(request):
+    """Sign many (meetingNumber, role) pairs in one request.
+
+    Body: ``{"meetings": [{"meetingNumber": ..., "role": 0}, ...], "flavor": "hmac" | "jwt"}``
+    Host signatures (role 1) are only given for the caller's own meetings.
+    """
+    try:
+        items = request.data.get('meetings')
+        flavor = request.data.get('flavor', 'hmac')
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'meetings must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_SIGNATURE_BATCH:
+            return Response(
+                {'error': f'At most {MAX_SIGNATURE_BATCH} signatures per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if flavor not in ('hmac', 'jwt'):
+            return Response({'error': 'flavor must be hmac or jwt'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            pairs = [parse_signature_request(item) for item in items]
+        except (AttributeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        hosted = {str(meeting_number) for meeting_number, role in pairs if role == 1}
+        if hosted:
+            owned = set(Meeting.objects.filter(
+                mentor__user=request.user, meeting_id__in=hosted
+            ).values_list('meeting_id', flat=True))
+            if hosted - owned:
+                return Response(
+                    {'error': f'Host signatures are only given for your own meetings: {sorted(hosted - owned)}'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+        signer = get_signer()
+        signatures = []
+        for meeting_number, role in pairs:
+            signature, timestamp = signer.sign(meeting_number, role, flavor=flavor)
+            signatures.append({
+                'meetingNumber': meeting_number,
+                'role': role,
+                'signature': signature,
+                'timestamp': timestamp
+            })
+
+        return Response({
+            'sdkKey': settings.ZOOM_SDK_KEY,
+            'signatures': signatures
+        })
+    except Exception as e:
+        logger.error(f"Error generating signatures: {str(e)}")
+        return Response(
+            {'error': f'Failed to generate signatures: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def zoom_status(request):
+    """Whether Zoom calls are currently failing fast
+
+    While any endpoint's circuit breaker is open the app runs degraded:
+    listings keep being served from the database, and writes that need
+    Zoom answer 503 with Retry-After. Reports this worker process's view.
+    """
+    return Response({
+        'degraded': circuit_breaker.is_degraded(),
+        'endpoints': circuit_breaker.states()
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def zoom_rate_limits(request):
+    """Remaining Zoom quota last reported for each account, and any active back-off"""
+    account_ids = set(Mentor.objects.values_list('zoom_account_id', flat=True))
+    account_ids.add(settings.ZOOM_ACCOUNT_ID)
+    return Response({'accounts': rate_limiter.quotas(sorted(account_ids))})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def change_stream_url(request):
+    """URL of the authenticated mentor's change stream, signed for CHANGE_STREAM_URL_TTL seconds
+
+    EventSource cannot send the JWT header, so the dashboard opens the
+    stream with this URL and asks for a new one when it stops working.
+    """
+    if not Mentor.objects.filter(user=request.user).exists():
+        return Response({
+            'success': False,
+            'error': 'Mentor profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'success': True,
+        'url': f"{reverse('change_stream')}?sig={sign_changes(request.user.id)}",
+        'expires_in': settings.CHANGE_STREAM_URL_TTL,
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def listing_cache_stats(request):
+    """Hit ratio and size of this worker process's listing response cache"""
+    return Response(response_cache.stats())
@@ -1,17 +1,47 @@
+"""Zoom recording webhooks.
+
+A delivery is only verified and stored as a WebhookEvent before Zoom gets
+its 200, so the endpoint answers in a few milliseconds and Zoom never
+retries a slow delivery. The process_webhook_events worker does the actual
+work (Meeting updates, the Zoom recordings call, Recording rows and
+notifications) in batches. Participant joined/left events are far more
+numerous and are batched in memory by zoom_meetings.ingest instead.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
 from django.http import HttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-import json
-from .models import Meeting, Recording
-from .utils import send_recording_notification
-import hmac
-import hashlib
-import base64
-from django.conf import settings
-from datetime import datetime
+from zoom_meetings.ingest import PARTICIPANT_EVENTS, event_from_webhook, get_participant_buffer
+
+from .changes import publish, recording_status_event, recordings_available_event
+from .models import Meeting, Recording, WebhookEvent
+from .response_cache import bump_version
+from .rollups import add_recordings
+from .utils import send_recording_notifications
+from .zoom import ZoomClient, ZoomUnavailable
+
+logger = logging.getLogger(__name__)
 
 def verify_webhook_signature(request):
-    """Verify the webhook signature from Zoom"""
+    """Verify the webhook signature from Zoom
+
+    Raises ImproperlyConfigured when ZOOM_WEBHOOK_SECRET is not set, so a
+    missing secret is a server error Zoom retries, not an invalid signature.
+    """
+    if not settings.ZOOM_WEBHOOK_SECRET:
+        raise ImproperlyConfigured('ZOOM_WEBHOOK_SECRET is not set, so Zoom webhooks cannot be verified')
     try:
         # Get the signature from the request header
         signature = request.headers.get('X-Zm-Signature')
@@ -35,67 +65,244 @@ def verify_webhook_signature(request):
         # Compare signatures
         return hmac.compare_digest(signature, expected_signature)
     except Exception as e:
-        print(f"Error verifying webhook signature: {str(e)}")
+        logger.error(f"Error verifying webhook signature: {str(e)}")
         return False
 
+def get_dedup_key(data):
+    """Zoom sends no delivery id, but every redelivery repeats the event, its object and event_ts"""
+    event_ts = data.get('event_ts')
+    if event_ts is None:
+        return None
+    zoom_object = data.get('payload', {}).get('object', {})
+    return f"{data.get('event')}:{zoom_object.get('uuid') or zoom_object.get('id')}:{event_ts}"[:255]
+
+def record_webhook_event(body):
+    """Store a verified delivery for the processor; raises ValueError if it is not JSON.
+
+    A redelivery of an event that is already stored is silently dropped.
+    Participant joined/left events go to zoom_meetings.ingest instead, and
+    None is returned for them.
+    """
+    payload = body.decode('utf-8')
+    data = json.loads(payload)
+    if not isinstance(data, dict) or not isinstance(data.get('payload', {}), dict):
+        raise ValueError('Webhook payload must be a JSON object')
+    if data.get('event') in PARTICIPANT_EVENTS:
+        # Thousands a minute during a big lecture: batched in memory instead of one row and one job each
+        get_participant_buffer().add(event_from_webhook(data))
+        return None
+    webhook_event = WebhookEvent(
+        event=str(data.get('event', ''))[:100],
+        dedup_key=get_dedup_key(data),
+        payload=payload
+    )
+    WebhookEvent.objects.bulk_create([webhook_event], ignore_conflicts=True)
+    return webhook_event
+
 @csrf_exempt
 @require_POST
 def handle_recording_webhook(request):
     """Handle Zoom recording webhook events"""
+    if not verify_webhook_signature(request):
+        return HttpResponse('Invalid signature', status=401)
+
     try:
-        # Verify webhook signature
-        if not verify_webhook_signature(request):
-            return HttpResponse('Invalid signature', status=401)
-
-        # Parse the webhook payload
-        payload = json.loads(request.body)
-        event = payload.get('event')
-        payload_data = payload.get('payload', {})
-
-        if event == 'recording.started':
-            # Handle recording started event
-            meeting_id = payload_data.get('object', {}).get('id')
-            if meeting_id:
-                meeting = Meeting.objects.get(meeting_id=meeting_id)
-                meeting.recording_status = 'processing'
-                meeting.recording_start_time = datetime.now()
-                meeting.save()
-
-        elif event == 'recording.stopped':
-            # Handle recording stopped event
-            meeting_id = payload_data.get('object', {}).get('id')
-            if meeting_id:
-                meeting = Meeting.objects.get(meeting_id=meeting_id)
-                meeting.recording_status = 'completed'
-                meeting.recording_end_time = datetime.now()
-                meeting.save()
-
-        elif event == 'recording.completed':
-            # Handle recording completed event
-            meeting_id = payload_data.get('object', {}).get('id')
-            recording_files = payload_data.get('object', {}).get('recording_files', [])
-
-            if meeting_id and recording_files:
-                meeting = Meeting.objects.get(meeting_id=meeting_id)
-                
-                for file in recording_files:
-                    # Create recording object with Zoom URL
-                    recording = Recording.objects.create(
-                        meeting=meeting,
-                        recording_url=file.get('download_url'),
-                        recording_type=file.get('recording_type', 'video'),
-                        file_size=file.get('file_size'),
-                        duration=file.get('duration')
-                    )
-
-                    # Send notification to students
-                    send_recording_notification(recording)
-
-        return HttpResponse('Webhook processed successfully', status=200)
-
-    except Meeting.DoesNotExist:
-        print(f"Meeting not found for webhook: {payload_data.get('object', {}).get('id')}")
-        return HttpResponse('Meeting not found', status=404)
+        record_webhook_event(request.body)
+    except ValueError:
+        return HttpResponse('Invalid payload', status=400)
     except Exception as e:
-        print(f"Error processing webhook: {str(e)}")
-        return HttpResponse('Internal server error', status=500) 
\ No newline at end of file
+        logger.error(f"Error storing webhook: {str(e)}")
+        return HttpResponse('Internal server error', status=500)
+
+    return HttpResponse('Webhook received', status=200)
+
+def get_recording_type(file):
+    """Map a Zoom recording file onto Recording.RECORDING_TYPES
+
+    Zoom's own recording_type values (``shared_screen_with_speaker_view``,
+    ``audio_only``, ...) are longer than the column and not in its choices.
+    """
+    file_type = (file.get('file_type') or '').upper()
+    recording_type = file.get('recording_type') or ''
+    if file_type == 'M4A' or recording_type.startswith('audio'):
+        return 'audio'
+    if file_type == 'CHAT' or recording_type.startswith('chat'):
+        return 'chat'
+    if 'shared_screen' in recording_type:
+        return 'shared_screen'
+    return 'video'
+
+def recording_from_zoom(meeting, file):
+    """Unsaved Recording for one of a meeting's ``recording_files``"""
+    return Recording(
+        meeting=meeting,
+        zoom_file_id=str(file['id']) if file.get('id') else None,
+        recording_url=file.get('download_url'),
+        recording_type=get_recording_type(file),
+        file_size=file.get('file_size'),
+        duration=file.get('duration')
+    )
+
+def recording_started(meeting, zoom_object, received_at):
+    meeting.recording_status = 'processing'
+    meeting.recording_start_time = received_at
+    meeting.save(update_fields=['recording_status', 'recording_start_time', 'updated_at'])
+    bump_version(meeting.mentor)
+    publish(meeting.mentor, recording_status_event(meeting))
+    logger.info(f"Recording started for meeting {meeting.meeting_id}")
+
+def recording_stopped(meeting, zoom_object, received_at):
+    meeting.recording_status = 'completed'
+    meeting.recording_end_time = received_at
+    meeting.save(update_fields=['recording_status', 'recording_end_time', 'updated_at'])
+    bump_version(meeting.mentor)
+    publish(meeting.mentor, recording_status_event(meeting))
+    logger.info(f"Recording stopped for meeting {meeting.meeting_id}")
+
+def recording_completed(meeting, zoom_object, received_at):
+    # recording.completed usually carries the files; only ask Zoom when it does not
+    recording_files = zoom_object.get('recording_files')
+    if recording_files is None:
+        recording_files = ZoomClient.for_mentor(meeting.mentor).get_meeting_recordings(
+            meeting.meeting_id
+        ).get('recording_files', [])
+
+    # Only files we have not stored yet, so a redelivered event inserts and notifies nothing
+    existing = set(meeting.recordings.filter(zoom_file_id__isnull=False).values_list('zoom_file_id', flat=True))
+    new_recordings = {}
+    for file in recording_files:
+        file_id = str(file['id']) if file.get('id') else None
+        if file_id in existing or (file_id and file_id in new_recordings):
+            continue
+        new_recordings[file_id or len(new_recordings)] = recording_from_zoom(meeting, file)
+
+    events = []
+    if new_recordings:
+        recordings = Recording.objects.bulk_create(new_recordings.values(), ignore_conflicts=True)
+        add_recordings(recordings)
+        events.append(recordings_available_event(meeting, recordings))
+        # Send notification to students
+        send_recording_notifications(meeting, recordings)
+
+    status_changed = meeting.recording_status != 'completed'
+    meeting.recording_status = 'completed'
+    meeting.save(update_fields=['recording_status', 'updated_at'])
+    if status_changed:
+        events.append(recording_status_event(meeting))
+    bump_version(meeting.mentor)
+    publish(meeting.mentor, *events)
+    logger.info(f"Recording completed for meeting {meeting.meeting_id}")
+
+EVENT_HANDLERS = {
+    'recording.started': recording_started,
+    'recording.stopped': recording_stopped,
+    'recording.completed': recording_completed,
+}
+
+def process_event(webhook_event, data):
+    """Apply one stored delivery; ``data`` is its parsed payload"""
+    handler = EVENT_HANDLERS.get(webhook_event.event)
+    zoom_object = data.get('payload', {}).get('object', {})
+    meeting_id = zoom_object.get('id')
+    if handler is None or not meeting_id:
+        return
+
+    # Row lock: concurrent workers handling the same meeting apply its events one at a time
+    meeting = Meeting.objects.select_for_update(of=('self',)).select_related('mentor').filter(
+        meeting_id=meeting_id
+    ).first()
+    if meeting is None:
+        logger.warning(f"Meeting not found for webhook {webhook_event.id}: {meeting_id}")
+        return
+    handler(meeting, zoom_object, webhook_event.received_at)
+
+class WebhookEventProcessor:
+    """Claims stored webhook events in batches and processes them on a thread pool.
+
+    Events are grouped by Zoom meeting and each group runs in order on one
+    thread, so a meeting's started/stopped/completed events never race,
+    while different meetings (and their Zoom calls) proceed concurrently.
+    Claiming follows the email outbox: a lease on ``next_attempt_at`` taken
+    under SELECT ... FOR UPDATE SKIP LOCKED, with failed events retried
+    with exponential backoff.
+    """
+
+    def __init__(self, batch_size=100, concurrency=8, lease=300, max_attempts=5):
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='webhook')
+
+    def close(self):
+        self.pool.shutdown()
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            events = list(
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:self.batch_size]
+            )
+            if events:
+                WebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+                    next_attempt_at=now + timedelta(seconds=self.lease)
+                )
+        return events
+
+    def process_batch(self):
+        """Process one batch and return how many events were claimed"""
+        events = self.claim()
+        if not events:
+            return 0
+
+        groups = defaultdict(list)
+        failed = []
+        for event in sorted(events, key=lambda event: (event.received_at, event.id)):
+            try:
+                data = json.loads(event.payload)
+            except ValueError as e:
+                failed.append((event, e))
+                continue
+            groups[str(data.get('payload', {}).get('object', {}).get('id'))].append((event, data))
+
+        processed = []
+        for done, errors in self.pool.map(self.process_group, groups.values()):
+            processed.extend(done)
+            failed.extend(errors)
+
+        now = timezone.now()
+        if processed:
+            WebhookEvent.objects.filter(id__in=[event.id for event in processed]).update(
+                status='processed', processed_at=now, last_error=''
+            )
+        for event, error in failed:
+            event.attempts += 1
+            event.last_error = str(error)
+            if event.attempts >= self.max_attempts:
+                event.status = 'failed'
+                logger.error(f"Giving up on webhook event {event.id} after {event.attempts} attempts: {error}")
+            else:
+                delay = min(30 * 2 ** (event.attempts - 1), 3600) * random.uniform(0.8, 1.2)
+                if isinstance(error, ZoomUnavailable):
+                    # Nothing will get through before Zoom's circuit breaker closes again
+                    delay = max(delay, error.retry_after)
+                event.next_attempt_at = now + timedelta(seconds=delay)
+        if failed:
+            WebhookEvent.objects.bulk_update(
+                [event for event, _ in failed], ['attempts', 'last_error', 'status', 'next_attempt_at']
+            )
+        return len(events)
+
+    def process_group(self, group):
+        close_old_connections()
+        done, errors = [], []
+        for event, data in group:
+            try:
+                with transaction.atomic():
+                    process_event(event, data)
+                done.append(event)
+            except Exception as e:
+                logger.error(f"Error processing webhook event {event.id}: {str(e)}")
+                errors.append((event, e))
+        return done, errors
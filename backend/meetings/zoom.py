@@ -0,0 +1,452 @@
+import base64
+import logging
+import os
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+
+from .circuit import circuit_breaker
+from .metrics import record_zoom_call
+from .ratelimit import rate_limiter
+from .tracing import ZoomSpan, content_length
+
+logger = logging.getLogger(__name__)
+
+ZOOM_OAUTH_URL = 'https://zoom.us/oauth/token'
+ZOOM_API_BASE_URL = 'https://api.zoom.us/v2'
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return this process's pooled keep-alive session for Zoom calls.
+
+    The session is created lazily and recreated after a fork so gunicorn
+    workers never share sockets inherited from the master process.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session, _session_pid = build_session(), pid
+    return _session
+
+
+def build_session(pool_size=None):
+    """Create a requests.Session keeping up to ``pool_size`` connections per host."""
+    if pool_size is None:
+        pool_size = getattr(settings, 'ZOOM_HTTP_POOL_SIZE', 10)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_timeout():
+    """(connect, read) timeout applied to every outbound Zoom request."""
+    return (
+        getattr(settings, 'ZOOM_HTTP_CONNECT_TIMEOUT', 3.05),
+        getattr(settings, 'ZOOM_HTTP_READ_TIMEOUT', 15),
+    )
+
+
+def mentor_credentials(mentor=None):
+    """(account_id, client_id, client_secret) for a mentor, or the global Zoom app."""
+    if mentor:
+        return mentor.zoom_account_id, mentor.zoom_client_id, mentor.zoom_client_secret
+    return settings.ZOOM_ACCOUNT_ID, settings.ZOOM_CLIENT_ID, settings.ZOOM_CLIENT_SECRET
+
+
+class ZoomAPIError(Exception):
+    """Raised when the Zoom API answers with an error status."""
+
+    def __init__(self, status_code, message, response=None):
+        super().__init__(f"Zoom API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+        self.response = response
+
+
+class ZoomRateLimited(ZoomAPIError):
+    """Raised when a call would wait longer than ZOOM_RATE_LIMIT_MAX_WAIT for the account's rate limit."""
+
+    def __init__(self, account_id, retry_after, response=None):
+        super().__init__(429, f"Rate limit reached for Zoom account {account_id}", response=response)
+        self.account_id = account_id
+        self.retry_after = retry_after
+
+
+class ZoomUnavailable(ZoomAPIError):
+    """Raised when a Zoom endpoint timed out or failed, or its circuit breaker is open."""
+
+    def __init__(self, endpoint, retry_after, message=None):
+        super().__init__(503, message or f"Zoom endpoint {endpoint} is unavailable")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class ZoomTokenManager:
+    """Cache Zoom Server-to-Server OAuth tokens per (account_id, client_id).
+
+    Tokens live in the Django cache so every worker process shares them, with
+    a small in-process copy in front to skip the cache round-trip. Refreshes
+    are single-flight: one thread per process and one process per cache take
+    the refresh lock while everyone else waits for the new token.
+    """
+
+    def __init__(self, cache_alias='default', leeway=None, lock_timeout=10, poll_interval=0.05):
+        self.cache_alias = cache_alias
+        self.leeway = leeway
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._local = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'refreshes': 0}
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_leeway(self):
+        if self.leeway is not None:
+            return self.leeway
+        return getattr(settings, 'ZOOM_TOKEN_REFRESH_LEEWAY', 60)
+
+    def cache_key(self, account_id, client_id):
+        return f'zoom:token:{account_id}:{client_id}'
+
+    def get_token(self, account_id, client_id, client_secret):
+        """Return a valid access token, fetching a new one only when needed."""
+        key = self.cache_key(account_id, client_id)
+        token = self._lookup(key)
+        if token:
+            self._count('hits')
+            return token
+
+        self._count('misses')
+        with self._lock_for(key):
+            # Another thread may have refreshed while we waited for the lock
+            token = self._lookup(key)
+            if token:
+                return token
+            return self._refresh(key, account_id, client_id, client_secret)
+
+    def peek(self, account_id, client_id):
+        """Return the in-process copy of a token if still valid, without any I/O."""
+        entry = self._local.get(self.cache_key(account_id, client_id))
+        if entry and entry[1] > time.time():
+            self._count('hits')
+            return entry[0]
+        return None
+
+    def invalidate(self, account_id, client_id):
+        """Drop a cached token, e.g. after Zoom answered 401 with it."""
+        key = self.cache_key(account_id, client_id)
+        with self._guard:
+            self._local.pop(key, None)
+        self.cache.delete(key)
+
+    def stats(self):
+        with self._guard:
+            return dict(self._counters)
+
+    def reset_stats(self):
+        with self._guard:
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def _count(self, name):
+        with self._guard:
+            self._counters[name] += 1
+
+    def _lock_for(self, key):
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _lookup(self, key):
+        now = time.time()
+        entry = self._local.get(key)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        cached = self.cache.get(key)
+        if cached and cached['expires_at'] > now:
+            with self._guard:
+                self._local[key] = (cached['access_token'], cached['expires_at'])
+            return cached['access_token']
+        return None
+
+    def _refresh(self, key, account_id, client_id, client_secret):
+        lock_key = f'{key}:lock'
+        # Names this refresh as the lock's owner, so only the owner releases it
+        lock_token = f'{os.getpid()}:{uuid.uuid4().hex}'
+        deadline = time.monotonic() + self.lock_timeout
+        # Cross-process single flight: only the worker that wins cache.add()
+        # talks to Zoom, the others poll the cache for its result.
+        acquired = self.cache.add(lock_key, lock_token, self.lock_timeout)
+        while not acquired:
+            time.sleep(self.poll_interval)
+            token = self._lookup(key)
+            if token:
+                return token
+            if time.monotonic() > deadline:
+                logger.warning(f"Zoom token refresh lock for {account_id} timed out, fetching anyway")
+                break
+            acquired = self.cache.add(lock_key, lock_token, self.lock_timeout)
+
+        try:
+            token_data = self.fetch_token(account_id, client_id, client_secret)
+            access_token = token_data['access_token']
+            ttl = max(int(token_data.get('expires_in', 3600)) - self.get_leeway(), 1)
+            expires_at = time.time() + ttl
+            self.cache.set(key, {'access_token': access_token, 'expires_at': expires_at}, ttl)
+            with self._guard:
+                self._local[key] = (access_token, expires_at)
+                self._counters['refreshes'] += 1
+            return access_token
+        finally:
+            # A lock that expired and was taken over belongs to another refresh
+            if acquired and self.cache.get(lock_key) == lock_token:
+                self.cache.delete(lock_key)
+
+    def fetch_token(self, account_id, client_id, client_secret):
+        """POST to Zoom's OAuth endpoint and return the decoded token payload.
+
+        Raises ZoomAPIError when Zoom refuses the credentials and
+        ZoomUnavailable when it cannot be reached or answers 5xx.
+        """
+        credentials = f"{client_id}:{client_secret}"
+        encoded_credentials = base64.b64encode(credentials.encode()).decode()
+
+        with ZoomSpan('oauth', 'POST', account_id) as span:
+            if not circuit_breaker.allow('oauth'):
+                raise ZoomUnavailable('oauth', circuit_breaker.retry_after('oauth'))
+            started = time.perf_counter()
+            span.attempt()
+            try:
+                response = get_session().post(
+                    getattr(settings, 'ZOOM_OAUTH_URL', ZOOM_OAUTH_URL),
+                    timeout=get_timeout(),
+                    headers={
+                        'Authorization': f'Basic {encoded_credentials}',
+                        'Content-Type': 'application/x-www-form-urlencoded'
+                    },
+                    data=urlencode({
+                        'grant_type': 'account_credentials',
+                        'account_id': account_id
+                    })
+                )
+            except requests.RequestException as e:
+                record_zoom_call('oauth', None, time.perf_counter() - started)
+                circuit_breaker.record_failure('oauth')
+                raise ZoomUnavailable('oauth', circuit_breaker.retry_after('oauth'), str(e)) from e
+            record_zoom_call('oauth', response.status_code, time.perf_counter() - started)
+            span.record(response.status_code, len(response.content))
+            if response.status_code >= 500:
+                circuit_breaker.record_failure('oauth')
+            else:
+                circuit_breaker.record_success('oauth')
+        if response.status_code >= 500:
+            raise ZoomUnavailable(
+                'oauth', circuit_breaker.retry_after('oauth'), f'Zoom answered {response.status_code}: {response.text}'
+            )
+        if response.status_code != 200:
+            raise ZoomAPIError(response.status_code, response.text, response=response)
+        return response.json()
+
+
+token_manager = ZoomTokenManager()
+
+
+class ZoomClient:
+    """Thin client for the Zoom REST endpoints used by the meetings app.
+
+    Requests go through the pooled per-process session and carry a bearer
+    token from ``token_manager``. A 401 drops the cached token and the call
+    is retried once with a fresh one. Every call first takes a slot from the
+    account's rate limit, and a 429 is retried once Zoom's Retry-After has
+    passed, see ``meetings.ratelimit``. Timeouts, connection errors and 5xx
+    count against the endpoint's circuit breaker, and while it is open calls
+    raise ZoomUnavailable at once, see ``meetings.circuit``.
+    """
+
+    def __init__(self, account_id, client_id, client_secret, session=None, tokens=None,
+                 base_url=None, timeout=None, limiter=None, breaker=None):
+        self.account_id = account_id
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.session = session
+        self.tokens = tokens or token_manager
+        self.limiter = limiter or rate_limiter
+        self.breaker = breaker or circuit_breaker
+        self.base_url = (base_url or getattr(settings, 'ZOOM_API_BASE_URL', ZOOM_API_BASE_URL)).rstrip('/')
+        self.timeout = timeout
+
+    @classmethod
+    def for_mentor(cls, mentor=None, **kwargs):
+        """Build a client for a mentor's Zoom account, or the global app if None."""
+        return cls(*mentor_credentials(mentor), **kwargs)
+
+    def get_access_token(self):
+        return self.tokens.get_token(self.account_id, self.client_id, self.client_secret)
+
+    def request(self, method, path, expected=(200, 201, 204), endpoint=None, **kwargs):
+        """Send a request to the Zoom API and return the ``requests.Response``.
+
+        ``endpoint`` names the circuit breaker the call counts against.
+        Raises ZoomAPIError when the status code is not in ``expected``,
+        ZoomRateLimited when the rate limit would hold the call too long and
+        ZoomUnavailable when Zoom cannot be reached, answers 5xx or the breaker is open.
+        """
+        session = self.session or get_session()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        endpoint = endpoint or method.lower()
+        kwargs.setdefault('timeout', self.timeout or get_timeout())
+        deadline = self.limiter.deadline()
+
+        with ZoomSpan(endpoint, method, self.account_id) as span:
+            token_retried = False
+            while True:
+                if not self.breaker.allow(endpoint):
+                    raise ZoomUnavailable(endpoint, self.breaker.retry_after(endpoint))
+                self.limiter.acquire(self.account_id, deadline)
+                headers = {
+                    'Authorization': f'Bearer {self.get_access_token()}',
+                    'Content-Type': 'application/json'
+                }
+                started = time.perf_counter()
+                span.attempt()
+                try:
+                    response = session.request(method, url, headers=headers, **kwargs)
+                except requests.RequestException as e:
+                    record_zoom_call(endpoint, None, time.perf_counter() - started)
+                    self.breaker.record_failure(endpoint)
+                    raise ZoomUnavailable(endpoint, self.breaker.retry_after(endpoint), str(e)) from e
+                record_zoom_call(endpoint, response.status_code, time.perf_counter() - started)
+                span.record(response.status_code, len(response.content))
+                if response.status_code >= 500:
+                    self.breaker.record_failure(endpoint)
+                else:
+                    self.breaker.record_success(endpoint)
+                retry_after = self.limiter.observe(self.account_id, response.status_code, response.headers)
+                if response.status_code == 401 and not token_retried:
+                    logger.info(f"Zoom rejected cached token for {self.account_id}, refreshing")
+                    self.tokens.invalidate(self.account_id, self.client_id)
+                    token_retried = True
+                    continue
+                if retry_after is not None:
+                    if time.monotonic() + retry_after > deadline:
+                        raise ZoomRateLimited(self.account_id, retry_after, response=response)
+                    continue
+                break
+
+        if response.status_code >= 500:
+            raise ZoomUnavailable(
+                endpoint, self.breaker.retry_after(endpoint), f'Zoom answered {response.status_code}: {response.text}'
+            )
+        if response.status_code not in expected:
+            raise ZoomAPIError(response.status_code, response.text, response=response)
+        return response
+
+    def create_meeting(self, meeting_data, user_id='me'):
+        """Create a meeting and return Zoom's meeting object."""
+        return self.request(
+            'POST', f'users/{user_id}/meetings', expected=(201,), endpoint='create_meeting', json=meeting_data
+        ).json()
+
+    def update_meeting(self, meeting_id, meeting_data):
+        self.request('PATCH', f'meetings/{meeting_id}', expected=(204,), endpoint='update_meeting', json=meeting_data)
+
+    def delete_meeting(self, meeting_id):
+        self.request('DELETE', f'meetings/{meeting_id}', expected=(204,), endpoint='delete_meeting')
+
+    def list_meetings(self, user_id='me', page_token='', page_size=300, **params):
+        """One page of the user's meetings; pass ``next_page_token`` back as ``page_token``."""
+        return self.request(
+            'GET', f'users/{user_id}/meetings', expected=(200,), endpoint='list_meetings',
+            params={'page_size': page_size, 'next_page_token': page_token, **params}
+        ).json()
+
+    def list_recordings(self, from_date, to_date, user_id='me', page_token='', page_size=300):
+        """One page of the user's cloud recordings between two dates, at most a month apart."""
+        return self.request(
+            'GET', f'users/{user_id}/recordings', expected=(200,), endpoint='list_recordings',
+            params={
+                'from': from_date.isoformat(), 'to': to_date.isoformat(),
+                'page_size': page_size, 'next_page_token': page_token
+            }
+        ).json()
+
+    def get_meeting_recordings(self, meeting_id):
+        """Return the recording object (with ``recording_files``) for a meeting."""
+        return self.request(
+            'GET', f'meetings/{meeting_id}/recordings', expected=(200,), endpoint='get_meeting_recordings'
+        ).json()
+
+    def delete_recording(self, meeting_id, recording_id):
+        self.request(
+            'DELETE', f'meetings/{meeting_id}/recordings/{recording_id}', expected=(200, 204),
+            endpoint='delete_recording'
+        )
+
+    def download(self, url, start=0):
+        """Open a streaming GET of a recording file's ``download_url`` from byte ``start`` on.
+
+        Returns the ``requests.Response``, 206 when Zoom honoured the Range
+        header; the caller must close it. Downloads are not API calls, so
+        they skip the rate limit but count against the 'download' breaker.
+        """
+        session = self.session or get_session()
+        headers = {'Range': f'bytes={start}-'} if start else {}
+        with ZoomSpan('download', 'GET', self.account_id) as span:
+            token_retried = False
+            while True:
+                if not self.breaker.allow('download'):
+                    raise ZoomUnavailable('download', self.breaker.retry_after('download'))
+                headers['Authorization'] = f'Bearer {self.get_access_token()}'
+                started = time.perf_counter()
+                span.attempt()
+                try:
+                    response = session.get(url, headers=headers, stream=True, timeout=self.timeout or get_timeout())
+                except requests.RequestException as e:
+                    record_zoom_call('download', None, time.perf_counter() - started)
+                    self.breaker.record_failure('download')
+                    raise ZoomUnavailable('download', self.breaker.retry_after('download'), str(e)) from e
+                record_zoom_call('download', response.status_code, time.perf_counter() - started)
+                span.record(response.status_code, content_length(response.headers))
+                if response.status_code >= 500:
+                    self.breaker.record_failure('download')
+                else:
+                    self.breaker.record_success('download')
+                if response.status_code == 401 and not token_retried:
+                    response.close()
+                    self.tokens.invalidate(self.account_id, self.client_id)
+                    token_retried = True
+                    continue
+                break
+
+        if response.status_code not in (200, 206):
+            message = response.text[:500]
+            response.close()
+            if response.status_code >= 500:
+                raise ZoomUnavailable(
+                    'download', self.breaker.retry_after('download'), f'Zoom answered {response.status_code}: {message}'
+                )
+            raise ZoomAPIError(response.status_code, message, response=response)
+        return response
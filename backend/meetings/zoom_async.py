@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .circuit import circuit_breaker
+from .metrics import record_zoom_call
+from .ratelimit import rate_limiter
+from .tracing import ZoomSpan, content_length
+from .zoom import (
+    ZOOM_API_BASE_URL, ZoomAPIError, ZoomRateLimited, ZoomUnavailable, get_timeout, mentor_credentials,
+    token_manager
+)
+
+logger = logging.getLogger(__name__)
+
+# Event loop -> its aiohttp.ClientSession, and the tasks that close them
+_sessions = {}
+_session_closers = set()
+
+
+def get_async_session():
+    """Return the shared aiohttp.ClientSession for the running event loop.
+
+    aiohttp sessions are bound to the loop they were created on, so one is
+    kept per loop; under ASGI that is one per worker process. Async views
+    served through WSGI get a throwaway loop per request, so their session
+    lives for that request only and is closed as its loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _sessions:
+        closer = loop.create_task(close_session_on_shutdown(loop))
+        _session_closers.add(closer)
+        closer.add_done_callback(_session_closers.discard)
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = _sessions[loop] = build_async_session()
+    return session
+
+
+async def close_session_on_shutdown(loop):
+    """Wait until ``loop`` shuts down, which cancels this task, then close its session
+
+    asyncio.run(), and so async_to_sync() and uvicorn, cancel the tasks
+    still pending and let them finish before closing the loop.
+    """
+    try:
+        await loop.create_future()
+    finally:
+        session = _sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+
+def build_async_session(pool_size=None):
+    """Create an aiohttp session keeping up to ``pool_size`` connections open."""
+    if pool_size is None:
+        pool_size = getattr(settings, 'ZOOM_HTTP_ASYNC_POOL_SIZE', 100)
+    connect_timeout, read_timeout = get_timeout()
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=pool_size),
+        # sock_read alone never fires on a response that trickles in, total does
+        timeout=aiohttp.ClientTimeout(
+            total=connect_timeout + read_timeout, sock_connect=connect_timeout, sock_read=read_timeout
+        ),
+    )
+
+
+def get_stream_timeout():
+    """Timeout for long downloads: no overall limit, but every read must make progress"""
+    connect_timeout, read_timeout = get_timeout()
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+
+
+class ZoomResponse:
+    """Fully read Zoom response, so callers never hold a pooled connection."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncZoomClient:
+    """asyncio counterpart of ``meetings.zoom.ZoomClient``.
+
+    Shares the token cache, the rate limiter and the circuit breakers with
+    the sync client. Cached
+    tokens are read without leaving the event loop; only an actual refresh
+    runs in a thread.
+    """
+
+    def __init__(self, account_id, client_id, client_secret, session=None, tokens=None, base_url=None,
+                 limiter=None, breaker=None):
+        self.account_id = account_id
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.session = session
+        self.tokens = tokens or token_manager
+        self.limiter = limiter or rate_limiter
+        self.breaker = breaker or circuit_breaker
+        self.base_url = (base_url or getattr(settings, 'ZOOM_API_BASE_URL', ZOOM_API_BASE_URL)).rstrip('/')
+
+    @classmethod
+    def for_mentor(cls, mentor=None, **kwargs):
+        return cls(*mentor_credentials(mentor), **kwargs)
+
+    async def get_access_token(self):
+        token = self.tokens.peek(self.account_id, self.client_id)
+        if token:
+            return token
+        return await sync_to_async(self.tokens.get_token, thread_sensitive=False)(
+            self.account_id, self.client_id, self.client_secret
+        )
+
+    async def request(self, method, path, expected=(200, 201, 204), endpoint=None, **kwargs):
+        """Send a request to the Zoom API and return a ``ZoomResponse``."""
+        session = self.session or get_async_session()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        endpoint = endpoint or method.lower()
+        deadline = self.limiter.deadline()
+
+        with ZoomSpan(endpoint, method, self.account_id) as span:
+            token_retried = False
+            while True:
+                if not self.breaker.allow(endpoint):
+                    raise ZoomUnavailable(endpoint, self.breaker.retry_after(endpoint))
+                await self.limiter.aacquire(self.account_id, deadline)
+                headers = {
+                    'Authorization': f'Bearer {await self.get_access_token()}',
+                    'Content-Type': 'application/json'
+                }
+                started = time.perf_counter()
+                span.attempt()
+                try:
+                    async with session.request(method, url, headers=headers, **kwargs) as raw:
+                        response = ZoomResponse(raw.status, raw.headers, await raw.read())
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    record_zoom_call(endpoint, None, time.perf_counter() - started)
+                    self.breaker.record_failure(endpoint)
+                    raise ZoomUnavailable(endpoint, self.breaker.retry_after(endpoint), str(e) or repr(e)) from e
+                record_zoom_call(endpoint, response.status_code, time.perf_counter() - started)
+                span.record(response.status_code, len(response.content))
+                if response.status_code >= 500:
+                    self.breaker.record_failure(endpoint)
+                else:
+                    self.breaker.record_success(endpoint)
+                retry_after = await self.limiter.aobserve(self.account_id, response.status_code, response.headers)
+                if response.status_code == 401 and not token_retried:
+                    logger.info(f"Zoom rejected cached token for {self.account_id}, refreshing")
+                    await sync_to_async(self.tokens.invalidate, thread_sensitive=False)(
+                        self.account_id, self.client_id
+                    )
+                    token_retried = True
+                    continue
+                if retry_after is not None:
+                    if time.monotonic() + retry_after > deadline:
+                        raise ZoomRateLimited(self.account_id, retry_after, response=response)
+                    continue
+                break
+
+        if response.status_code >= 500:
+            raise ZoomUnavailable(
+                endpoint, self.breaker.retry_after(endpoint), f'Zoom answered {response.status_code}: {response.text}'
+            )
+        if response.status_code not in expected:
+            raise ZoomAPIError(response.status_code, response.text, response=response)
+        return response
+
+    async def create_meeting(self, meeting_data, user_id='me'):
+        response = await self.request(
+            'POST', f'users/{user_id}/meetings', expected=(201,), endpoint='create_meeting', json=meeting_data
+        )
+        return response.json()
+
+    async def update_meeting(self, meeting_id, meeting_data):
+        await self.request(
+            'PATCH', f'meetings/{meeting_id}', expected=(204,), endpoint='update_meeting', json=meeting_data
+        )
+
+    async def delete_meeting(self, meeting_id):
+        await self.request('DELETE', f'meetings/{meeting_id}', expected=(204,), endpoint='delete_meeting')
+
+    async def get_meeting_recordings(self, meeting_id):
+        response = await self.request(
+            'GET', f'meetings/{meeting_id}/recordings', expected=(200,), endpoint='get_meeting_recordings'
+        )
+        return response.json()
+
+    async def delete_recording(self, meeting_id, recording_id):
+        await self.request(
+            'DELETE', f'meetings/{meeting_id}/recordings/{recording_id}', expected=(200, 204),
+            endpoint='delete_recording'
+        )
+
+    async def download(self, url, start=0, end=None):
+        """Start a streaming GET of a recording file's ``download_url`` for bytes ``start``-``end``.
+
+        Returns the open ``aiohttp.ClientResponse``, 206 when Zoom honoured
+        the Range header; the caller must release it. Like the sync client's
+        ``download``, this skips the rate limit and uses the 'download' breaker.
+        """
+        session = self.session or get_async_session()
+        headers = {}
+        if start or end is not None:
+            headers['Range'] = f"bytes={start}-{'' if end is None else end}"
+        with ZoomSpan('download', 'GET', self.account_id) as span:
+            token_retried = False
+            while True:
+                if not self.breaker.allow('download'):
+                    raise ZoomUnavailable('download', self.breaker.retry_after('download'))
+                headers['Authorization'] = f'Bearer {await self.get_access_token()}'
+                started = time.perf_counter()
+                span.attempt()
+                try:
+                    response = await session.get(url, headers=headers, timeout=get_stream_timeout())
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    record_zoom_call('download', None, time.perf_counter() - started)
+                    self.breaker.record_failure('download')
+                    raise ZoomUnavailable('download', self.breaker.retry_after('download'), str(e) or repr(e)) from e
+                record_zoom_call('download', response.status, time.perf_counter() - started)
+                span.record(response.status, content_length(response.headers))
+                if response.status >= 500:
+                    self.breaker.record_failure('download')
+                else:
+                    self.breaker.record_success('download')
+                if response.status == 401 and not token_retried:
+                    response.release()
+                    await sync_to_async(self.tokens.invalidate, thread_sensitive=False)(
+                        self.account_id, self.client_id
+                    )
+                    token_retried = True
+                    continue
+                break
+
+        if response.status not in (200, 206):
+            message = (await response.read())[:500].decode('utf-8', errors='replace')
+            response.release()
+            if response.status >= 500:
+                raise ZoomUnavailable(
+                    'download', self.breaker.retry_after('download'), f'Zoom answered {response.status}: {message}'
+                )
+            raise ZoomAPIError(response.status, message)
+        return response
@@ -3,6 +3,14 @@ ASGI config for zoom_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Besides Django's HTTP handler it answers the lifespan protocol: at startup
+it starts this process's meetings.changes hub listening, and at shutdown
+it stops the hub and ends the change streams still open. Servers that
+drain connections before the lifespan shutdown (uvicorn) wait for those
+streams, which never end on their own; run them with a graceful-shutdown
+timeout (``--timeout-graceful-shutdown``) and the dashboards reconnect to
+another worker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -13,4 +21,26 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zoom_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once get_asgi_application() has loaded the apps
+from meetings.changes import get_change_hub
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_change_hub().start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await get_change_hub().close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'meetings.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -132,6 +133,25 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache
+# Set REDIS_URL in production so every worker shares one cache (Zoom tokens etc.);
+# without it the meetings system checks warn, and check --deploy fails
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -196,18 +216,138 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Page sizes for the keyset-paginated listing endpoints
+MEETINGS_PAGE_SIZE = int(os.getenv('MEETINGS_PAGE_SIZE', 50))
+MEETINGS_MAX_PAGE_SIZE = int(os.getenv('MEETINGS_MAX_PAGE_SIZE', 200))
+
+# Bulk meeting creation: meetings per request, and Zoom calls in flight at
+# once (keep it at or below ZOOM_HTTP_POOL_SIZE)
+MEETINGS_BULK_MAX = int(os.getenv('MEETINGS_BULK_MAX', 500))
+MEETINGS_BULK_CONCURRENCY = int(os.getenv('MEETINGS_BULK_CONCURRENCY', 8))
+
+# In-process cache of listing responses per mentor (see meetings.response_cache):
+# total size cap in bytes, and seconds an entry lives even if nothing changes
+MEETINGS_RESPONSE_CACHE_MAX_BYTES = int(os.getenv('MEETINGS_RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+MEETINGS_RESPONSE_CACHE_TTL = int(os.getenv('MEETINGS_RESPONSE_CACHE_TTL', 60))
+
 # Zoom settings
 ZOOM_CLIENT_ID = os.getenv('ZOOM_CLIENT_ID')
 ZOOM_CLIENT_SECRET = os.getenv('ZOOM_CLIENT_SECRET')
 ZOOM_ACCOUNT_ID = os.getenv('ZOOM_ACCOUNT_ID')
 ZOOM_SDK_KEY = os.getenv('ZOOM_SDK_KEY')
 ZOOM_SDK_SECRET = os.getenv('ZOOM_SDK_SECRET')
+# Secret token of the Zoom app's event subscription; webhooks are rejected without it
+ZOOM_WEBHOOK_SECRET = os.environ.get('ZOOM_WEBHOOK_SECRET', '')
+
+# Outbound Zoom HTTP: keep-alive connections per worker and (connect, read) timeouts
+ZOOM_HTTP_POOL_SIZE = int(os.getenv('ZOOM_HTTP_POOL_SIZE', 10))
+ZOOM_HTTP_CONNECT_TIMEOUT = float(os.getenv('ZOOM_HTTP_CONNECT_TIMEOUT', 3.05))
+ZOOM_HTTP_READ_TIMEOUT = float(os.getenv('ZOOM_HTTP_READ_TIMEOUT', 15))
+# Connections per event loop for the async client used by the ASGI views
+ZOOM_HTTP_ASYNC_POOL_SIZE = int(os.getenv('ZOOM_HTTP_ASYNC_POOL_SIZE', 100))
+
+# Meeting SDK join signatures are issued per time bucket of this many
+# seconds and reused by every participant within it
+ZOOM_SIGNATURE_BUCKET = int(os.getenv('ZOOM_SIGNATURE_BUCKET', 60))
+
+# Refresh cached Zoom OAuth tokens this many seconds before they expire
+ZOOM_TOKEN_REFRESH_LEEWAY = int(os.getenv('ZOOM_TOKEN_REFRESH_LEEWAY', 60))
+
+# Outbound Zoom API calls per second per account (shared by all workers
+# through the cache), and how long a call may wait for a slot before the
+# endpoint answers 429
+ZOOM_RATE_LIMIT_PER_SECOND = int(os.getenv('ZOOM_RATE_LIMIT_PER_SECOND', 20))
+ZOOM_RATE_LIMIT_MAX_WAIT = float(os.getenv('ZOOM_RATE_LIMIT_MAX_WAIT', 10))
+
+# Circuit breaker per Zoom endpoint (create_meeting, update_meeting,
+# delete_meeting, list_meetings, list_recordings, get_meeting_recordings,
+# delete_recording, download, oauth): after
+# failure_threshold consecutive timeouts/5xx it fails fast for
+# reset_timeout seconds, then lets one probe through. Entries other than
+# 'default' override it for one endpoint.
+ZOOM_CIRCUIT_BREAKER = {
+    'default': {
+        'failure_threshold': int(os.getenv('ZOOM_CIRCUIT_FAILURE_THRESHOLD', 5)),
+        'reset_timeout': float(os.getenv('ZOOM_CIRCUIT_RESET_TIMEOUT', 30)),
+    },
+    # Every call needs a token, so give up on a dead OAuth endpoint sooner
+    'oauth': {'failure_threshold': 3},
+}
+
+# Tracing of outbound Zoom calls (see meetings.tracing), off unless spans go
+# to ZOOM_TRACE_FILE (OTLP/JSON lines, moved to <file>.1 once it reaches
+# ZOOM_TRACE_FILE_MAX_BYTES) and/or ZOOM_TRACE_ENDPOINT (an OTLP/HTTP
+# /v1/traces URL). Spans are exported every ZOOM_TRACE_EXPORT_INTERVAL
+# seconds; beyond ZOOM_TRACE_QUEUE_SIZE waiting spans, new ones are dropped
+ZOOM_TRACE_FILE = os.getenv('ZOOM_TRACE_FILE') or None
+ZOOM_TRACE_ENDPOINT = os.getenv('ZOOM_TRACE_ENDPOINT') or None
+ZOOM_TRACE_EXPORT_INTERVAL = float(os.getenv('ZOOM_TRACE_EXPORT_INTERVAL', 2))
+ZOOM_TRACE_QUEUE_SIZE = int(os.getenv('ZOOM_TRACE_QUEUE_SIZE', 10000))
+ZOOM_TRACE_FILE_MAX_BYTES = int(os.getenv('ZOOM_TRACE_FILE_MAX_BYTES', 100 * 1024 * 1024))
+ZOOM_TRACE_SERVICE_NAME = os.getenv('ZOOM_TRACE_SERVICE_NAME', 'zoom-backend')
 
 # AWS S3 Settings
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME', 'us-east-1')
 AWS_STORAGE_BUCKET_NAME = os.environ.get('AWS_STORAGE_BUCKET_NAME')
+AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL')  # MinIO or another S3-compatible store
+
+# Recording mirror worker (manage.py mirror_recordings): multipart part size,
+# parts uploaded in parallel per file, and the retry policy
+RECORDING_MIRROR_PART_SIZE = int(os.getenv('RECORDING_MIRROR_PART_SIZE_MB', 16)) * 1024 * 1024
+RECORDING_MIRROR_CONCURRENCY = int(os.getenv('RECORDING_MIRROR_CONCURRENCY', 4))
+RECORDING_MIRROR_PREFIX = os.getenv('RECORDING_MIRROR_PREFIX', 'recordings/')
+RECORDING_MIRROR_MAX_ATTEMPTS = int(os.getenv('RECORDING_MIRROR_MAX_ATTEMPTS', 8))
+RECORDING_MIRROR_RETRY_BACKOFF = int(os.getenv('RECORDING_MIRROR_RETRY_BACKOFF', 60))  # Seconds, doubled per attempt
+
+# Recording stream proxy (recordings/<id>/stream/): bytes fetched per upstream
+# request, lifetime of signed stream URLs, and the optional per-process disk
+# cache of hot blocks (disabled unless RECORDING_STREAM_CACHE_DIR is set)
+RECORDING_STREAM_WINDOW = int(os.getenv('RECORDING_STREAM_WINDOW_MB', 8)) * 1024 * 1024
+RECORDING_STREAM_URL_TTL = int(os.getenv('RECORDING_STREAM_URL_TTL', 6 * 60 * 60))
+RECORDING_STREAM_CACHE_DIR = os.getenv('RECORDING_STREAM_CACHE_DIR')
+RECORDING_STREAM_CACHE_SIZE = int(os.getenv('RECORDING_STREAM_CACHE_SIZE_MB', 1024)) * 1024 * 1024
+RECORDING_STREAM_BLOCK_SIZE = int(os.getenv('RECORDING_STREAM_BLOCK_SIZE_KB', 1024)) * 1024
+
+# Zoom participant joined/left webhooks are buffered in memory per process
+# and written in one batch every PARTICIPANT_FLUSH_INTERVAL milliseconds or
+# PARTICIPANT_FLUSH_EVENTS events; once PARTICIPANT_BUFFER_LIMIT events are
+# waiting, the receiving request flushes them itself
+PARTICIPANT_FLUSH_INTERVAL = int(os.getenv('PARTICIPANT_FLUSH_INTERVAL_MS', 250))
+PARTICIPANT_FLUSH_EVENTS = int(os.getenv('PARTICIPANT_FLUSH_EVENTS', 500))
+PARTICIPANT_BUFFER_LIMIT = int(os.getenv('PARTICIPANT_BUFFER_LIMIT', 20000))
+
+# Attendance summaries (refresh_attendance): meetings are summarized again
+# when participant events arrive up to ATTENDANCE_RECHECK_HOURS after their
+# start; reports flag joins later than ATTENDANCE_LATE_AFTER seconds and
+# leaves more than ATTENDANCE_DROP_OFF_BEFORE seconds before the scheduled end
+ATTENDANCE_RECHECK_HOURS = int(os.getenv('ATTENDANCE_RECHECK_HOURS', 48))
+ATTENDANCE_LATE_AFTER = int(os.getenv('ATTENDANCE_LATE_AFTER', 5 * 60))
+ATTENDANCE_DROP_OFF_BEFORE = int(os.getenv('ATTENDANCE_DROP_OFF_BEFORE', 10 * 60))
+
+# Dashboard change stream (server-sent events, ASGI only): signed stream URLs
+# stay valid CHANGE_STREAM_URL_TTL seconds, idle streams get a comment every
+# CHANGE_STREAM_HEARTBEAT seconds, and a client more than CHANGES_QUEUE_SIZE
+# events behind is told to reload instead
+CHANGE_STREAM_URL_TTL = int(os.getenv('CHANGE_STREAM_URL_TTL', 60 * 60))
+CHANGE_STREAM_HEARTBEAT = int(os.getenv('CHANGE_STREAM_HEARTBEAT', 15))
+CHANGES_QUEUE_SIZE = int(os.getenv('CHANGES_QUEUE_SIZE', 256))
+
+# Prometheus metrics (/metrics): with several worker processes, set
+# METRICS_DIR to a host-local directory, emptied on deploy, where each
+# process writes its totals every METRICS_FLUSH_INTERVAL seconds. Scrapers
+# must send METRICS_TOKEN as a bearer token; without one, only loopback and
+# private addresses may scrape
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Meeting reminders: minutes before start, and how far ahead (seconds) the
+# resident scheduler (check_meetings --daemon) keeps reminders in memory
+MEETING_REMINDER_OFFSETS = [24 * 60, 60, 5]
+REMINDER_SCHEDULER_HORIZON = int(os.getenv('REMINDER_SCHEDULER_HORIZON', 600))
+REMINDER_SCHEDULER_REFRESH = int(os.getenv('REMINDER_SCHEDULER_REFRESH', 60))
 
 # Email Settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -217,3 +357,11 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL')
+
+# Email outbox worker (manage.py process_email_outbox): messages per second
+# per recipient domain ('default' covers the rest) and the retry policy
+EMAIL_OUTBOX_RATE_LIMITS = {
+    'default': float(os.getenv('EMAIL_OUTBOX_RATE_LIMIT', 10)),
+}
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+EMAIL_OUTBOX_RETRY_BACKOFF = int(os.getenv('EMAIL_OUTBOX_RETRY_BACKOFF', 30))  # Seconds, doubled per attempt
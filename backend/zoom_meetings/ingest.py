@@ -0,0 +1,401 @@
+"""Ingesting participant joined/left events in batches.
+
+Zoom sends ``meeting.participant_joined`` and ``meeting.participant_left``
+for every attendee, so a 500-person lecture brings thousands of webhooks a
+minute, most of them in bursts at its start and end. Rather than storing
+and applying each one on its own, the receiving process appends them to
+its ParticipantBuffer, and a background thread writes whatever is waiting
+every PARTICIPANT_FLUSH_INTERVAL milliseconds, or as soon as
+PARTICIPANT_FLUSH_EVENTS have piled up, in one transaction:
+
+- the ParticipantEvent rows: COPY into a temporary table and one
+  INSERT ... ON CONFLICT DO NOTHING on PostgreSQL (``bulk_create``
+  elsewhere), so redelivered webhooks are dropped;
+- one upsert of the Participant rows of users matched by email, keeping
+  their first join and last leave;
+- one UPDATE per meeting adding the new joins, leaves and attendees to its
+  counters with ``F()``.
+
+Meetings scheduled through the mentor dashboard live in ``meetings``; the
+first participant event of one creates its zoom_meetings.Meeting (linked
+by the Zoom meeting id), so its attendance is recorded like any other.
+
+The join/leave endpoints feed the same buffer. Users joining from the app
+are then reported by both the endpoint and Zoom; their Participant row is
+the same either way.
+
+The buffer lives in process memory: events acknowledged to Zoom but not
+flushed yet are lost if the process dies without running its exit
+handlers. Attendance is a report rather than a record of money, so that is
+the price for taking the bursts at a few queries per batch.
+"""
+import atexit
+import io
+import logging
+import os
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from meetings.models import Meeting as ScheduledMeeting
+
+from .models import Meeting, Participant, ParticipantEvent
+
+logger = logging.getLogger(__name__)
+
+PARTICIPANT_EVENTS = {
+    'meeting.participant_joined': 'joined',
+    'meeting.participant_left': 'left',
+}
+EVENT_COLUMNS = [
+    'meeting_id', 'user_id', 'event', 'participant_id', 'name', 'email', 'occurred_at', 'dedup_key', 'received_at'
+]
+# Rows per multi-row upsert, well under PostgreSQL's 65535 parameters per statement
+UPSERT_CHUNK = 5000
+
+# A participant event whose meeting (``meeting_id`` is the local id, when known) and user are not looked up yet
+PendingEvent = namedtuple(
+    'PendingEvent', 'dedup_key meeting_id zoom_meeting_id event participant_id name email occurred_at user_id'
+)
+
+
+def parse_zoom_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def event_from_webhook(data):
+    """PendingEvent for a participant webhook; raises ValueError when it names no meeting or participant"""
+    event = PARTICIPANT_EVENTS[data.get('event')]
+    zoom_object = data.get('payload', {}).get('object', {})
+    participant = zoom_object.get('participant') or {}
+    meeting_id = zoom_object.get('id')
+    participant_id = participant.get('participant_uuid') or participant.get('user_id') or participant.get('id')
+    if not meeting_id or not participant_id:
+        raise ValueError('Participant event without a meeting or participant id')
+
+    occurred = participant.get('join_time' if event == 'joined' else 'leave_time')
+    if occurred:
+        occurred_at = parse_zoom_time(occurred)
+    elif data.get('event_ts'):
+        occurred_at = datetime.fromtimestamp(data['event_ts'] / 1000, tz=dt_timezone.utc)
+    else:
+        occurred_at = timezone.now()
+    return PendingEvent(
+        dedup_key=f"{data['event']}:{zoom_object.get('uuid') or meeting_id}:{participant_id}:"
+                  f"{data.get('event_ts') or occurred}"[:255],
+        meeting_id=None,
+        zoom_meeting_id=str(meeting_id),
+        event=event,
+        participant_id=str(participant_id)[:255],
+        name=(participant.get('user_name') or '')[:255],
+        email=(participant.get('email') or '')[:254],
+        occurred_at=occurred_at,
+        user_id=None,
+    )
+
+
+def event_for_user(meeting, user, event):
+    """PendingEvent for a user joining or leaving through the join/leave endpoints"""
+    now = timezone.now()
+    return PendingEvent(
+        dedup_key=f'api:{event}:{meeting.id}:{user.id}:{now.timestamp()}',
+        meeting_id=meeting.id,
+        zoom_meeting_id=meeting.meeting_id,
+        event=event,
+        participant_id=f'user:{user.id}',
+        name=user.username,
+        email=user.email,
+        occurred_at=now,
+        user_id=user.id,
+    )
+
+
+def copy_text(value):
+    """``value`` in the text format of COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(cursor, sql, rows):
+    """Run ``COPY ... FROM STDIN`` on a psycopg 3 or psycopg2 cursor, feeding it ``rows``"""
+    if hasattr(cursor, 'copy'):
+        with cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_text(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(sql, buffer)
+
+
+def insert_events(rows):
+    """Insert the ParticipantEvents not stored yet; returns the ones inserted"""
+    rows = sorted(rows, key=lambda row: row.dedup_key)
+    if connection.vendor != 'postgresql':
+        stored = set(
+            ParticipantEvent.objects.filter(dedup_key__in={row.dedup_key for row in rows})
+            .values_list('dedup_key', flat=True)
+        )
+        new = {}
+        for row in rows:
+            if row.dedup_key not in stored:
+                new.setdefault(row.dedup_key, row)
+        return ParticipantEvent.objects.bulk_create(new.values())
+
+    table = connection.ops.quote_name(ParticipantEvent._meta.db_table)
+    columns = ', '.join(EVENT_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE participant_event_load ON COMMIT DROP AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        copy_rows(cursor.cursor, f'COPY participant_event_load ({columns}) FROM STDIN', (
+            [getattr(row, column) for column in EVENT_COLUMNS] for row in rows
+        ))
+        # In dedup_key order, so two processes inserting the same redelivered events cannot deadlock
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) SELECT {columns} FROM participant_event_load ORDER BY dedup_key '
+            f'ON CONFLICT (dedup_key) DO NOTHING RETURNING meeting_id, user_id, event, occurred_at'
+        )
+        inserted = [
+            ParticipantEvent(meeting_id=meeting_id, user_id=user_id, event=event, occurred_at=occurred_at)
+            for meeting_id, user_id, event, occurred_at in cursor.fetchall()
+        ]
+        # ON COMMIT DROP waits for the outermost transaction, and a flush may run inside another one
+        cursor.execute('DROP TABLE participant_event_load')
+        return inserted
+
+
+def upsert_participants(events):
+    """Merge the events of matched users into their Participant rows; returns ``{meeting_id: rows created}``"""
+    spans = {}
+    for event in events:
+        if event.user_id is None:
+            continue
+        key = (event.meeting_id, event.user_id)
+        joined_at, left_at = spans.get(key, (None, None))
+        if event.event == 'joined':
+            joined_at = min(joined_at or event.occurred_at, event.occurred_at)
+        else:
+            left_at = max(left_at or event.occurred_at, event.occurred_at)
+        spans[key] = (joined_at, left_at)
+    # Same order in every process, so concurrent flushes cannot deadlock on each other's rows
+    keys = sorted(spans)
+    created = Counter()
+    if not keys:
+        return created
+
+    if connection.vendor != 'postgresql':
+        existing = {
+            (participant.meeting_id, participant.user_id): participant
+            for participant in Participant.objects.filter(
+                meeting_id__in={meeting_id for meeting_id, _ in keys}, user_id__in={user_id for _, user_id in keys}
+            )
+        }
+        new, changed = [], []
+        for key in keys:
+            joined_at, left_at = spans[key]
+            participant = existing.get(key)
+            if participant is None:
+                new.append(Participant(meeting_id=key[0], user_id=key[1], joined_at=joined_at, left_at=left_at))
+                created[key[0]] += 1
+                continue
+            participant.joined_at = min(filter(None, (participant.joined_at, joined_at)), default=None)
+            participant.left_at = max(filter(None, (participant.left_at, left_at)), default=None)
+            changed.append(participant)
+        Participant.objects.bulk_create(new)
+        Participant.objects.bulk_update(changed, ['joined_at', 'left_at'])
+        return created
+
+    table = connection.ops.quote_name(Participant._meta.db_table)
+    with connection.cursor() as cursor:
+        for i in range(0, len(keys), UPSERT_CHUNK):
+            chunk = keys[i:i + UPSERT_CHUNK]
+            params = []
+            for meeting_id, user_id in chunk:
+                params.extend((meeting_id, user_id, *spans[meeting_id, user_id]))
+            # LEAST/GREATEST skip NULLs; xmax is 0 only on rows this statement inserted
+            cursor.execute(
+                f'INSERT INTO {table} (meeting_id, user_id, joined_at, left_at) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(chunk))} '
+                f'ON CONFLICT (meeting_id, user_id) DO UPDATE SET '
+                f'joined_at = LEAST({table}.joined_at, EXCLUDED.joined_at), '
+                f'left_at = GREATEST({table}.left_at, EXCLUDED.left_at) '
+                f'RETURNING meeting_id, xmax = 0',
+                params
+            )
+            created.update(meeting_id for meeting_id, inserted in cursor.fetchall() if inserted)
+    return created
+
+
+def update_counters(events, attendees):
+    joins, leaves = Counter(), Counter()
+    for event in events:
+        (joins if event.event == 'joined' else leaves)[event.meeting_id] += 1
+    for meeting_id in sorted(set(joins) | set(leaves)):
+        Meeting.objects.filter(id=meeting_id).update(
+            join_count=F('join_count') + joins[meeting_id],
+            leave_count=F('leave_count') + leaves[meeting_id],
+            attendee_count=F('attendee_count') + attendees[meeting_id],
+        )
+
+
+def link_scheduled_meetings(zoom_ids):
+    """Create the Meeting rows of dashboard-scheduled meetings among ``zoom_ids``; returns how many were found"""
+    scheduled = ScheduledMeeting.objects.filter(meeting_id__in=zoom_ids, mentor__isnull=False) \
+        .select_related('mentor')
+    created = Meeting.objects.bulk_create([
+        Meeting(topic=meeting.topic, start_time=meeting.start_time, duration=meeting.duration,
+                meeting_id=meeting.meeting_id, meeting_password=meeting.password or '',
+                join_url=meeting.join_url or '', host_id=meeting.mentor.user_id)
+        for meeting in scheduled
+    ], ignore_conflicts=True)  # Another process may link the same meeting at the same time
+    return len(created)
+
+
+def flush_events(events):
+    """Write a batch of PendingEvents in one transaction; returns counts of what became of them"""
+    stats = Counter(received=len(events))
+    zoom_ids = {event.zoom_meeting_id for event in events if event.meeting_id is None}
+    meeting_ids = dict(
+        Meeting.objects.filter(meeting_id__in=zoom_ids).values_list('meeting_id', 'id')
+    ) if zoom_ids else {}
+    if zoom_ids - meeting_ids.keys() and link_scheduled_meetings(zoom_ids - meeting_ids.keys()):
+        meeting_ids.update(
+            Meeting.objects.filter(meeting_id__in=zoom_ids - meeting_ids.keys()).values_list('meeting_id', 'id')
+        )
+    emails = {event.email.lower() for event in events if event.user_id is None and event.email}
+    # Several accounts may share an address; the oldest one wins
+    user_ids = dict(
+        User.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails)
+        .order_by('-id').values_list('email_lower', 'id')
+    ) if emails else {}
+
+    now = timezone.now()
+    rows = []
+    for event in events:
+        meeting_id = event.meeting_id or meeting_ids.get(event.zoom_meeting_id)
+        if meeting_id is None:
+            stats['unknown_meeting'] += 1
+            continue
+        rows.append(ParticipantEvent(
+            meeting_id=meeting_id,
+            user_id=event.user_id or user_ids.get(event.email.lower()),
+            event=event.event,
+            participant_id=event.participant_id,
+            name=event.name,
+            email=event.email,
+            occurred_at=event.occurred_at,
+            dedup_key=event.dedup_key,
+            received_at=now,
+        ))
+    if not rows:
+        return stats
+
+    with transaction.atomic():
+        inserted = insert_events(rows)
+        attendees = upsert_participants(inserted)
+        update_counters(inserted, attendees)
+    stats['inserted'] += len(inserted)
+    stats['duplicate'] += len(rows) - len(inserted)
+    stats['attendees'] += sum(attendees.values())
+    return stats
+
+
+class ParticipantBuffer:
+    """Participant events waiting to be written, flushed in batches by a background thread"""
+
+    def __init__(self, flush_interval=0.25, flush_events=500, limit=20000):
+        self.flush_interval = flush_interval
+        self.flush_events = flush_events
+        self.limit = limit
+        self.events = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # One flush at a time, so counters see batches in order
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.thread = None
+        self.pid = os.getpid()
+        self.stats = Counter()
+
+    def add(self, event):
+        with self.lock:
+            self.events.append(event)
+            waiting = len(self.events)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='participant-flush', daemon=True)
+                self.thread.start()
+        if waiting >= self.limit:
+            # The flusher is not keeping up, or the database is failing: the sender waits for a flush
+            self.flush()
+        elif waiting >= self.flush_events:
+            self.wakeup.set()
+
+    def run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        """Write everything waiting; returns the counts of this flush"""
+        with self.flush_lock:
+            with self.lock:
+                events, self.events = self.events, []
+            if not events:
+                return Counter()
+            self.stats['flushes'] += 1
+            try:
+                stats = flush_events(events)
+            except Exception as e:
+                with self.lock:
+                    # Retried with the next flush, as far as they fit under the limit
+                    room = max(self.limit - len(self.events), 0)
+                    self.events[:0] = events[:room]
+                    dropped = len(events) - min(room, len(events))
+                self.stats['failed_flushes'] += 1
+                self.stats['dropped'] += dropped
+                logger.error(f"Error flushing {len(events)} participant events ({dropped} dropped): {str(e)}")
+                return Counter()
+            self.stats.update(stats)
+            return stats
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_participant_buffer():
+    """This process's ParticipantBuffer, flushed once more when the process exits"""
+    global _buffer
+    with _buffer_lock:
+        # A buffer inherited through fork has no flusher thread in this process
+        if _buffer is None or _buffer.pid != os.getpid():
+            _buffer = ParticipantBuffer(
+                flush_interval=getattr(settings, 'PARTICIPANT_FLUSH_INTERVAL', 250) / 1000,
+                flush_events=getattr(settings, 'PARTICIPANT_FLUSH_EVENTS', 500),
+                limit=getattr(settings, 'PARTICIPANT_BUFFER_LIMIT', 20000),
+            )
+            atexit.register(_buffer.close)
+    return _buffer
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-17 15:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoom_meetings', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='attendee_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='join_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='leave_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ParticipantEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('joined', 'Joined'), ('left', 'Left')], max_length=10)),
+                ('participant_id', models.CharField(max_length=255)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('occurred_at', models.DateTimeField()),
+                ('dedup_key', models.CharField(max_length=255, unique=True)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participant_events', to='zoom_meetings.meeting')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['meeting', 'participant_id', 'occurred_at'], name='participant_event_meeting_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-17 16:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoom_meetings', '0002_participant_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='meeting',
+            constraint=models.UniqueConstraint(condition=models.Q(('meeting_id', ''), _negated=True), fields=('meeting_id',), name='zoom_meeting_id_uniq'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Meeting(models.Model):
     topic = models.CharField(max_length=200)
@@ -12,9 +13,25 @@ class Meeting(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Attendance counters, incremented by zoom_meetings.ingest as participant events are flushed
+    join_count = models.IntegerField(default=0)
+    leave_count = models.IntegerField(default=0)
+    attendee_count = models.IntegerField(default=0)  # Distinct users with a Participant row
+
+    class Meta:
+        constraints = [
+            # Participant webhooks find their meeting by Zoom id
+            models.UniqueConstraint(fields=['meeting_id'], condition=~models.Q(meeting_id=''),
+                                    name='zoom_meeting_id_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.topic} - {self.start_time}"
 
+    @property
+    def current_participants(self):
+        return max(self.join_count - self.leave_count, 0)
+
 class Participant(models.Model):
     meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='participants')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -26,3 +43,33 @@ class Participant(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.meeting.topic}"
+
+class ParticipantEvent(models.Model):
+    """One participant joining or leaving a meeting, as reported by Zoom or the join/leave endpoints.
+
+    Appended in batches by zoom_meetings.ingest; never updated.
+    """
+    EVENT_CHOICES = (
+        ('joined', 'Joined'),
+        ('left', 'Left'),
+    )
+
+    meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='participant_events')
+    # Matched by email; guests have none
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    event = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    participant_id = models.CharField(max_length=255)  # Zoom's participant_uuid, or user:<id> from the endpoints
+    name = models.CharField(max_length=255, blank=True)
+    email = models.EmailField(blank=True)
+    occurred_at = models.DateTimeField()
+    # event:meeting:participant:event_ts, identical on every redelivery of the same webhook
+    dedup_key = models.CharField(max_length=255, unique=True)
+    received_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['meeting', 'participant_id', 'occurred_at'], name='participant_event_meeting_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name or self.participant_id} {self.event} {self.meeting_id} at {self.occurred_at}"
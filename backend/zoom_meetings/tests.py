@@ -1,3 +1,169 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .ingest import ParticipantBuffer, PendingEvent, flush_events
+from .models import Meeting, Participant, ParticipantEvent
+from .views import MeetingViewSet
+
+START = datetime(2030, 1, 7, 10, 0, tzinfo=dt_timezone.utc)
+
+
+def at(time):
+    hours, minutes = map(int, time.split(':'))
+    return START.replace(hour=hours, minute=minutes)
+
+
+def zoom_event(event, participant_id, time, email='', meeting_id='777'):
+    return PendingEvent(
+        dedup_key=f'{event}:{meeting_id}:{participant_id}:{time}', meeting_id=None, zoom_meeting_id=meeting_id,
+        event=event, participant_id=participant_id, name=participant_id, email=email, occurred_at=at(time),
+        user_id=None,
+    )
+
+
+class ParticipantBufferTests(SimpleTestCase):
+    """When the flusher thread writes, with the database write itself replaced"""
+
+    def setUp(self):
+        self.batches = []
+        self.flushed = threading.Event()
+
+        def record(events):
+            self.batches.append(events)
+            self.flushed.set()
+            return {'received': len(events)}
+
+        patcher = mock.patch('zoom_meetings.ingest.flush_events', side_effect=record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def buffer(self, **kwargs):
+        buffer = ParticipantBuffer(**kwargs)
+        self.addCleanup(buffer.close)
+        return buffer
+
+    def test_flushes_when_enough_events_wait(self):
+        buffer = self.buffer(flush_interval=60, flush_events=3)
+        buffer.add(zoom_event('joined', 'a', '10:00'))
+        buffer.add(zoom_event('joined', 'b', '10:00'))
+        self.assertFalse(self.flushed.wait(0.2))
+
+        buffer.add(zoom_event('joined', 'c', '10:00'))
+        self.assertTrue(self.flushed.wait(5))
+        self.assertEqual([[event.participant_id for event in batch] for batch in self.batches], [['a', 'b', 'c']])
+        self.assertEqual(buffer.stats['received'], 3)
+
+    def test_flushes_after_the_interval(self):
+        buffer = self.buffer(flush_interval=0.2, flush_events=500)
+        started = time.monotonic()
+        buffer.add(zoom_event('joined', 'a', '10:00'))
+        self.assertTrue(self.flushed.wait(5))
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertEqual(len(self.batches), 1)
+
+    def test_sender_flushes_at_the_limit(self):
+        buffer = self.buffer(flush_interval=60, flush_events=500, limit=2)
+        buffer.add(zoom_event('joined', 'a', '10:00'))
+        self.assertEqual(self.batches, [])
+        buffer.add(zoom_event('joined', 'b', '10:00'))
+        # Written by add() itself, not the flusher thread
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(buffer.events, [])
+
+
+class FlushEventsTests(TestCase):
+    """One flush: stored events, Participant upserts and counters, on COPY/upsert under PostgreSQL"""
+
+    def setUp(self):
+        self.host = User.objects.create(username='host')
+        self.user = User.objects.create(username='student', email='student@example.com')
+        self.meeting = Meeting.objects.create(topic='Lecture', start_time=START, duration=60, meeting_id='777',
+                                              host=self.host)
+
+    def test_duplicated_join_keeps_first_join_and_last_leave(self):
+        stats = flush_events([
+            zoom_event('joined', 'laptop', '10:05', 'Student@Example.com'),
+            zoom_event('joined', 'phone', '10:02', 'student@example.com'),
+            zoom_event('left', 'phone', '10:30', 'student@example.com'),
+        ])
+        self.assertEqual((stats['inserted'], stats['attendees']), (3, 1))
+        flush_events([
+            zoom_event('joined', 'tablet', '10:10', 'student@example.com'),
+            zoom_event('left', 'laptop', '10:20', 'student@example.com'),
+        ])
+
+        participant = Participant.objects.get(meeting=self.meeting, user=self.user)
+        # LEAST of the joins, GREATEST of the leaves, across both flushes
+        self.assertEqual((participant.joined_at, participant.left_at), (at('10:02'), at('10:30')))
+        self.assertEqual(ParticipantEvent.objects.filter(user=self.user).count(), 5)
+
+    def test_redelivered_events_are_dropped(self):
+        events = [zoom_event('joined', 'laptop', '10:00', 'student@example.com'),
+                  zoom_event('joined', 'guest', '10:01')]
+        flush_events(events)
+        stats = flush_events(events + [zoom_event('left', 'guest', '10:40')])
+
+        self.assertEqual((stats['inserted'], stats['duplicate']), (1, 2))
+        self.assertEqual(ParticipantEvent.objects.count(), 3)
+        self.meeting.refresh_from_db()
+        self.assertEqual((self.meeting.join_count, self.meeting.leave_count), (2, 1))
+
+    def test_counters_are_incremented_in_the_database(self):
+        flush_events([zoom_event('joined', 'laptop', '10:00', 'student@example.com')])
+        # Counts written meanwhile by another process are added to, not overwritten
+        Meeting.objects.filter(id=self.meeting.id).update(join_count=10, leave_count=4, attendee_count=5)
+        flush_events([
+            zoom_event('joined', 'guest', '10:01'),
+            zoom_event('left', 'guest', '10:20'),
+            zoom_event('left', 'laptop', '10:50', 'student@example.com'),
+        ])
+
+        self.meeting.refresh_from_db()
+        # The student already had a Participant row, so they add no attendee
+        self.assertEqual((self.meeting.join_count, self.meeting.leave_count, self.meeting.attendee_count),
+                         (11, 6, 5))
+
+    def test_unknown_meetings_are_counted(self):
+        stats = flush_events([zoom_event('joined', 'laptop', '10:00', meeting_id='999')])
+        self.assertEqual(stats['unknown_meeting'], 1)
+        self.assertFalse(ParticipantEvent.objects.exists())
+
+
+class JoinLeaveTests(TestCase):
+    """The join/leave endpoints go through the same buffer"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='host', email='host@example.com')
+        self.meeting = Meeting.objects.create(topic='Lecture', start_time=START, duration=60, meeting_id='777',
+                                              host=self.user)
+        self.buffer = ParticipantBuffer(flush_interval=60)
+        self.addCleanup(self.buffer.close)
+        patcher = mock.patch('zoom_meetings.views.get_participant_buffer', return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, action):
+        request = APIRequestFactory().post(f'/meetings/{self.meeting.id}/{action}/')
+        force_authenticate(request, user=self.user)
+        return MeetingViewSet.as_view({'post': action})(request, pk=self.meeting.id)
+
+    def test_join_and_leave_write_a_participant(self):
+        with mock.patch('zoom_meetings.views.get_signer') as get_signer:
+            get_signer.return_value.sign.return_value = ('signature', None)
+            response = self.post('join')
+        self.assertEqual((response.status_code, response.data['signature']), (200, 'signature'))
+        self.assertEqual(self.post('leave').status_code, 200)
+
+        self.assertEqual(self.buffer.flush()['inserted'], 2)
+        participant = Participant.objects.get(meeting=self.meeting, user=self.user)
+        self.assertIsNotNone(participant.joined_at)
+        self.assertGreaterEqual(participant.left_at, participant.joined_at)
+        self.meeting.refresh_from_db()
+        self.assertEqual((self.meeting.join_count, self.meeting.leave_count, self.meeting.attendee_count),
+                         (1, 1, 1))
@@ -6,10 +6,11 @@ from django.conf import settings
 import jwt
 import time
 import json
-from datetime import datetime, timedelta
-import requests
+from meetings.signatures import get_signer
+from meetings.zoom import ZoomClient, ZoomAPIError, ZoomUnavailable
 
-from .models import Meeting, Participant
+from .ingest import event_for_user, get_participant_buffer
+from .models import Meeting
 from .serializers import MeetingSerializer, ParticipantSerializer
 
 class MeetingViewSet(viewsets.ModelViewSet):
@@ -21,20 +22,9 @@ class MeetingViewSet(viewsets.ModelViewSet):
         return Meeting.objects.filter(host=self.request.user)
 
     def generate_zoom_signature(self, meeting_number, role):
-        iat = int(time.time())
-        exp = iat + 60 * 60 * 2  # Token expires in 2 hours
-
-        token_payload = {
-            'sdkKey': settings.ZOOM_SDK_KEY,
-            'mn': meeting_number,
-            'role': role,
-            'iat': iat,
-            'exp': exp,
-            'appKey': settings.ZOOM_SDK_KEY,
-            'tokenExp': iat + 60 * 60 * 2
-        }
-
-        return jwt.encode(token_payload, settings.ZOOM_SDK_SECRET, algorithm='HS256')
+        # Cached per time bucket and valid for two hours, see meetings.signatures
+        signature, _ = get_signer().sign(meeting_number, role, flavor='jwt')
+        return signature
 
     def generate_jwt_token(self):
         """Generate a JWT token for Zoom API authentication"""
@@ -52,9 +42,6 @@ class MeetingViewSet(viewsets.ModelViewSet):
     def create_meeting(self, request):
         """Create a new Zoom meeting"""
         try:
-            # Generate JWT token
-            token = self.generate_jwt_token()
-            
             # Prepare meeting data
             meeting_data = {
                 'topic': request.data.get('topic', 'New Meeting'),
@@ -72,20 +59,20 @@ class MeetingViewSet(viewsets.ModelViewSet):
             }
 
             # Create meeting using Zoom API
-            headers = {
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(
-                'https://api.zoom.us/v2/users/me/meetings',
-                headers=headers,
-                json=meeting_data
-            )
-            
-            if response.status_code == 201:
-                meeting_info = response.json()
-                
+            try:
+                meeting_info = ZoomClient.for_mentor().create_meeting(meeting_data)
+            except ZoomUnavailable as e:
+                retry_after = str(max(int(e.retry_after), 1))
+                return Response({
+                    'success': False,
+                    'error': e.message,
+                    'retry_after': retry_after
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': retry_after})
+            except ZoomAPIError as e:
+                meeting_info = None
+                error = e.response.json() if e.response is not None else e.message
+
+            if meeting_info:
                 # Save meeting details to database
                 meeting = Meeting.objects.create(
                     topic=meeting_info['topic'],
@@ -109,7 +96,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
             else:
                 return Response({
                     'success': False,
-                    'error': response.json()
+                    'error': error
                 }, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
@@ -139,6 +126,15 @@ class MeetingViewSet(viewsets.ModelViewSet):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def create_zoom_meeting(self, topic, start_time, duration):
+        """Create the Zoom side of a meeting saved through the serializer"""
+        return ZoomClient.for_mentor().create_meeting({
+            'topic': topic,
+            'type': 2,
+            'start_time': start_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'duration': duration,
+        })
+
     def perform_create(self, serializer):
         meeting = serializer.save()
         zoom_meeting = self.create_zoom_meeting(
@@ -155,11 +151,7 @@ class MeetingViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
         meeting = self.get_object()
-        participant = Participant.objects.create(
-            meeting=meeting,
-            user=request.user,
-            joined_at=datetime.now()
-        )
+        get_participant_buffer().add(event_for_user(meeting, request.user, 'joined'))
         
         signature = self.generate_zoom_signature(
             meeting.meeting_id,
@@ -177,11 +169,5 @@ class MeetingViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def leave(self, request, pk=None):
         meeting = self.get_object()
-        participant = Participant.objects.get(
-            meeting=meeting,
-            user=request.user,
-            left_at__isnull=True
-        )
-        participant.left_at = datetime.now()
-        participant.save()
+        get_participant_buffer().add(event_for_user(meeting, request.user, 'left'))
         return Response(status=status.HTTP_200_OK)
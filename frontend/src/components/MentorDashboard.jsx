@@ -33,6 +33,24 @@ import axios from 'axios';
 import MeetingInterface from './MeetingInterface';
 import { Add as AddIcon, VideoCall as VideoCallIcon } from '@mui/icons-material';
 
+// The listing endpoints return one page at a time; follow `next` until the last page
+const fetchAllPages = async (url, key, params = {}) => {
+  const token = localStorage.getItem('access_token');
+  const items = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(url, {
+      params: cursor ? { ...params, cursor } : params,
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+    items.push(...(response.data[key] || []));
+    cursor = response.data.next;
+  } while (cursor);
+  return items;
+};
+
 const MentorDashboard = () => {
   const location = useLocation();
   const [meetings, setMeetings] = useState([]);
@@ -70,18 +88,115 @@ const MentorDashboard = () => {
     }
   }, [location]);
 
-  const fetchMeetings = async () => {
+  // Apply the server's change events instead of refetching the listings
+  useEffect(() => {
+    let source = null;
+    let closed = false;
+    let retryTimer = null;
+    let connectedBefore = false;
+
+    const resync = () => {
+      fetchMeetings();
+      fetchRecordings();
+    };
+
+    const connect = async () => {
+      try {
+        const token = localStorage.getItem('access_token');
+        const response = await axios.get('http://localhost:8000/api/meetings/changes/url/', {
+          headers: {
+            'Authorization': `Bearer ${token}`
+          }
+        });
+        if (closed) return;
+
+        source = new EventSource(`http://localhost:8000${response.data.url}`);
+        source.onopen = () => {
+          // Changes made while we were disconnected were not sent to us
+          if (connectedBefore) resync();
+          connectedBefore = true;
+        };
+        source.onerror = () => {
+          // The browser retries by itself unless the stream was refused (e.g. the URL expired)
+          if (source.readyState === EventSource.CLOSED) {
+            source.close();
+            retryTimer = setTimeout(connect, 5000);
+          }
+        };
+
+        const on = (type, handler) => source.addEventListener(type, (message) => handler(JSON.parse(message.data)));
+        on('meeting.created', (event) => upsertMeeting(event.meeting));
+        on('meeting.updated', (event) => {
+          if (event.enrollment_changed) {
+            fetchMeetings();
+          } else {
+            upsertMeeting(event.meeting);
+          }
+        });
+        on('meeting.deleted', (event) => {
+          setMeetings(prev => prev.filter(meeting => meeting.meeting_id !== event.meeting.meeting_id));
+          setRecordings(prev => prev.filter(recording => recording.meeting_id !== event.meeting.meeting_id));
+        });
+        on('recording.status_changed', (event) => upsertMeeting(event.meeting));
+        on('recording.available', (event) => fetchMeetingRecordings(event.meeting.meeting_id));
+        on('recording.deleted', (event) => {
+          setRecordings(prev => prev.filter(recording => !event.recording_ids.includes(recording.id)));
+        });
+        on('resync', resync);
+      } catch (error) {
+        console.error('Error opening change stream:', error);
+        retryTimer = setTimeout(connect, 30000);
+      }
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, []);
+
+  // Merge a meeting (or some of its fields) into the upcoming meetings
+  const upsertMeeting = (changes) => {
+    setMeetings(prev => {
+      const index = prev.findIndex(meeting => meeting.meeting_id === changes.meeting_id);
+      if (index === -1) {
+        // Only complete meetings can be added; partial updates of others are not shown anyway
+        if (!changes.start_time || new Date(changes.start_time) <= new Date()) return prev;
+        return [...prev, { students: [], ...changes }]
+          .sort((a, b) => new Date(a.start_time) - new Date(b.start_time));
+      }
+      const updated = { ...prev[index], ...changes };
+      if (new Date(updated.start_time) <= new Date()) {
+        return prev.filter((_, i) => i !== index);
+      }
+      return prev.map((meeting, i) => (i === index ? updated : meeting))
+        .sort((a, b) => new Date(a.start_time) - new Date(b.start_time));
+    });
+  };
+
+  const fetchMeetingRecordings = async (meetingId) => {
     try {
-      const token = localStorage.getItem('access_token');
-      const response = await axios.get('http://localhost:8000/api/meetings/list/', {
-        headers: {
-          'Authorization': `Bearer ${token}`
-        }
+      const fetched = await fetchAllPages('http://localhost:8000/api/meetings/recordings/', 'recordings', {
+        meeting_id: meetingId
       });
+      setRecordings(prev => [
+        ...fetched,
+        ...prev.filter(recording => !fetched.some(item => item.id === recording.id))
+      ].sort((a, b) => new Date(b.created_at) - new Date(a.created_at)));
+    } catch (error) {
+      console.error('Error fetching meeting recordings:', error);
+    }
+  };
+
+  const fetchMeetings = async () => {
+    try {
+      const fetched = await fetchAllPages('http://localhost:8000/api/meetings/list/', 'meetings', { upcoming: 1 });
       
       // Filter out past meetings
       const currentTime = new Date();
-      const upcomingMeetings = response.data.filter(meeting => 
+      const upcomingMeetings = fetched.filter(meeting => 
         new Date(meeting.start_time) > currentTime
       );
       
@@ -99,13 +214,7 @@ const MentorDashboard = () => {
 
   const fetchRecordings = async () => {
     try {
-      const token = localStorage.getItem('access_token');
-      const response = await axios.get('http://localhost:8000/api/meetings/recordings/', {
-        headers: {
-          'Authorization': `Bearer ${token}`
-        }
-      });
-      setRecordings(response.data.recordings || []);
+      setRecordings(await fetchAllPages('http://localhost:8000/api/meetings/recordings/', 'recordings'));
     } catch (error) {
       console.error('Error fetching recordings:', error);
       setError('Failed to fetch recordings');
@@ -132,7 +241,7 @@ const MentorDashboard = () => {
           'Authorization': `Bearer ${token}`
         }
       });
-      setMeetings([...meetings, response.data]);
+      upsertMeeting(response.data);
       setSuccess('Meeting created successfully!');
       setMeetingData({
         topic: '',